@@ -0,0 +1,142 @@
+import logging
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.decomposition import TruncatedSVD
+
+from append_buffer import AppendBuffer, grow
+
+logger = logging.getLogger(__name__)
+
+ANN_FILES = ('ann_components.npy', 'ann_embeddings.npy', 'ann_centroids.npy', 'ann_list_indptr.npy',
+             'ann_list_docs.npy')
+TRAINING_POINTS_PER_LIST = 256
+ASSIGN_CHUNK = 65536
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return (vectors / norms).astype(np.float32)
+
+
+def assign(embeddings: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    assignments = np.empty(len(embeddings), dtype=np.int64)
+    for start in range(0, len(embeddings), ASSIGN_CHUNK):
+        chunk = embeddings[start:start + ASSIGN_CHUNK]
+        assignments[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignments
+
+
+def spherical_kmeans(points: np.ndarray, clusters: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    centroids = points[rng.choice(len(points), clusters, replace=False)]
+    for _ in range(iterations):
+        assignments = assign(points, centroids)
+        members = sparse.csr_matrix((np.ones(len(points), dtype=np.float32), (assignments, np.arange(len(points)))),
+                                    shape=(clusters, len(points)))
+        sums = np.asarray(members @ points)
+        empty = np.flatnonzero(np.bincount(assignments, minlength=clusters) == 0)
+        sums[empty] = points[rng.choice(len(points), len(empty), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+def inverted_lists(assignments: np.ndarray, lists: int) -> Tuple[np.ndarray, np.ndarray]:
+    list_docs = np.argsort(assignments, kind='stable')
+    list_indptr = np.concatenate(([0], np.cumsum(np.bincount(assignments, minlength=lists))))
+    return list_indptr, list_docs
+
+
+class AnnIndex:
+    def __init__(self, components: np.ndarray, embeddings: np.ndarray, centroids: np.ndarray,
+                 list_indptr: np.ndarray, list_docs: np.ndarray, nprobe: int = 8):
+        self.components = components
+        self.embeddings = embeddings
+        self.centroids = centroids
+        self.list_indptr = list_indptr
+        self.list_docs = list_docs
+        self.nprobe = nprobe
+        self._embedding_buffer: Optional[AppendBuffer] = None
+
+    @classmethod
+    def build(cls, matrix: sparse.csr_matrix, dimensions: int = 128, lists: int = 0, nprobe: int = 8,
+              iterations: int = 10, seed: int = 0) -> 'AnnIndex':
+        start = time.perf_counter()
+        rng = np.random.default_rng(seed)
+        dimensions = max(1, min(dimensions, matrix.shape[1] - 1, matrix.shape[0]))
+        svd = TruncatedSVD(n_components=dimensions, random_state=seed)
+        svd.fit(matrix)
+        components = svd.components_.astype(np.float32)
+        embeddings = normalize_rows(matrix @ components.T)
+
+        lists = lists or int(np.sqrt(len(embeddings)))
+        lists = max(1, min(lists, len(embeddings)))
+        sample_size = min(len(embeddings), lists * TRAINING_POINTS_PER_LIST)
+        sample = embeddings[rng.choice(len(embeddings), sample_size, replace=False)]
+        centroids = spherical_kmeans(sample, lists, iterations, rng)
+        list_indptr, list_docs = inverted_lists(assign(embeddings, centroids), lists)
+        logger.info(f"Built ANN index ({dimensions} dimensions, {lists} lists) for {len(embeddings)} articles "
+                    f"in {time.perf_counter() - start:.2f}s")
+        return cls(components, embeddings, centroids, list_indptr, list_docs, nprobe)
+
+    def embed(self, rows: sparse.csr_matrix) -> np.ndarray:
+        return normalize_rows(rows @ self.components.T)
+
+    def _with_embeddings(self, embeddings: np.ndarray) -> 'AnnIndex':
+        list_indptr, list_docs = inverted_lists(assign(embeddings, self.centroids), len(self.centroids))
+        return AnnIndex(self.components, embeddings, self.centroids, list_indptr, list_docs, self.nprobe)
+
+    def extend(self, rows: sparse.csr_matrix) -> 'AnnIndex':
+        embeddings = self.embed(rows)
+        new_indptr, new_docs = inverted_lists(assign(embeddings, self.centroids), len(self.centroids))
+        list_docs = np.empty(len(self.list_docs) + len(new_docs), dtype=np.int64)
+        list_docs[np.arange(len(self.list_docs)) + np.repeat(new_indptr[:-1], np.diff(self.list_indptr))] = self.list_docs
+        list_docs[np.arange(len(new_docs)) + np.repeat(self.list_indptr[1:], np.diff(new_indptr))] = \
+            new_docs + len(self.embeddings)
+        buffer = grow(self._embedding_buffer, self.embeddings, embeddings)
+        extended = AnnIndex(self.components, buffer.values, self.centroids, self.list_indptr + new_indptr, list_docs,
+                            self.nprobe)
+        extended._embedding_buffer = buffer
+        return extended
+
+    def reembed(self, matrix: sparse.csr_matrix) -> 'AnnIndex':
+        return self._with_embeddings(self.embed(matrix))
+
+    def search(self, query_vector: sparse.csr_matrix, k: int, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        query = self.embed(query_vector)[0]
+        if k <= 0 or not query.any():
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        nprobe = max(1, min(nprobe or self.nprobe, len(self.centroids)))
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        docs = np.concatenate([self.list_docs[self.list_indptr[l]:self.list_indptr[l + 1]] for l in probe])
+        similarities = self.embeddings[docs] @ query
+        positive = similarities > 0
+        docs, similarities = docs[positive], similarities[positive]
+        if len(docs) > k:
+            threshold = np.partition(similarities, len(similarities) - k)[len(similarities) - k]
+            keep = similarities >= threshold
+            docs, similarities = docs[keep], similarities[keep]
+        order = np.lexsort((docs, -similarities))[:k]
+        return docs[order].astype(np.int64), similarities[order]
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        arrays = (self.components, self.embeddings, self.centroids, self.list_indptr, self.list_docs)
+        return dict(zip(ANN_FILES, arrays))
+
+    @classmethod
+    def load(cls, index_dir: str, mmap_mode: Optional[str] = 'r', nprobe: int = 8) -> Optional['AnnIndex']:
+        if not all(os.path.exists(os.path.join(index_dir, name)) for name in ANN_FILES):
+            return None
+        return cls(*(np.load(os.path.join(index_dir, name), mmap_mode=mmap_mode) for name in ANN_FILES),
+                   nprobe=nprobe)
+
+    def stats(self) -> Dict:
+        return {
+            'dimensions': int(self.components.shape[0]),
+            'lists': int(len(self.centroids)),
+            'nprobe': self.nprobe
+        }
@@ -1,20 +1,57 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import os
+import hmac
+import json
 import logging
-from typing import List, Dict
+import secrets
+import threading
+import time
+from typing import List, Dict, Optional, Union
+from search_index import SearchIndex, timed
+from facet_index import AUTHOR_FACET, RANGE_FACETS
+from sharded_index import ShardedIndex, index_marker, load_search_index
+from query_cache import QueryCache
+from search_cursors import CursorCache, decode_cursor, encode_cursor, new_cursor_id
+import search_metrics
+from index_reloader import IndexReloader
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-df = None
 vectorizer = None
 tfidf_matrix = None
+search_index = None
+reloader = None
+ingest_lock = threading.Lock()
+ingested_articles: List[Dict] = []
+
+MAX_BATCH_QUERIES = int(os.environ.get('MAX_BATCH_QUERIES', 1000))
+SEARCH_MODES = ('exact', 'ann')
+ANN_DIMENSIONS = int(os.environ.get('ANN_DIMENSIONS', 128))
+ANN_LISTS = int(os.environ.get('ANN_LISTS', 0))
+ANN_NPROBE = int(os.environ.get('ANN_NPROBE', 8))
+ANN_RERANK = int(os.environ.get('ANN_RERANK', 10))
+SEARCH_SHARDS = int(os.environ.get('SEARCH_SHARDS', 1))
+RANKINGS = ('claps', 'bm25')
+BM25_CLAPS_WEIGHT = float(os.environ.get('BM25_CLAPS_WEIGHT', 0.3))
+BM25_ON_LOAD = os.environ.get('BM25_ON_LOAD', '1') != '0'
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 100))
+CURSOR_TTL = float(os.environ.get('CURSOR_TTL', 300))
+CURSOR_MAX_RESULTS = int(os.environ.get('CURSOR_MAX_RESULTS', 10000))
+CURSOR_SECRET = os.environ.get('CURSOR_SECRET', '').encode('utf-8') or secrets.token_bytes(32)
+
+query_cache = QueryCache(
+    max_entries=int(os.environ.get('QUERY_CACHE_SIZE', 1024)),
+    shared_path=os.environ.get('QUERY_CACHE_PATH')
+)
+cursor_cache = CursorCache(
+    ttl=CURSOR_TTL,
+    max_bytes=int(os.environ.get('CURSOR_MAX_BYTES', 64 * 1024 * 1024))
+)
 
 
 def ensure_csv_exists():
@@ -37,35 +74,49 @@ def ensure_csv_exists():
     return os.path.exists(csv_file)
 
 
-def load_data(csv_file: str = 'scrapping_results.csv'):
-    global df, vectorizer, tfidf_matrix
+def set_index(index: Union[SearchIndex, ShardedIndex]) -> None:
+    global vectorizer, tfidf_matrix, search_index
     
+    vectorizer = index.vectorizer
+    tfidf_matrix = getattr(index, 'tfidf_matrix', None)
+    search_index = index
+    query_cache.clear()
+    cursor_cache.clear()
+    search_metrics.set_index_stats(index.stats())
+
+
+def swap_reloaded(index: Union[SearchIndex, ShardedIndex]) -> None:
+    with ingest_lock:
+        if isinstance(index, SearchIndex):
+            store = index.store
+            ingested_articles[:] = [article for article in ingested_articles if store.find(article['url']) is None]
+            if ingested_articles:
+                logger.info(f"Re-applying {len(ingested_articles)} ingested articles missing from the reloaded index")
+                index = index.ingest(pd.DataFrame(ingested_articles))
+        set_index(index)
+
+
+def build_from_csv(csv_file: str) -> Union[SearchIndex, ShardedIndex]:
+    index = SearchIndex.from_file(csv_file, keyword_index=SEARCH_SHARDS <= 1)
+    if SEARCH_SHARDS <= 1 and ANN_DIMENSIONS > 0:
+        index.ensure_ann(ANN_DIMENSIONS, ANN_LISTS, ANN_NPROBE)
+    if SEARCH_SHARDS <= 1 and BM25_ON_LOAD:
+        index.ensure_bm25()
+    if SEARCH_SHARDS > 1:
+        sharded = ShardedIndex.from_index(index, SEARCH_SHARDS)
+        for shard in sharded.shards:
+            shard.ensure_keyword_index()
+        return sharded
+    return index
+
+
+def load_data(csv_file: str = 'scrapping_results.csv'):
     try:
         if not os.path.exists(csv_file):
             logger.error(f"CSV file not found: {csv_file}")
             return False
         
-        df = pd.read_csv(csv_file)
-        logger.info(f"Loaded {len(df)} articles from {csv_file}")
-        
-        df['combined_text'] = (
-            df['title'].fillna('') + ' ' +
-            df['subtitle'].fillna('') + ' ' +
-            df['text'].fillna('') + ' ' +
-            df['keywords'].fillna('')
-        )
-        
-        df['claps'] = pd.to_numeric(df['claps'], errors='coerce').fillna(0)
-        df['combined_text'] = df['combined_text'].fillna('')
-        
-        vectorizer = TfidfVectorizer(
-            max_features=5000,
-            stop_words='english',
-            ngram_range=(1, 2),
-            min_df=1
-        )
-        
-        tfidf_matrix = vectorizer.fit_transform(df['combined_text'])
+        set_index(build_from_csv(csv_file))
         logger.info("TF-IDF matrix created successfully")
         
         return True
@@ -75,61 +126,61 @@ def load_data(csv_file: str = 'scrapping_results.csv'):
         return False
 
 
-def find_similar_articles(query: str, top_n: int = 10) -> List[Dict]:
-    global df, vectorizer, tfidf_matrix
-    
-    if df is None or vectorizer is None or tfidf_matrix is None:
+def load_index(index_dir: str) -> bool:
+    try:
+        set_index(load_search_index(index_dir))
+        return True
+    except Exception as e:
+        logger.error(f"Error loading index from {index_dir}: {str(e)}")
+        return False
+
+
+def parse_filters(params, authors: List[str]) -> Dict:
+    filters = {}
+    authors = [author for author in authors if author]
+    if authors:
+        filters[AUTHOR_FACET] = authors
+    for name in RANGE_FACETS:
+        low, high = params.get(f'min_{name}'), params.get(f'max_{name}')
+        if low in (None, '') and high in (None, ''):
+            continue
+        filters[name] = (
+            float(low) if low not in (None, '') else None,
+            float(high) if high not in (None, '') else None
+        )
+    return filters
+
+
+def find_similar_articles(query: str, top_n: int = 10, mode: str = 'exact', nprobe: Optional[int] = None,
+                          rank: str = 'claps', claps_weight: Optional[float] = None,
+                          filters: Optional[Dict] = None, timings: Optional[Dict[str, float]] = None) -> List[Dict]:
+    index = search_index
+    if index is None:
         return []
     
     try:
-        query_vector = vectorizer.transform([query])
-        
-        similarities = cosine_similarity(query_vector, tfidf_matrix).flatten()
-        
-        df_temp = df.copy()
-        df_temp['similarity'] = similarities
-        
-        if df_temp['similarity'].max() == 0:
-            query_lower = query.lower()
-            df_temp['text_match'] = (
-                df_temp['title'].fillna('').str.lower().str.contains(query_lower, na=False, regex=False) |
-                df_temp['subtitle'].fillna('').str.lower().str.contains(query_lower, na=False, regex=False) |
-                df_temp['keywords'].fillna('').str.lower().str.contains(query_lower, na=False, regex=False) |
-                df_temp['text'].fillna('').str.lower().str.contains(query_lower, na=False, regex=False)
-            )
-            df_temp = df_temp[df_temp['text_match'] == True]
-            if len(df_temp) == 0:
-                query_words = query_lower.split()
-                for word in query_words:
-                    if len(word) > 3:
-                        df_temp = df.copy()
-                        df_temp['text_match'] = (
-                            df_temp['title'].fillna('').str.lower().str.contains(word, na=False, regex=False) |
-                            df_temp['keywords'].fillna('').str.lower().str.contains(word, na=False, regex=False)
-                        )
-                        df_temp = df_temp[df_temp['text_match'] == True]
-                        if len(df_temp) > 0:
-                            break
-            df_temp['similarity'] = 0.5
+        claps_weight = BM25_CLAPS_WEIGHT if claps_weight is None else claps_weight
+        if mode == 'ann':
+            cache_mode = f'ann:{nprobe or ANN_NPROBE}'
+        elif rank == 'bm25':
+            cache_mode = f'bm25:{claps_weight}'
         else:
-            df_temp = df_temp[df_temp['similarity'] > 0]
-        
-        df_sorted = df_temp.sort_values(
-            by=['claps', 'similarity'],
-            ascending=[False, False]
-        )
-        
-        top_results = df_sorted.head(top_n)
-        
-        results = []
-        for _, row in top_results.iterrows():
-            results.append({
-                'url': str(row['url']),
-                'title': str(row['title']),
-                'claps': int(row['claps']) if pd.notna(row['claps']) else 0,
-                'similarity_score': float(row['similarity'])
-            })
+            cache_mode = mode
+        if filters:
+            cache_mode = f'{cache_mode}|{json.dumps(filters, sort_keys=True)}'
+        if query_cache.enabled:
+            cached = query_cache.get(index.version, query, top_n, cache_mode)
+            if cached is not None:
+                return cached
         
+        if mode == 'ann':
+            results = index.search_ann(query, top_n, nprobe, ANN_RERANK, timings)
+        elif rank == 'bm25':
+            results = index.search_bm25(query, top_n, claps_weight, filters, timings)
+        else:
+            results = index.search(query, top_n, filters, timings)
+        if query_cache.enabled:
+            query_cache.put(index.version, query, top_n, results, cache_mode)
         return results
         
     except Exception as e:
@@ -137,12 +188,83 @@ def find_similar_articles(query: str, top_n: int = 10) -> List[Dict]:
         return []
 
 
+def search_page(state: Dict, timings: Optional[Dict[str, float]] = None) -> Optional[Dict]:
+    index = search_index
+    if index is None or state['version'] != index.version or state['expires'] < time.time():
+        return None
+    
+    ranked = cursor_cache.get(state['id'], index.version)
+    if ranked is None:
+        ranked = index.top(state['query'], CURSOR_MAX_RESULTS, filters=state['filters'], timings=timings)
+        cursor_cache.put(state['id'], index.version, ranked)
+    
+    doc_ids, similarities = ranked
+    start, end = state['offset'], state['offset'] + state['page_size']
+    results = index.results(doc_ids[start:end], similarities[start:end])
+    next_cursor = None
+    if end < len(doc_ids):
+        next_cursor = encode_cursor({**state, 'offset': end, 'expires': time.time() + CURSOR_TTL}, CURSOR_SECRET)
+    return {
+        'query': state['query'],
+        'count': len(results),
+        'total': len(doc_ids),
+        'results': results,
+        'next_cursor': next_cursor
+    }
+
+
+def find_similar_articles_batch(queries: List[str], top_ns: List[int]) -> List[List[Dict]]:
+    index = search_index
+    if index is None:
+        return [[] for _ in queries]
+    
+    try:
+        return index.search_batch(queries, top_ns)
+        
+    except Exception as e:
+        logger.error(f"Error finding similar articles for batch: {str(e)}")
+        return [[] for _ in queries]
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    if 'request_start' in g:
+        search_metrics.observe_request(
+            request.endpoint or 'unknown',
+            g.get('outcome') or search_metrics.outcome_for(response.status_code),
+            time.perf_counter() - g.request_start
+        )
+    return response
+
+
+def timed_json(payload: Dict, timings: Dict[str, float]) -> Response:
+    with timed(timings, 'serialize'):
+        response = jsonify(payload)
+    search_metrics.observe_stages(timings)
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    body, content_type = search_metrics.render()
+    return Response(body, content_type=content_type)
+
+
 @app.route('/health', methods=['GET'])
 def health():
     return jsonify({
         'status': 'healthy',
-        'data_loaded': df is not None,
-        'articles_count': len(df) if df is not None else 0
+        'data_loaded': search_index is not None,
+        'articles_count': search_index.stats()['articles'] if search_index is not None else 0,
+        'corpus_version': search_index.version if search_index is not None else None,
+        'query_cache': query_cache.stats(),
+        'cursors': cursor_cache.stats(),
+        'reloader': reloader.stats() if reloader is not None else None
     })
 
 
@@ -153,9 +275,42 @@ def search():
             data = request.get_json() or {}
             query = data.get('query', '') or request.form.get('query', '')
             top_n = int(data.get('top_n', 10) or request.form.get('top_n', 10))
+            mode = data.get('mode') or request.form.get('mode') or 'exact'
+            nprobe = data.get('nprobe') or request.form.get('nprobe')
+            rank = data.get('rank') or request.form.get('rank') or 'claps'
+            claps_weight = data.get('claps_weight', request.form.get('claps_weight'))
+            params = data or request.form
+            cursor = data.get('cursor') or request.form.get('cursor')
+            page_size = data.get('page_size') or request.form.get('page_size')
+            authors = params.get(AUTHOR_FACET) or []
+            authors = [authors] if isinstance(authors, str) else authors
         else:
             query = request.args.get('query', '')
             top_n = int(request.args.get('top_n', 10))
+            mode = request.args.get('mode') or 'exact'
+            nprobe = request.args.get('nprobe')
+            rank = request.args.get('rank') or 'claps'
+            claps_weight = request.args.get('claps_weight')
+            params = request.args
+            authors = request.args.getlist(AUTHOR_FACET)
+            cursor = request.args.get('cursor')
+            page_size = request.args.get('page_size')
+        
+        if cursor:
+            try:
+                state = decode_cursor(cursor, CURSOR_SECRET, MAX_PAGE_SIZE)
+            except ValueError:
+                return jsonify({
+                    'error': 'Invalid cursor'
+                }), 400
+            
+            timings = {}
+            page = search_page(state, timings)
+            if page is None:
+                return jsonify({
+                    'error': 'Cursor expired; start a new search without a cursor'
+                }), 410
+            return timed_json(page, timings)
         
         if not query:
             return jsonify({
@@ -163,25 +318,104 @@ def search():
                 'usage': 'Send "query" parameter with text or keywords'
             }), 400
         
-        if df is None:
+        if mode not in SEARCH_MODES:
+            return jsonify({
+                'error': f'mode must be one of: {", ".join(SEARCH_MODES)}'
+            }), 400
+        
+        if rank not in RANKINGS:
+            return jsonify({
+                'error': f'rank must be one of: {", ".join(RANKINGS)}'
+            }), 400
+        
+        claps_weight = float(claps_weight) if claps_weight not in (None, '') else None
+        if claps_weight is not None and not 0 <= claps_weight <= 1:
+            return jsonify({
+                'error': 'claps_weight must be between 0 and 1'
+            }), 400
+        
+        try:
+            filters = parse_filters(params, authors)
+        except (TypeError, ValueError):
+            return jsonify({
+                'error': f'min_/max_ filters must be numbers ({", ".join(RANGE_FACETS)})'
+            }), 400
+        
+        if mode == 'ann' and filters:
+            return jsonify({
+                'error': 'Filters apply to exact mode only'
+            }), 400
+        
+        if page_size is not None:
+            page_size = int(page_size)
+            if not 1 <= page_size <= MAX_PAGE_SIZE:
+                return jsonify({
+                    'error': f'page_size must be between 1 and {MAX_PAGE_SIZE}'
+                }), 400
+            
+            if mode != 'exact' or rank != 'claps':
+                return jsonify({
+                    'error': 'Paginated search supports mode=exact with rank=claps only'
+                }), 400
+        
+        if mode == 'ann' and rank == 'bm25':
+            return jsonify({
+                'error': 'rank=bm25 applies to exact mode only'
+            }), 400
+        
+        if (mode == 'ann' or rank == 'bm25') and isinstance(search_index, ShardedIndex):
+            return jsonify({
+                'error': f'{"mode=ann" if mode == "ann" else "rank=bm25"} is not available with a sharded index'
+            }), 400
+        
+        if search_index is None:
             return jsonify({
                 'error': 'Data not loaded. Please ensure scrapping_results.csv exists.'
             }), 500
         
-        results = find_similar_articles(query, top_n)
+        if rank == 'bm25' and search_index.bm25 is None:
+            return jsonify({
+                'error': 'rank=bm25 is not available: the BM25 weights are not built '
+                         '(set BM25_ON_LOAD=1, or rebuild with build-index --bm25)'
+            }), 503
         
-        if not results:
+        if mode == 'ann' and search_index.ann is None:
             return jsonify({
+                'error': 'mode=ann is not available: the ANN index is not built '
+                         '(set ANN_DIMENSIONS, or rebuild with build-index --ann-dimensions)'
+            }), 503
+        
+        timings = {}
+        if page_size is not None:
+            return timed_json(search_page({
+                'id': new_cursor_id(),
+                'version': search_index.version,
+                'query': query,
+                'filters': filters,
+                'offset': 0,
+                'page_size': page_size,
+                'expires': time.time() + CURSOR_TTL
+            }, timings), timings)
+        
+        results = find_similar_articles(query, top_n, mode, int(nprobe) if nprobe else None, rank, claps_weight,
+                                        filters, timings)
+        
+        if not results:
+            g.outcome = 'no_results'
+            return timed_json({
                 'message': 'No similar articles found',
                 'query': query,
                 'results': []
-            })
+            }, timings)
         
-        return jsonify({
+        return timed_json({
             'query': query,
+            'mode': mode,
+            'rank': rank,
+            'filters': filters,
             'count': len(results),
             'results': results
-        })
+        }, timings)
         
     except Exception as e:
         logger.error(f"Error in search endpoint: {str(e)}")
@@ -190,6 +424,156 @@ def search():
         }), 500
 
 
+@app.route('/search/batch', methods=['POST'])
+def search_batch():
+    try:
+        data = request.get_json(silent=True) or {}
+        items = data.get('queries')
+        default_top_n = int(data.get('top_n', 10))
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({
+                'error': 'queries must be a non-empty list',
+                'usage': 'Send {"queries": ["text", {"query": "text", "top_n": 5}], "top_n": 10}'
+            }), 400
+        
+        if len(items) > MAX_BATCH_QUERIES:
+            return jsonify({
+                'error': f'At most {MAX_BATCH_QUERIES} queries per batch'
+            }), 400
+        
+        queries = []
+        top_ns = []
+        for item in items:
+            if isinstance(item, dict):
+                queries.append(item.get('query', ''))
+                top_ns.append(int(item.get('top_n', default_top_n)))
+            else:
+                queries.append(item)
+                top_ns.append(default_top_n)
+        
+        if not all(isinstance(query, str) and query for query in queries):
+            return jsonify({
+                'error': 'Every query must be a non-empty string'
+            }), 400
+        
+        if search_index is None:
+            return jsonify({
+                'error': 'Data not loaded. Please ensure scrapping_results.csv exists.'
+            }), 500
+        
+        batch = find_similar_articles_batch(queries, top_ns)
+        
+        return jsonify({
+            'count': len(batch),
+            'results': [
+                {'query': query, 'count': len(results), 'results': results}
+                for query, results in zip(queries, batch)
+            ]
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in batch search endpoint: {str(e)}")
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+
+@app.route('/article', methods=['GET'])
+def article():
+    try:
+        url = request.args.get('url', '')
+        
+        if not url:
+            return jsonify({
+                'error': 'url parameter is required',
+                'usage': 'GET /article?url=https://medium.com/...'
+            }), 400
+        
+        index = search_index
+        if index is None:
+            return jsonify({
+                'error': 'Data not loaded. Please ensure scrapping_results.csv exists.'
+            }), 500
+        
+        document = index.document(url)
+        if document is None:
+            return jsonify({
+                'error': f'No article with url {url}'
+            }), 404
+        
+        return jsonify(document)
+        
+    except Exception as e:
+        logger.error(f"Error in article endpoint: {str(e)}")
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+
+@app.route('/admin/ingest', methods=['POST'])
+def admin_ingest():
+    try:
+        admin_token = os.environ.get('ADMIN_TOKEN', '')
+        if not admin_token:
+            return jsonify({
+                'error': 'Ingest is disabled. Set ADMIN_TOKEN to enable it.'
+            }), 403
+        
+        if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), admin_token):
+            return jsonify({
+                'error': 'Invalid admin token'
+            }), 401
+        
+        data = request.get_json(silent=True) or {}
+        articles = data.get('articles')
+        
+        if not isinstance(articles, list) or not articles:
+            return jsonify({
+                'error': 'articles must be a non-empty list',
+                'usage': 'Send {"articles": [{"url": ..., "title": ..., "text": ..., "claps": ...}]}'
+            }), 400
+        
+        if not all(isinstance(article, dict) and article.get('url') for article in articles):
+            return jsonify({
+                'error': 'Every article must be an object with a url'
+            }), 400
+        
+        while True:
+            with ingest_lock:
+                index = search_index
+                if index is None:
+                    return jsonify({
+                        'error': 'Data not loaded. Please ensure scrapping_results.csv exists.'
+                    }), 500
+                
+                if isinstance(index, ShardedIndex):
+                    return jsonify({
+                        'error': 'Ingest is not supported for sharded indexes; rebuild with build-index --shards'
+                    }), 400
+            
+            grown = index.ingest(pd.DataFrame(articles), data.get('refresh_idf'))
+            with ingest_lock:
+                if search_index is index:
+                    ingested_articles.extend(articles)
+                    set_index(grown)
+                    index = grown
+                    break
+        
+        return jsonify({
+            'ingested': len(articles),
+            'articles_count': index.stats()['articles'],
+            'corpus_version': index.version,
+            'idf_documents': index.idf_documents
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in ingest endpoint: {str(e)}")
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+
 @app.route('/', methods=['GET'])
 def index():
     return jsonify({
@@ -198,6 +582,10 @@ def index():
         'endpoints': {
             '/health': 'GET - Health check',
             '/search': 'POST/GET - Search for similar articles',
+            '/search/batch': 'POST - Search for many queries in one request',
+            '/article': 'GET - Full text and metadata of one article by url',
+            '/metrics': 'GET - Prometheus metrics (latency by stage, request outcomes, index size, memory)',
+            '/admin/ingest': 'POST - Add newly scraped articles to the index (requires X-Admin-Token)',
             '/': 'GET - This documentation'
         },
         'usage': {
@@ -205,7 +593,17 @@ def index():
                 'method': 'POST or GET',
                 'parameters': {
                     'query': 'Text or keywords to search for (required)',
-                    'top_n': 'Number of results to return (optional, default: 10)'
+                    'top_n': 'Number of results to return (optional, default: 10)',
+                    'mode': 'exact (default) or ann for approximate nearest neighbours (optional)',
+                    'nprobe': 'IVF lists probed in ann mode; higher is slower with better recall (optional)',
+                    'rank': 'claps (default: most-clapped matches first) or bm25 (optional)',
+                    'claps_weight': 'Share of log(claps) in the bm25 ranking, 0-1 (optional, default: 0.3)',
+                    'author_name': 'Only articles by this author; repeat for several authors (optional)',
+                    'min_reading_time/max_reading_time': 'Reading time range in minutes (optional)',
+                    'min_claps/max_claps': 'Claps range (optional)',
+                    'min_num_images/max_num_images': 'Image count range (optional)',
+                    'page_size': 'Return one page and a next_cursor instead of top_n results (optional)',
+                    'cursor': 'next_cursor from the previous page; other parameters are ignored (optional)'
                 },
                 'example_post': {
                     'url': '/search',
@@ -216,18 +614,52 @@ def index():
                     'url': '/search?query=machine+learning&top_n=10',
                     'method': 'GET'
                 }
+            },
+            'search_batch': {
+                'method': 'POST',
+                'parameters': {
+                    'queries': 'List of query strings or {"query", "top_n"} objects (required)',
+                    'top_n': 'Default number of results per query (optional, default: 10)'
+                },
+                'example_post': {
+                    'url': '/search/batch',
+                    'method': 'POST',
+                    'body': {'queries': ['machine learning', {'query': 'docker', 'top_n': 3}], 'top_n': 10}
+                }
             }
         }
     })
 
 
+def start_reloader(interval: float) -> IndexReloader:
+    global reloader
+    
+    if os.path.exists(index_marker(index_dir)):
+        reloader = IndexReloader(index_marker(index_dir), lambda: load_search_index(index_dir), swap_reloaded,
+                                 interval)
+    else:
+        reloader = IndexReloader(csv_file, lambda: build_from_csv(csv_file), swap_reloaded, interval)
+    reloader.start()
+    logger.info(f"Watching {reloader.path} for changes every {interval}s")
+    return reloader
+
+
 csv_file = os.environ.get('CSV_FILE', 'scrapping_results.csv')
-ensure_csv_exists()
-if load_data(csv_file):
+index_dir = os.environ.get('INDEX_DIR', 'search_index')
+if os.path.exists(index_marker(index_dir)):
+    data_ready = load_index(index_dir)
+else:
+    ensure_csv_exists()
+    data_ready = load_data(csv_file)
+if data_ready:
     logger.info("API ready to serve requests")
 else:
     logger.error("Data not loaded. API will return errors until data is available.")
 
+reload_interval = float(os.environ.get('RELOAD_INTERVAL', 0))
+if reload_interval > 0:
+    start_reloader(reload_interval)
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
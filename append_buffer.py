@@ -0,0 +1,70 @@
+import functools
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+GROWTH = 1.5
+
+append_lock = threading.Lock()
+
+
+def fits(values: np.ndarray, dtype: np.dtype) -> bool:
+    if len(values) == 0 or np.can_cast(values.dtype, dtype):
+        return True
+    if values.dtype.kind in 'iu' and dtype.kind in 'iu':
+        info = np.iinfo(dtype)
+        return bool(info.min <= values.min() and values.max() <= info.max)
+    return False
+
+
+class AppendBuffer:
+    def __init__(self, storage: np.ndarray, size: int, tip: Optional[List[int]] = None):
+        self.storage = storage
+        self.size = size
+        self.tip = tip if tip is not None else [size]
+
+    @classmethod
+    def wrap(cls, values: np.ndarray) -> 'AppendBuffer':
+        return cls(values, len(values))
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.storage[:self.size]
+
+    def append(self, new: np.ndarray) -> 'AppendBuffer':
+        total = self.size + len(new)
+        in_place = fits(new, self.storage.dtype)
+        with append_lock:
+            if in_place and self.tip[0] == self.size and total <= len(self.storage) and self.storage.flags.writeable:
+                self.storage[self.size:total] = new
+                self.tip[0] = total
+                return AppendBuffer(self.storage, total, self.tip)
+        dtype = self.storage.dtype if in_place else np.result_type(self.storage.dtype, new.dtype)
+        storage = np.empty((max(total, int(total * GROWTH)),) + self.storage.shape[1:], dtype=dtype)
+        storage[:self.size] = self.values
+        storage[self.size:total] = new
+        return AppendBuffer(storage, total)
+
+
+def grow(buffer: Optional[AppendBuffer], values: np.ndarray, new: np.ndarray) -> AppendBuffer:
+    return (buffer if buffer is not None else AppendBuffer.wrap(values)).append(new)
+
+
+def append_rows(postings: sparse.csc_matrix, rows: sparse.csc_matrix) -> sparse.csc_matrix:
+    old_counts = np.diff(postings.indptr)
+    new_counts = np.diff(rows.indptr)
+    old_dest = np.arange(postings.nnz) + np.repeat(rows.indptr[:-1], old_counts)
+    new_dest = np.arange(rows.nnz) + np.repeat(postings.indptr[1:], new_counts)
+
+    data = np.empty(postings.nnz + rows.nnz, dtype=np.result_type(postings.data, rows.data))
+    docs = np.empty(postings.nnz + rows.nnz, dtype=np.int64)
+    data[old_dest], docs[old_dest] = postings.data, postings.indices
+    data[new_dest], docs[new_dest] = rows.data, rows.indices + postings.shape[0]
+    shape = (postings.shape[0] + rows.shape[0], postings.shape[1])
+    return sparse.csc_matrix((data, docs, postings.indptr + rows.indptr), shape=shape)
+
+
+def merge_postings(segments: List[Tuple[int, sparse.csc_matrix]]) -> sparse.csc_matrix:
+    return functools.reduce(append_rows, [postings for _, postings in segments])
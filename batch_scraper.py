@@ -1,35 +1,96 @@
 import os
 import sys
-from medium_scraper import MediumScraper, load_urls_from_file
+import time
+from contextlib import nullcontext
+from medium_scraper import PARSERS, MediumScraper, add_cache_arguments, add_telemetry_arguments, load_urls_from_file, open_sink
+from scrape_telemetry import ScrapeTelemetry
+from scrape_ledger import ScrapeLedger
+from scrape_pipeline import ScrapePipeline
 
-def split_into_batches(urls, batch_size=1000):
-    for i in range(0, len(urls), batch_size):
+DEFAULT_LEDGER = 'scrape_ledger.sqlite3'
+
+def split_into_batches(urls, batch_size=1000, start=0):
+    for i in range(start, len(urls), batch_size):
         yield urls[i:i + batch_size]
 
-def batch_scrape(input_file, output_file='scrapping_results.csv', batch_size=1000, delay=1.0):
+def retry_transient_failures(scraper, ledger, output_file, concurrency=1, pipeline=None, sink=None):
+    while True:
+        next_retry_at = ledger.next_retry_at()
+        if next_retry_at is None:
+            break
+        wait = next_retry_at - time.time()
+        if wait > 0:
+            print(f"Waiting {wait:.1f}s before retrying transient failures...")
+            time.sleep(wait)
+        due = ledger.due_retries()
+        print(f"Retrying {len(due)} URLs that failed with transient errors")
+        scraper.scrape_urls(due, output_file, concurrency=concurrency, pipeline=pipeline, ledger=ledger, sink=sink)
+
+def batch_scrape(input_file, output_file='scrapping_results.csv', batch_size=1000, delay=1.0, concurrency=1,
+                 parse_workers=0, queue_size=64, ordered=False, parser='bs4', cache_dir=None, cache_ttl=86400,
+                 cache_max_mb=1024, ledger_path=None, resume=False, max_attempts=3, retry_backoff=2.0,
+                 use_bloom=False, report=None, progress_interval=30.0, url_log=None):
     print(f"Loading URLs from {input_file}...")
-    urls = load_urls_from_file(input_file)
+    urls = load_urls_from_file(input_file, use_bloom=use_bloom)
     total_urls = len(urls)
     print(f"Loaded {total_urls} URLs")
     
-    scraper = MediumScraper(delay=delay)
+    telemetry = ScrapeTelemetry(progress_interval, url_log)
+    scraper = MediumScraper(delay=delay, parser=parser, cache_dir=cache_dir, cache_ttl=cache_ttl,
+                            cache_max_mb=cache_max_mb, telemetry=telemetry)
+    pipeline = ScrapePipeline(scraper, concurrency, parse_workers, queue_size, ordered) if parse_workers else None
+    ledger = ScrapeLedger(ledger_path, max_attempts, retry_backoff) if ledger_path else None
+    cursor_key = os.path.abspath(input_file)
+    
+    start = 0
+    if ledger is not None and resume:
+        start = min(ledger.cursor(cursor_key), total_urls)
+        print(f"Resuming after checkpoint: {start}/{total_urls} URLs already processed")
+    elif ledger is not None:
+        ledger.reset()
+        print(f"Starting a fresh run; cleared the ledger at {ledger_path}")
     
-    batch_num = 1
+    batch_num = start // batch_size + 1
     total_batches = (total_urls + batch_size - 1) // batch_size
+    position = start
     
-    for batch in split_into_batches(urls, batch_size):
-        print(f"\n{'='*60}")
-        print(f"Processing batch {batch_num}/{total_batches} ({len(batch)} URLs)")
-        print(f"{'='*60}")
-        
-        scraper.scrape_urls(batch, output_file)
-        
-        batch_num += 1
+    with pipeline or nullcontext(), open_sink(output_file) as sink:
+        for batch in split_into_batches(urls, batch_size, start):
+            print(f"\n{'='*60}")
+            print(f"Processing batch {batch_num}/{total_batches} ({len(batch)} URLs)")
+            print(f"{'='*60}")
+            
+            pending = batch
+            if ledger is not None and resume:
+                pending = ledger.pending(batch)
+                if len(pending) < len(batch):
+                    print(f"Skipping {len(batch) - len(pending)} URLs already finished")
+            
+            scraper.scrape_urls(pending, output_file, concurrency=concurrency, pipeline=pipeline, ledger=ledger,
+                                sink=sink)
+            
+            position += len(batch)
+            if ledger is not None:
+                ledger.set_cursor(cursor_key, position)
+            
+            batch_num += 1
+            
+            print(f"Progress: {position}/{total_urls} URLs processed")
         
-        print(f"Progress: {min(batch_num * batch_size, total_urls)}/{total_urls} URLs processed")
+        if ledger is not None:
+            retry_transient_failures(scraper, ledger, output_file, concurrency, pipeline, sink)
     
+    telemetry.close()
+    summary = telemetry.report()
     print(f"\n{'='*60}")
     print(f"All batches completed! Results saved to {output_file}")
+    print(f"Throughput: {summary['urls_per_second']:.2f} URLs/s, error rate {summary['errors']['rate']:.1%}")
+    if report:
+        telemetry.write_report(report)
+        print(f"Scrape report written to {report}")
+    if ledger is not None:
+        print(f"Ledger summary: {ledger.summary()}")
+        ledger.close()
     print(f"{'='*60}")
 
 if __name__ == '__main__':
@@ -37,9 +98,21 @@ if __name__ == '__main__':
     
     parser = argparse.ArgumentParser(description='Batch scrape Medium articles')
     parser.add_argument('--input', type=str, required=True, help='Input file with URLs')
-    parser.add_argument('--output', type=str, default='scrapping_results.csv', help='Output CSV file')
+    parser.add_argument('--output', type=str, default='scrapping_results.csv', help='Output CSV file, or a .parquet dataset directory')
     parser.add_argument('--batch-size', type=int, default=1000, help='URLs per batch')
     parser.add_argument('--delay', type=float, default=1.0, help='Delay between requests (seconds)')
+    parser.add_argument('--concurrency', type=int, default=1, help='Requests kept in flight; the delay is then enforced per host')
+    parser.add_argument('--parse-workers', type=int, default=0, help='Parse HTML in this many worker processes (0 = parse in the fetch threads)')
+    parser.add_argument('--queue-size', type=int, default=64, help='Fetched pages buffered before fetchers wait on the parsers')
+    parser.add_argument('--ordered', action='store_true', help='Write rows in input order when using --parse-workers')
+    parser.add_argument('--parser', type=str, choices=PARSERS, default='bs4', help='HTML extractor backend (fast = lxml)')
+    add_cache_arguments(parser)
+    parser.add_argument('--ledger', type=str, help=f'Checkpoint ledger of finished URLs (default with --resume: {DEFAULT_LEDGER})')
+    parser.add_argument('--resume', action='store_true', help='Continue from the last checkpoint and skip URLs the ledger marks finished')
+    parser.add_argument('--max-attempts', type=int, default=3, help='Attempts per URL for transient errors (timeouts, 429, 5xx)')
+    parser.add_argument('--retry-backoff', type=float, default=2.0, help='Base delay for exponential retry backoff (seconds)')
+    parser.add_argument('--bloom', action='store_true', help='Deduplicate URLs with a Bloom filter (for lists in the millions)')
+    add_telemetry_arguments(parser)
     
     args = parser.parse_args()
     
@@ -47,4 +120,7 @@ if __name__ == '__main__':
         print(f"Error: Input file '{args.input}' not found")
         sys.exit(1)
     
-    batch_scrape(args.input, args.output, args.batch_size, args.delay)
+    batch_scrape(args.input, args.output, args.batch_size, args.delay, args.concurrency,
+                 args.parse_workers, args.queue_size, args.ordered, args.parser, args.cache_dir,
+                 args.cache_ttl, args.cache_max_mb, args.ledger or (DEFAULT_LEDGER if args.resume else None), args.resume, args.max_attempts,
+                 args.retry_backoff, args.bloom, args.report, args.progress_interval, args.url_log)
@@ -0,0 +1,81 @@
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_search import QUERIES, make_corpus
+from search_index import SearchIndex
+
+
+def recall_at_k(exact_similarities: np.ndarray, found_similarities: np.ndarray) -> float:
+    if len(exact_similarities) == 0:
+        return 1.0
+    hits = np.count_nonzero(found_similarities >= exact_similarities[-1] - 1e-9)
+    return min(hits, len(exact_similarities)) / len(exact_similarities)
+
+
+def run_ann_benchmark(size: int = 100000, dimensions: int = 128, lists: int = 0, nprobes=(1, 2, 4, 8, 16, 32),
+                      query_count: int = 200, k: int = 10, rerank: int = 10):
+    index = SearchIndex.from_articles(make_corpus(size))
+    start = time.perf_counter()
+    ann = index.ensure_ann(dimensions, lists)
+    ann_build = time.perf_counter() - start
+
+    random.seed(7)
+    queries = QUERIES + random.sample(list(index.titles), min(query_count, size))
+
+    timings, exact = [], []
+    for query in queries:
+        start = time.perf_counter()
+        exact.append(index.nearest(query, k)[1])
+        timings.append((time.perf_counter() - start) * 1000)
+    exact_p50 = np.percentile(timings, 50)
+    print(f"{size} articles, ANN build {ann_build:.1f}s ({ann.stats()['dimensions']} dimensions, "
+          f"{ann.stats()['lists']} lists); exact p50 {exact_p50:.2f}ms")
+
+    report = {'articles': size, 'ann_build_seconds': round(ann_build, 2), 'exact_p50_ms': round(exact_p50, 3),
+              'ann': ann.stats(), 'rerank': rerank, 'runs': []}
+    for nprobe in nprobes:
+        timings, recalls = [], []
+        for query, exact_similarities in zip(queries, exact):
+            start = time.perf_counter()
+            _, similarities = index.ann_nearest(query, k, nprobe, rerank)
+            timings.append((time.perf_counter() - start) * 1000)
+            recalls.append(recall_at_k(exact_similarities, similarities))
+        p50, p99 = np.percentile(timings, 50), np.percentile(timings, 99)
+        report['runs'].append({
+            'nprobe': nprobe,
+            f'recall@{k}': round(float(np.mean(recalls)), 4),
+            'p50_ms': round(p50, 3),
+            'p99_ms': round(p99, 3)
+        })
+        print(f"nprobe={nprobe:>3}  recall@{k} {np.mean(recalls):.3f}  p50 {p50:.2f}ms  p99 {p99:.2f}ms")
+    return report
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Measure ANN recall and latency against exact search')
+    parser.add_argument('--size', type=int, default=100000, help='Synthetic corpus size')
+    parser.add_argument('--dimensions', type=int, default=128, help='SVD dimensions')
+    parser.add_argument('--lists', type=int, default=0, help='IVF lists (0 = sqrt of the corpus size)')
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32], help='nprobe values to compare')
+    parser.add_argument('--rerank', type=int, default=10,
+                        help='ANN candidates per requested result that are re-scored exactly')
+    parser.add_argument('--queries', type=int, default=200, help='Article titles used as extra queries')
+    parser.add_argument('--json', type=str, help='Write the report to this JSON file')
+
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    report = run_ann_benchmark(args.size, args.dimensions, args.lists, args.nprobe, args.queries, rerank=args.rerank)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
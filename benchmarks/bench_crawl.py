@@ -0,0 +1,57 @@
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixture_server import fixture_urls, start_server
+from medium_scraper import MediumScraper
+
+
+def run_crawl_benchmark(count: int = 200, latency: float = 0.05, delay: float = 0.0,
+                        concurrency_levels=(1, 8, 32), hosts: int = 4):
+    server, _ = start_server('0.0.0.0', latency=latency)
+    port = server.server_address[1]
+    urls = fixture_urls(port, count, hosts)
+    report = []
+    try:
+        for concurrency in concurrency_levels:
+            with tempfile.TemporaryDirectory() as tmp:
+                output = os.path.join(tmp, 'results.csv')
+                scraper = MediumScraper(delay=delay)
+                start = time.perf_counter()
+                scraper.scrape_urls(urls, output, concurrency=concurrency)
+                elapsed = time.perf_counter() - start
+            report.append({
+                'concurrency': concurrency,
+                'urls': count,
+                'seconds': round(elapsed, 3),
+                'urls_per_sec': round(count / elapsed, 1)
+            })
+            print(f"concurrency={concurrency:>3}  {count} URLs in {elapsed:.2f}s  ({count / elapsed:.1f} URLs/sec)")
+    finally:
+        server.shutdown()
+    return report
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark scraper throughput against the local fixture server')
+    parser.add_argument('--count', type=int, default=200, help='URLs to scrape per run')
+    parser.add_argument('--latency', type=float, default=0.05, help='Simulated server latency (seconds)')
+    parser.add_argument('--delay', type=float, default=0.0, help='Per-host politeness delay (seconds)')
+    parser.add_argument('--hosts', type=int, default=4, help='Distinct hosts the URLs are spread across')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32], help='Concurrency levels to compare')
+    parser.add_argument('--json', type=str, help='Write the report to this JSON file')
+
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    report = run_crawl_benchmark(args.count, args.latency, args.delay, args.concurrency, args.hosts)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,68 @@
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_1000_articles import generate_article
+from search_index import SearchIndex
+
+QUERIES = [
+    'machine learning', 'python pandas', 'kubernetes docker', 'react frontend', 'quantum algorithms',
+    'cloud infrastructure', 'neural networks', 'best practices', 'tion', 'blockchain smart contracts'
+]
+
+
+def make_corpus(size: int, seed: int = 42) -> pd.DataFrame:
+    random.seed(seed)
+    return pd.DataFrame([generate_article(i) for i in range(1, size + 1)])
+
+
+def measure(index: SearchIndex, queries, rounds: int, top_n: int):
+    timings = []
+    for _ in range(rounds):
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, top_n)
+            timings.append((time.perf_counter() - start) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def run_search_benchmark(sizes=(1000, 100000, 1000000), rounds: int = 20, top_n: int = 10):
+    report = []
+    for size in sizes:
+        index = SearchIndex.from_articles(make_corpus(size))
+        index.search(QUERIES[0], top_n)
+        p50, p99 = measure(index, QUERIES, rounds, top_n)
+        report.append({
+            'articles': size,
+            'build_seconds': round(index.build_seconds, 2),
+            'p50_ms': round(p50, 3),
+            'p99_ms': round(p99, 3)
+        })
+        print(f"{size:>8} articles  build {index.build_seconds:.1f}s  p50 {p50:.2f}ms  p99 {p99:.2f}ms")
+    return report
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark search latency on synthetic corpora')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000], help='Corpus sizes to index')
+    parser.add_argument('--rounds', type=int, default=20, help='Passes over the query set per corpus')
+    parser.add_argument('--top-n', type=int, default=10, help='Results requested per query')
+    parser.add_argument('--json', type=str, help='Write the report to this JSON file')
+
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    report = run_search_benchmark(args.sizes, args.rounds, args.top_n)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,251 @@
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+from requests import Response
+from requests.adapters import HTTPAdapter
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+
+from bench_search import QUERIES, make_corpus
+from fixture_server import load_fixture_pages
+from generate_1000_articles import topics
+from medium_scraper import PARSERS, MediumScraper
+from search_index import SearchIndex
+from search_metrics import resident_memory_bytes
+
+PARTS = ('extraction', 'index', 'api')
+COMPARED_SUFFIXES = ('_ms', '_seconds', '_per_sec', 'qps')
+RUN_KEYS = ('parser', 'articles', 'concurrency')
+
+
+class FixtureAdapter(HTTPAdapter):
+    def __init__(self, pages):
+        super().__init__()
+        self.pages = pages
+
+    def send(self, request, **kwargs):
+        _, body = self.pages[zlib.crc32(request.url.encode('utf-8')) % len(self.pages)]
+        response = Response()
+        response.status_code = 200
+        response._content = body
+        response.headers['Content-Type'] = 'text/html; charset=utf-8'
+        response.url = request.url
+        response.request = request
+        response.encoding = 'utf-8'
+        return response
+
+
+def latency_summary(timings: List[float]) -> Dict:
+    return {
+        'p50_ms': round(float(np.percentile(timings, 50)), 3),
+        'p99_ms': round(float(np.percentile(timings, 99)), 3),
+        'mean_ms': round(float(np.mean(timings)), 3)
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict:
+    return {
+        'commit': git_revision(),
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+
+
+def bench_extraction(pages_per_parser: int = 2000, parsers=PARSERS) -> List[Dict]:
+    pages = load_fixture_pages()
+    report = []
+    for parser in parsers:
+        scraper = MediumScraper(delay=0, parser=parser)
+        scraper.session.mount('https://', FixtureAdapter(pages))
+        urls = [f'https://medium.com/@bench/article-{i:x}' for i in range(pages_per_parser)]
+        scraper.extract_article_data(urls[0])
+        timings = []
+        start = time.perf_counter()
+        for url in urls:
+            page_start = time.perf_counter()
+            scraper.extract_article_data(url)
+            timings.append((time.perf_counter() - page_start) * 1000)
+        elapsed = time.perf_counter() - start
+        report.append({
+            'parser': parser,
+            'pages': len(urls),
+            'fixtures': len(pages),
+            'seconds': round(elapsed, 3),
+            'pages_per_sec': round(len(urls) / elapsed, 1),
+            **latency_summary(timings)
+        })
+        print(f"extraction {parser:>5}  {len(urls)} pages in {elapsed:.2f}s  ({len(urls) / elapsed:.1f} pages/sec)")
+    return report
+
+
+def bench_index_build(sizes=(10000, 100000, 1000000)) -> List[Dict]:
+    report = []
+    for size in sizes:
+        start = time.perf_counter()
+        corpus = make_corpus(size)
+        generate_seconds = time.perf_counter() - start
+        index = SearchIndex.from_articles(corpus)
+        del corpus
+        stats = index.stats()
+        report.append({
+            'articles': size,
+            'generate_seconds': round(generate_seconds, 3),
+            'build_seconds': round(index.build_seconds, 3),
+            'articles_per_sec': round(size / index.build_seconds, 1),
+            'terms': stats['terms'],
+            'nnz': stats['nnz'],
+            'index_bytes': stats['bytes'],
+            'resident_bytes': resident_memory_bytes()
+        })
+        print(f"index {size:>8} articles  build {index.build_seconds:.2f}s  {stats['bytes'] / 2 ** 20:.0f} MiB")
+        del index
+    return report
+
+
+def load_api(size: int, query_cache: bool):
+    corpus_dir = tempfile.mkdtemp(prefix='bench-api-')
+    csv_file = os.path.join(corpus_dir, 'articles.csv')
+    make_corpus(size).to_csv(csv_file, index=False)
+    os.environ['CSV_FILE'] = csv_file
+    os.environ['INDEX_DIR'] = os.path.join(corpus_dir, 'missing-index')
+    os.environ['QUERY_CACHE_SIZE'] = os.environ.get('QUERY_CACHE_SIZE', '1024') if query_cache else '0'
+    import api
+    if not api.data_ready:
+        raise RuntimeError(f"API failed to load {csv_file}")
+    return api
+
+
+def bench_api(size: int = 10000, concurrency_levels=(1, 4, 16), requests_per_level: int = 2000, top_n: int = 10,
+              query_cache: bool = False, seed: int = 7) -> Dict:
+    api = load_api(size, query_cache)
+    rng = random.Random(seed)
+    words = sorted({word.strip(',').lower() for topic, keywords in topics for word in f'{topic} {keywords}'.split()})
+    queries = QUERIES + [' '.join(rng.sample(words, 2)) for _ in range(200)]
+    local = threading.local()
+
+    def request(i: int) -> float:
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = api.app.test_client()
+        start = time.perf_counter()
+        response = client.get('/search', query_string={'query': queries[i % len(queries)], 'top_n': top_n})
+        elapsed = (time.perf_counter() - start) * 1000
+        if response.status_code != 200:
+            raise RuntimeError(f"/search returned {response.status_code}: {response.get_data(as_text=True)}")
+        return elapsed
+
+    for i in range(len(queries)):
+        request(i)
+    report = {'articles': size, 'top_n': top_n, 'query_cache': query_cache, 'queries': len(queries), 'runs': []}
+    for concurrency in concurrency_levels:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            start = time.perf_counter()
+            timings = list(executor.map(request, range(requests_per_level)))
+            elapsed = time.perf_counter() - start
+        run = {
+            'concurrency': concurrency,
+            'requests': requests_per_level,
+            'seconds': round(elapsed, 3),
+            'qps': round(requests_per_level / elapsed, 1),
+            **latency_summary(timings)
+        }
+        report['runs'].append(run)
+        print(f"/search concurrency={concurrency:>3}  {run['qps']:.0f} QPS  p50 {run['p50_ms']:.2f}ms  "
+              f"p99 {run['p99_ms']:.2f}ms")
+    return report
+
+
+def run_suite(parts=PARTS, pages: int = 2000, sizes=(10000, 100000, 1000000), api_size: int = 10000,
+              concurrency_levels=(1, 4, 16), requests_per_level: int = 2000, query_cache: bool = False) -> Dict:
+    results = {'environment': environment()}
+    if 'extraction' in parts:
+        results['extraction'] = bench_extraction(pages)
+    if 'index' in parts:
+        results['index_build'] = bench_index_build(sizes)
+    if 'api' in parts:
+        results['api'] = bench_api(api_size, concurrency_levels, requests_per_level, query_cache=query_cache)
+    return results
+
+
+def flatten(results, prefix: str = '') -> Dict[str, float]:
+    flat = {}
+    if isinstance(results, list):
+        for i, item in enumerate(results):
+            label = ','.join(f'{key}={item[key]}' for key in RUN_KEYS if isinstance(item, dict) and key in item)
+            flat.update(flatten(item, f'{prefix}[{label or i}]'))
+    elif isinstance(results, dict):
+        for key, value in results.items():
+            flat.update(flatten(value, f'{prefix}.{key}' if prefix else key))
+    elif isinstance(results, (int, float)) and not isinstance(results, bool):
+        flat[prefix] = results
+    return flat
+
+
+def compare(baseline: Dict, current: Dict) -> List[Dict]:
+    before = flatten({key: value for key, value in baseline.items() if key != 'environment'})
+    after = flatten({key: value for key, value in current.items() if key != 'environment'})
+    changes = []
+    for metric in sorted(before.keys() & after.keys()):
+        if metric.endswith(COMPARED_SUFFIXES) and before[metric]:
+            changes.append({
+                'metric': metric,
+                'baseline': before[metric],
+                'current': after[metric],
+                'change': round(after[metric] / before[metric] - 1, 4)
+            })
+    return changes
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Offline benchmarks for extraction, index builds and /search latency')
+    parser.add_argument('--parts', nargs='+', choices=PARTS, default=list(PARTS), help='Benchmarks to run')
+    parser.add_argument('--pages', type=int, default=2000, help='Fixture pages extracted per parser')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000], help='Corpus sizes to index')
+    parser.add_argument('--api-size', type=int, default=10000, help='Corpus size served for the /search load test')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16], help='Concurrent /search clients')
+    parser.add_argument('--requests', type=int, default=2000, help='/search requests per concurrency level')
+    parser.add_argument('--query-cache', action='store_true', help='Keep the API query cache enabled during the load test')
+    parser.add_argument('--json', type=str, default='bench_results.json', help='Write the results to this JSON file')
+    parser.add_argument('--compare', type=str, help='Baseline JSON from an earlier run to diff the results against')
+
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    results = run_suite(args.parts, args.pages, args.sizes, args.api_size, args.concurrency, args.requests,
+                        args.query_cache)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            results['comparison'] = compare(json.load(f), results)
+        for change in results['comparison']:
+            print(f"{change['metric']:<60} {change['baseline']:>12} -> {change['current']:>12}  "
+                  f"({change['change']:+.1%})")
+    with open(args.json, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.json}")
@@ -0,0 +1,124 @@
+import os
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fixtures', 'pages')
+LAST_MODIFIED = 'Mon, 02 Jan 2023 00:00:00 GMT'
+
+
+def load_fixture_pages(fixture_dir: str = FIXTURE_DIR) -> List[Tuple[str, bytes]]:
+    pages = []
+    for name in sorted(os.listdir(fixture_dir)):
+        if name.endswith('.html'):
+            with open(os.path.join(fixture_dir, name), 'rb') as f:
+                pages.append((name, f.read()))
+    return pages
+
+
+def etag_for(body: bytes) -> str:
+    return f'"{zlib.crc32(body):08x}"'
+
+
+def make_handler(pages: List[Tuple[str, bytes]], latency: float, feeds: Dict[str, bytes],
+                 requests_seen: List[Tuple[str, Dict[str, str]]]):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def send_body(self, body: bytes, content_type: str, name: str) -> None:
+            etag = etag_for(body)
+            if self.headers.get('If-None-Match') == etag or self.headers.get('If-Modified-Since') == LAST_MODIFIED:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', LAST_MODIFIED)
+            self.send_header('X-Fixture', name)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if latency > 0:
+                time.sleep(latency)
+            path = self.path.split('?', 1)[0]
+            requests_seen.append((path, dict(self.headers)))
+            if path.startswith('/status/'):
+                code = int(path.rsplit('/', 1)[-1])
+                self.send_response(code)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            if path.startswith('/feed/'):
+                feed = feeds.get(path[len('/feed/'):])
+                if feed is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_body(feed, 'application/rss+xml; charset=utf-8', path)
+                return
+            name, body = pages[zlib.crc32(path.encode('utf-8')) % len(pages)]
+            self.send_body(body, 'text/html; charset=utf-8', name)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FixtureHandler
+
+
+def start_server(host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 fixture_dir: str = FIXTURE_DIR,
+                 feeds: Optional[Dict[str, bytes]] = None) -> Tuple[ThreadingHTTPServer, threading.Thread]:
+    requests_seen: List[Tuple[str, Dict[str, str]]] = []
+    feeds = feeds if feeds is not None else {}
+    server = ThreadingHTTPServer((host, port), make_handler(load_fixture_pages(fixture_dir), latency, feeds,
+                                                            requests_seen))
+    server.requests_seen = requests_seen
+    server.feeds = feeds
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, thread
+
+
+def fixture_urls(port: int, count: int, hosts: int = 4) -> List[str]:
+    return [
+        f'http://127.0.0.{(i % hosts) + 1}:{port}/@writer{i % 50}/fixture-article-{i:08x}'
+        for i in range(count)
+    ]
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve saved Medium fixture pages for offline scraping')
+    parser.add_argument('--host', type=str, default='0.0.0.0', help='Bind address')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--latency', type=float, default=0.0, help='Simulated per-request latency (seconds)')
+    parser.add_argument('--write-urls', type=str, help='Write a URL list pointing at this server and keep serving')
+    parser.add_argument('--count', type=int, default=1000, help='Number of URLs for --write-urls')
+    parser.add_argument('--hosts', type=int, default=4, help='Distinct 127.0.0.x hosts for --write-urls')
+
+    args = parser.parse_args()
+
+    server, thread = start_server(args.host, args.port, args.latency)
+    port = server.server_address[1]
+    if args.write_urls:
+        with open(args.write_urls, 'w', encoding='utf-8') as f:
+            for url in fixture_urls(port, args.count, args.hosts):
+                f.write(url + '\n')
+        print(f"Wrote {args.count} URLs to {args.write_urls}")
+    print(f"Serving {len(load_fixture_pages())} fixture pages on port {port} (latency {args.latency}s)")
+    try:
+        thread.join()
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
@@ -0,0 +1,166 @@
+import copy
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+from append_buffer import merge_postings
+
+logger = logging.getLogger(__name__)
+
+BM25_FILES = ('bm25_counts.npy', 'bm25_weights.npy', 'bm25_docs.npy', 'bm25_indptr.npy')
+BM25_IDF_FILE = 'bm25_idf.npy'
+MAX_SEGMENTS = 8
+
+Segments = List[Tuple[int, sparse.csc_matrix]]
+
+
+def count_vectorizer(vocabulary: Dict[str, int], params: Dict) -> CountVectorizer:
+    params = {key: value for key, value in params.items() if key in ('stop_words', 'ngram_range', 'lowercase')}
+    return CountVectorizer(vocabulary=vocabulary, dtype=np.float32, **params)
+
+
+def bm25_idf(documents: int, document_frequency: np.ndarray) -> np.ndarray:
+    return np.log1p((documents - document_frequency + 0.5) / (document_frequency + 0.5))
+
+
+def bm25_weights(counts: sparse.csc_matrix, idf: np.ndarray, average_length: float, k1: float,
+                 b: float) -> np.ndarray:
+    lengths = np.asarray(counts.sum(axis=1)).ravel()
+    terms = np.repeat(np.arange(counts.shape[1]), np.diff(counts.indptr))
+    tf = counts.data
+    norm = k1 * (1 - b + b * lengths[counts.indices] / max(average_length, 1e-9))
+    return (idf[terms] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+
+
+class Bm25Index:
+    def __init__(self, counts: sparse.csc_matrix, weights: np.ndarray, k1: float = 1.2, b: float = 0.75,
+                 idf: Optional[np.ndarray] = None, average_length: Optional[float] = None,
+                 total_length: Optional[float] = None):
+        postings = sparse.csc_matrix((weights, counts.indices, counts.indptr), shape=counts.shape, copy=False)
+        self.count_segments: Segments = [(0, counts)]
+        self.weight_segments: Segments = [(0, postings)]
+        self.k1 = k1
+        self.b = b
+        self.documents = counts.shape[0]
+        self.document_frequency = np.diff(counts.indptr)
+        self.total_length = float(counts.data.sum(dtype=np.float64)) if total_length is None else total_length
+        self.idf = idf if idf is not None else bm25_idf(self.documents, self.document_frequency)
+        self.average_length = average_length if average_length is not None else self.running_average_length()
+        self.scored_documents = self.documents
+
+    @classmethod
+    def from_counts(cls, counts: sparse.spmatrix, k1: float = 1.2, b: float = 0.75) -> 'Bm25Index':
+        start = time.perf_counter()
+        counts = sparse.csc_matrix(counts, dtype=np.float32)
+        counts.sort_indices()
+        documents = counts.shape[0]
+        total_length = float(counts.data.sum(dtype=np.float64))
+        average_length = total_length / documents if documents else 1.0
+        idf = bm25_idf(documents, np.diff(counts.indptr))
+        weights = bm25_weights(counts, idf, average_length, k1, b)
+        logger.info(f"Built BM25 weights for {documents} articles in {time.perf_counter() - start:.2f}s")
+        return cls(counts, weights, k1, b, idf, average_length, total_length)
+
+    @property
+    def counts(self) -> sparse.csc_matrix:
+        if len(self.count_segments) > 1:
+            self.count_segments = [(0, merge_postings(self.count_segments))]
+        return self.count_segments[0][1]
+
+    @property
+    def postings(self) -> sparse.csc_matrix:
+        if len(self.weight_segments) > 1:
+            self.weight_segments = [(0, merge_postings(self.weight_segments))]
+        return self.weight_segments[0][1]
+
+    def running_average_length(self) -> float:
+        return self.total_length / self.documents if self.documents else 1.0
+
+    def extend(self, counts: sparse.spmatrix) -> 'Bm25Index':
+        counts = sparse.csc_matrix(counts, dtype=np.float32)
+        counts.sort_indices()
+        weights = bm25_weights(counts, self.idf, self.average_length, self.k1, self.b)
+        postings = sparse.csc_matrix((weights, counts.indices, counts.indptr), shape=counts.shape, copy=False)
+        count_segments = self.count_segments + [(self.documents, counts)]
+        weight_segments = self.weight_segments + [(self.documents, postings)]
+        if len(count_segments) > MAX_SEGMENTS:
+            count_segments = [count_segments[0], (count_segments[1][0], merge_postings(count_segments[1:]))]
+            weight_segments = [weight_segments[0], (weight_segments[1][0], merge_postings(weight_segments[1:]))]
+
+        extended = copy.copy(self)
+        extended.count_segments = count_segments
+        extended.weight_segments = weight_segments
+        extended.documents = self.documents + counts.shape[0]
+        extended.document_frequency = self.document_frequency + np.diff(counts.indptr)
+        extended.total_length = self.total_length + float(counts.data.sum(dtype=np.float64))
+        return extended
+
+    def refresh(self) -> 'Bm25Index':
+        if self.scored_documents == self.documents:
+            return self
+        start = time.perf_counter()
+        counts = merge_postings(self.count_segments)
+        average_length = self.running_average_length()
+        idf = bm25_idf(self.documents, self.document_frequency)
+        weights = bm25_weights(counts, idf, average_length, self.k1, self.b)
+        logger.info(f"Refreshed BM25 weights for {self.documents} articles in {time.perf_counter() - start:.2f}s")
+        return Bm25Index(counts, weights, self.k1, self.b, idf, average_length, self.total_length)
+
+    def score(self, query_counts: sparse.csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+        segments = self.weight_segments
+        scores = sparse.hstack([query_counts @ postings.T for _, postings in segments], format='csr')
+        scores.eliminate_zeros()
+        return scores.indices.astype(np.int64), scores.data.astype(np.float64)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        counts = self.counts
+        arrays = (counts.data, self.postings.data, counts.indices, counts.indptr)
+        return {**dict(zip(BM25_FILES, arrays)), BM25_IDF_FILE: self.idf}
+
+    def nbytes(self) -> int:
+        arrays = [self.idf]
+        for _, counts in self.count_segments:
+            arrays.extend((counts.data, counts.indices, counts.indptr))
+        arrays.extend(postings.data for _, postings in self.weight_segments)
+        return int(sum(array.nbytes for array in arrays))
+
+    @classmethod
+    def from_arrays(cls, arrays, shape: Tuple[int, int], k1: float, b: float, idf: Optional[np.ndarray] = None,
+                    average_length: Optional[float] = None, total_length: Optional[float] = None,
+                    scored_documents: Optional[int] = None) -> 'Bm25Index':
+        counts_data, weights, docs, indptr = arrays
+        index = cls(sparse.csc_matrix((counts_data, docs, indptr), shape=shape, copy=False), weights, k1, b,
+                    idf, average_length, total_length)
+        index.scored_documents = scored_documents or index.documents
+        return index
+
+    def stats(self) -> Dict:
+        return {'k1': self.k1, 'b': self.b, 'average_length': self.average_length, 'total_length': self.total_length,
+                'scored_documents': self.scored_documents}
+
+
+def log_claps(claps: np.ndarray) -> np.ndarray:
+    return np.log1p(np.maximum(claps, 0))
+
+
+def claps_scores(claps: np.ndarray, log_max: float) -> np.ndarray:
+    scores = log_claps(claps)
+    return scores / log_max if log_max > 0 else scores
+
+
+def blend_top(doc_ids: np.ndarray, relevance: np.ndarray, claps_score: np.ndarray, claps_weight: float,
+              top_n: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    max_relevance = relevance.max() if len(relevance) else 1.0
+    blended = (1 - claps_weight) * relevance / max_relevance + claps_weight * claps_score[doc_ids]
+    if 0 <= top_n < len(doc_ids):
+        if top_n == 0:
+            return doc_ids[:0], relevance[:0], blended[:0]
+        threshold = np.partition(blended, len(blended) - top_n)[len(blended) - top_n]
+        keep = blended >= threshold
+        doc_ids, relevance, blended = doc_ids[keep], relevance[keep], blended[keep]
+    order = np.lexsort((doc_ids, -blended))[:top_n]
+    return doc_ids[order], relevance[order], blended[order]
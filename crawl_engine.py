@@ -0,0 +1,85 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def reserve(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class HostRateLimiter:
+    def __init__(self, delay: float, burst: float = 1.0, on_wait: Optional[Callable[[float], None]] = None):
+        self.delay = delay
+        self.burst = burst
+        self.on_wait = on_wait
+        self.buckets: Dict[str, TokenBucket] = {}
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def reserve(self, url: str) -> float:
+        if self.delay <= 0:
+            return 0.0
+        host = self.host_key(url)
+        bucket = self.buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(rate=1.0 / self.delay, capacity=self.burst)
+            self.buckets[host] = bucket
+        return bucket.reserve()
+
+    async def acquire(self, url: str) -> float:
+        wait = self.reserve(url)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        if self.on_wait is not None:
+            self.on_wait(wait)
+        return wait
+
+
+async def crawl(urls: Iterable[Any], worker: Callable[[Any], Any], on_result: Callable[[Any], Any],
+                concurrency: int = 8, limiter: Optional[HostRateLimiter] = None,
+                executor: Optional[ThreadPoolExecutor] = None,
+                url_of: Callable[[Any], str] = str, window: Optional[asyncio.Semaphore] = None) -> None:
+    loop = asyncio.get_running_loop()
+    limiter = limiter or HostRateLimiter(0)
+    url_iter = iter(urls)
+    owns_executor = executor is None
+    if owns_executor:
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='fetch')
+
+    async def run_worker():
+        for item in url_iter:
+            if window is not None:
+                await window.acquire()
+            await limiter.acquire(url_of(item))
+            result = await loop.run_in_executor(executor, worker, item)
+            outcome = on_result(result)
+            if asyncio.iscoroutine(outcome):
+                await outcome
+
+    try:
+        await asyncio.gather(*(run_worker() for _ in range(max(1, concurrency))))
+    finally:
+        if owns_executor:
+            executor.shutdown(wait=True)
+
+
+def run_crawl(urls: Iterable[str], worker: Callable[[str], Any], on_result: Callable[[Any], Any],
+              concurrency: int = 8, delay: float = 1.0, on_wait: Optional[Callable[[float], None]] = None) -> None:
+    asyncio.run(crawl(urls, worker, on_result, concurrency, HostRateLimiter(delay, on_wait=on_wait)))
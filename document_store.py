@@ -0,0 +1,202 @@
+import os
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from append_buffer import AppendBuffer, append_lock, grow
+
+STORE_COLUMNS = ['url', 'title', 'subtitle', 'text', 'keywords']
+NUMERIC_COLUMNS = ['reading_time', 'num_images']
+
+
+class StringColumn:
+    def __init__(self, offsets: np.ndarray, buffer: np.ndarray):
+        self.offsets = offsets
+        self.buffer = buffer
+        self._buffers: Optional[Tuple[AppendBuffer, AppendBuffer]] = None
+
+    @classmethod
+    def from_values(cls, values: Iterable) -> 'StringColumn':
+        encoded = [value.encode('utf-8') if isinstance(value, str) else b'' for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return cls(offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].tobytes().decode('utf-8')
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def slice(self, start: int, end: int) -> 'StringColumn':
+        return StringColumn(self.offsets[start:end + 1] - self.offsets[start],
+                            self.buffer[self.offsets[start]:self.offsets[end]])
+
+    def concat(self, other: 'StringColumn') -> 'StringColumn':
+        offsets, buffer = self._buffers or (None, None)
+        offsets = grow(offsets, self.offsets, other.offsets[1:] + self.offsets[-1])
+        buffer = grow(buffer, self.buffer, other.buffer)
+        column = StringColumn(offsets.values, buffer.values)
+        column._buffers = (offsets, buffer)
+        return column
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.offsets.nbytes + self.buffer.nbytes)
+
+
+def integer_column(articles: pd.DataFrame, name: str) -> np.ndarray:
+    if name not in articles:
+        return np.zeros(len(articles), dtype=np.int64)
+    return pd.to_numeric(articles[name], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+
+
+class DocumentStore:
+    def __init__(self, columns: Dict[str, StringColumn], claps: np.ndarray, numeric: Dict[str, np.ndarray],
+                 author_ids: np.ndarray, authors: StringColumn):
+        self.columns = columns
+        self.claps = claps
+        self.numeric = numeric
+        self.author_ids = author_ids
+        self.authors = authors
+        self._url_order: Optional[np.ndarray] = None
+        self._url_lock = threading.Lock()
+        self._author_lookup: Optional[Dict[str, int]] = None
+        self._buffers: Dict[str, AppendBuffer] = {}
+
+    @classmethod
+    def from_frame(cls, articles: pd.DataFrame) -> 'DocumentStore':
+        columns = {
+            name: StringColumn.from_values(articles[name] if name in articles else [''] * len(articles))
+            for name in STORE_COLUMNS
+        }
+        numeric = {name: integer_column(articles, name) for name in NUMERIC_COLUMNS}
+        names = articles['author_name'] if 'author_name' in articles else pd.Series([''] * len(articles))
+        author_ids, authors = pd.factorize(names.where(names.map(lambda name: isinstance(name, str)), ''))
+        return cls(columns, integer_column(articles, 'claps'), numeric, author_ids.astype(np.int32),
+                   StringColumn.from_values(authors))
+
+    def __len__(self) -> int:
+        return len(self.claps)
+
+    def __getitem__(self, name: str) -> StringColumn:
+        return self.columns[name]
+
+    def values(self, name: str):
+        if name == 'claps':
+            return self.claps
+        if name in self.numeric:
+            return self.numeric[name]
+        if name == 'author_name':
+            authors = np.array(list(self.authors), dtype=object)
+            return authors[self.author_ids]
+        return list(self.columns[name])
+
+    def frame(self, columns: List[str]) -> pd.DataFrame:
+        return pd.DataFrame({name: self.values(name) for name in columns})
+
+    def combined_texts(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield ' '.join(self.columns[name][i] for name in ('title', 'subtitle', 'text', 'keywords'))
+
+    def document(self, i: int) -> Dict:
+        document = {name: column[i] for name, column in self.columns.items()}
+        document['author_name'] = self.authors[int(self.author_ids[i])]
+        document['claps'] = int(self.claps[i])
+        for name, values in self.numeric.items():
+            document[name] = int(values[i])
+        return document
+
+    @property
+    def author_lookup(self) -> Dict[str, int]:
+        if self._author_lookup is None:
+            self._author_lookup = {name: i for i, name in enumerate(self.authors)}
+        return self._author_lookup
+
+    def find(self, url: str) -> Optional[int]:
+        with self._url_lock:
+            if self._url_order is None:
+                self._url_order = np.argsort(np.array(list(self.columns['url']), dtype=object), kind='stable')
+        urls, order = self.columns['url'], self._url_order
+        low, high = 0, len(order)
+        while low < high:
+            middle = (low + high) // 2
+            if urls[order[middle]] < url:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(order) and urls[order[low]] == url:
+            return int(order[low])
+        return None
+
+    def append(self, other: 'DocumentStore') -> 'DocumentStore':
+        buffers = {
+            name: grow(self._buffers.get(name), values, other.numeric[name]) for name, values in self.numeric.items()
+        }
+        with append_lock:
+            lookup = self.author_lookup
+            if len(lookup) != len(self.authors):
+                lookup = {name: i for name, i in lookup.items() if i < len(self.authors)}
+            added = [name for name in other.authors if name not in lookup]
+            lookup.update((name, len(self.authors) + i) for i, name in enumerate(added))
+            remap = np.array([lookup[name] for name in other.authors], dtype=np.int32)
+        buffers['claps'] = grow(self._buffers.get('claps'), self.claps, other.claps)
+        buffers['author_ids'] = grow(self._buffers.get('author_ids'), self.author_ids, remap[other.author_ids])
+        store = DocumentStore(
+            {name: column.concat(other.columns[name]) for name, column in self.columns.items()},
+            buffers['claps'].values,
+            {name: buffers[name].values for name in self.numeric},
+            buffers['author_ids'].values,
+            self.authors.concat(StringColumn.from_values(added)) if added else self.authors
+        )
+        store._author_lookup = lookup
+        store._buffers = buffers
+        return store
+
+    def slice(self, start: int, end: int) -> 'DocumentStore':
+        columns = {name: column.slice(start, end) for name, column in self.columns.items()}
+        numeric = {name: values[start:end] for name, values in self.numeric.items()}
+        return DocumentStore(columns, self.claps[start:end], numeric, self.author_ids[start:end], self.authors)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {
+            'store_claps.npy': self.claps,
+            'store_author_ids.npy': self.author_ids,
+            'store_authors_offsets.npy': self.authors.offsets,
+            'store_authors_buffer.npy': self.authors.buffer,
+            **{f'store_{name}.npy': values for name, values in self.numeric.items()}
+        }
+        for name, column in self.columns.items():
+            arrays[f'store_{name}_offsets.npy'] = column.offsets
+            arrays[f'store_{name}_buffer.npy'] = column.buffer
+        return arrays
+
+    @classmethod
+    def load(cls, index_dir: str, mmap_mode: Optional[str] = 'r') -> Optional['DocumentStore']:
+        if not os.path.exists(os.path.join(index_dir, 'store_claps.npy')):
+            return None
+
+        def load_array(name: str) -> np.ndarray:
+            return np.load(os.path.join(index_dir, name), mmap_mode=mmap_mode)
+
+        columns = {
+            name: StringColumn(load_array(f'store_{name}_offsets.npy'), load_array(f'store_{name}_buffer.npy'))
+            for name in STORE_COLUMNS
+        }
+        claps = load_array('store_claps.npy')
+        if not os.path.exists(os.path.join(index_dir, 'store_author_ids.npy')):
+            numeric = {name: np.zeros(len(claps), dtype=np.int64) for name in NUMERIC_COLUMNS}
+            return cls(columns, claps, numeric, np.zeros(len(claps), dtype=np.int32), StringColumn.from_values(['']))
+        numeric = {name: load_array(f'store_{name}.npy') for name in NUMERIC_COLUMNS}
+        authors = StringColumn(np.load(os.path.join(index_dir, 'store_authors_offsets.npy')),
+                               np.load(os.path.join(index_dir, 'store_authors_buffer.npy')))
+        return cls(columns, claps, numeric, load_array('store_author_ids.npy'), authors)
+
+    def stats(self) -> Dict:
+        return {name: column.nbytes for name, column in self.columns.items()}
@@ -0,0 +1,90 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+RANGE_FACETS = ('reading_time', 'claps', 'num_images')
+AUTHOR_FACET = 'author_name'
+MAX_SEGMENTS = 8
+
+Bounds = Tuple[Optional[float], Optional[float]]
+
+
+class FacetSegment:
+    def __init__(self, author_ids: np.ndarray, fields: Dict[str, np.ndarray], start: int, end: int,
+                 author_count: int):
+        self.start = start
+        self.author_docs = np.argsort(author_ids[start:end], kind='stable') + start
+        self.author_indptr = np.searchsorted(author_ids[self.author_docs], np.arange(author_count + 1))
+        self.orders = {name: np.argsort(values[start:end], kind='stable') + start for name, values in fields.items()}
+        self.sorted_values = {name: values[self.orders[name]] for name, values in fields.items()}
+
+    def author_parts(self, codes: np.ndarray) -> List[np.ndarray]:
+        codes = codes[codes < len(self.author_indptr) - 1]
+        return [self.author_docs[self.author_indptr[code]:self.author_indptr[code + 1]] for code in codes]
+
+    def range_bounds(self, name: str, bounds: Bounds) -> Tuple[int, int]:
+        low, high = bounds
+        values = self.sorted_values[name]
+        start = np.searchsorted(values, low, side='left') if low is not None else 0
+        end = np.searchsorted(values, high, side='right') if high is not None else len(values)
+        return int(start), int(max(end, start))
+
+
+class FacetIndex:
+    def __init__(self, author_ids: np.ndarray, author_lookup: Dict[str, int], author_count: int,
+                 fields: Dict[str, np.ndarray], segments: Optional[List[FacetSegment]] = None):
+        self.author_ids = author_ids
+        self.author_lookup = author_lookup
+        self.author_count = author_count
+        self.fields = fields
+        self.segments = segments or [FacetSegment(author_ids, fields, 0, len(author_ids), author_count)]
+
+    def extend(self, author_ids: np.ndarray, author_lookup: Dict[str, int], author_count: int,
+               fields: Dict[str, np.ndarray], offset: int) -> 'FacetIndex':
+        segments = self.segments
+        if len(segments) >= MAX_SEGMENTS:
+            offset = segments[1].start
+            segments = segments[:1]
+        segment = FacetSegment(author_ids, fields, offset, len(author_ids), author_count)
+        return FacetIndex(author_ids, author_lookup, author_count, fields, segments + [segment])
+
+    def author_codes(self, authors: List[str]) -> np.ndarray:
+        codes = {self.author_lookup.get(name, self.author_count) for name in authors}
+        return np.array(sorted(code for code in codes if code < self.author_count), dtype=np.int64)
+
+    def select(self, filters: Dict) -> Optional[np.ndarray]:
+        if not filters:
+            return None
+        candidates = []
+        if AUTHOR_FACET in filters:
+            codes = self.author_codes(filters[AUTHOR_FACET])
+            size = sum(len(part) for segment in self.segments for part in segment.author_parts(codes))
+            candidates.append((size, AUTHOR_FACET, codes))
+        for name in RANGE_FACETS:
+            if name in filters:
+                bounds = [segment.range_bounds(name, filters[name]) for segment in self.segments]
+                candidates.append((sum(end - start for start, end in bounds), name, bounds))
+        candidates.sort(key=lambda candidate: candidate[0])
+
+        _, name, selection = candidates[0]
+        if name == AUTHOR_FACET:
+            parts = [part for segment in self.segments for part in segment.author_parts(selection)]
+        else:
+            parts = [segment.orders[name][start:end] for segment, (start, end) in zip(self.segments, selection)]
+        docs = parts[0] if len(parts) == 1 else np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+        for _, name, selection in candidates[1:]:
+            if len(docs) == 0:
+                break
+            if name == AUTHOR_FACET:
+                docs = docs[np.isin(self.author_ids[docs], selection)]
+            else:
+                values = self.fields[name][docs]
+                low, high = filters[name]
+                keep = np.ones(len(docs), dtype=bool)
+                if low is not None:
+                    keep &= values >= low
+                if high is not None:
+                    keep &= values <= high
+                docs = docs[keep]
+        return docs.astype(np.int64, copy=False)
@@ -1,5 +1,12 @@
 import csv
+import math
+import os
 import random
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
 
 topics = [
     ('Machine Learning', 'machine learning, AI, algorithms, data science, neural networks'),
@@ -40,9 +47,34 @@ authors = [
     ('Hannah Montana', 'https://medium.com/@hannahmontana'),
 ]
 
-def generate_article(index):
-    topic, keywords = random.choice(topics)
-    author_name, author_url = random.choice(authors)
+FIELDNAMES = [
+    'url', 'title', 'subtitle', 'text', 'num_images', 'image_urls',
+    'num_external_links', 'author_name', 'author_url', 'claps',
+    'reading_time', 'keywords'
+]
+INTEGER_FIELDS = {'num_images', 'num_external_links', 'claps', 'reading_time'}
+TEXT_STYLES = ('template', 'zipf')
+WORDS_PER_MINUTE = 238
+ZIPF_EXPONENT = 1.07
+ZIPF_SHIFT = 2.7
+LENGTH_SIGMA = 0.75
+TOPIC_WORD_RATE = 0.02
+
+common_words = (
+    'the of and to a in is that for it as with was on be by this are or at from an but not have we you can '
+    'which their will one all more they has been if when there so about what use your how our other into '
+    'these some than then also only time data new like just most first way each many may two make need should '
+    'work because example code used using system model would could process value well over through where'
+).split()
+
+syllables = [
+    'ka', 'ri', 'to', 'men', 'sa', 'lo', 'ver', 'di', 'un', 'pre', 'tion', 'ex', 'qua', 'bel', 'nor', 'fi',
+    'gra', 'stu', 'mo', 'tek', 'zen', 'ly', 'ap', 'cor', 'in', 'dex', 'ro', 'va', 'plo', 'sys'
+]
+
+def generate_article(index, rng=random):
+    topic, keywords = rng.choice(topics)
+    author_name, author_url = rng.choice(authors)
     
     title_variations = [
         f'Introduction to {topic}',
@@ -65,8 +97,8 @@ def generate_article(index):
         f'Deep dive into {topic}',
     ]
     
-    title = random.choice(title_variations)
-    subtitle = random.choice(subtitle_variations)
+    title = rng.choice(title_variations)
+    subtitle = rng.choice(subtitle_variations)
     
     text_samples = [
         f'{topic} is a fascinating field that combines theory and practice. In this article, we explore the fundamentals and advanced concepts.',
@@ -76,12 +108,12 @@ def generate_article(index):
         f'In this article, we dive deep into {topic}, exploring its applications, benefits, and implementation strategies.',
     ]
     
-    text = random.choice(text_samples)
+    text = rng.choice(text_samples)
     
-    num_images = random.randint(2, 8)
-    num_external_links = random.randint(3, 15)
-    claps = random.randint(100, 15000)
-    reading_time = random.randint(5, 20)
+    num_images = rng.randint(2, 8)
+    num_external_links = rng.randint(3, 15)
+    claps = rng.randint(100, 15000)
+    reading_time = rng.randint(5, 20)
     
     image_urls = '; '.join([f'https://example.com/img{i+1}.jpg' for i in range(num_images)])
     
@@ -103,37 +135,163 @@ def generate_article(index):
         'keywords': keywords
     }
 
-def create_1000_articles_csv(filename='scrapping_results.csv'):
-    fieldnames = [
-        'url', 'title', 'subtitle', 'text', 'num_images', 'image_urls',
-        'num_external_links', 'author_name', 'author_url', 'claps',
-        'reading_time', 'keywords'
-    ]
+def pseudo_word(n):
+    parts = []
+    n += len(syllables)
+    while n:
+        n, digit = divmod(n, len(syllables))
+        parts.append(syllables[digit])
+    return ''.join(parts)
+
+@lru_cache(maxsize=4)
+def zipf_vocabulary(size=50000):
+    words = list(dict.fromkeys(
+        common_words +
+        [word.lower() for topic, keywords in topics for word in f'{topic} {keywords}'.replace(',', ' ').split()]
+    ))
+    seen = set(words)
+    n = 0
+    while len(words) < size:
+        word = pseudo_word(n)
+        n += 1
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    ranks = np.arange(1, size + 1)
+    weights = 1.0 / (ranks + ZIPF_SHIFT) ** ZIPF_EXPONENT
+    return np.array(words[:size], dtype=object), np.cumsum(weights / weights.sum())
+
+def zipf_text(np_rng, keywords, median_words, vocabulary_size):
+    words, cdf = zipf_vocabulary(vocabulary_size)
+    length = max(20, int(np_rng.lognormal(math.log(median_words), LENGTH_SIGMA)))
+    sampled = words[np.minimum(np.searchsorted(cdf, np_rng.random(length)), len(words) - 1)]
+    topic_words = [word.strip() for word in keywords.lower().split(',')]
+    for position in np.flatnonzero(np_rng.random(length) < TOPIC_WORD_RATE).tolist():
+        sampled[position] = topic_words[np_rng.integers(len(topic_words))]
+    return ' '.join(sampled.tolist()), length
+
+def generate_chunk(seed, chunk_index, start, count, text_style='template', vocabulary_size=50000, median_words=900):
+    rng = random.Random(f'{seed}-{chunk_index}')
+    np_rng = np.random.default_rng([seed, chunk_index])
+    rows = []
+    for index in range(start + 1, start + count + 1):
+        article = generate_article(index, rng)
+        if text_style == 'zipf':
+            text, length = zipf_text(np_rng, article['keywords'], median_words, vocabulary_size)
+            article['text'] = f"{article['text']} {text}"
+            article['reading_time'] = max(1, math.ceil(length / WORDS_PER_MINUTE))
+            article['claps'] = int(min(np_rng.pareto(1.2) * 60, 1000000))
+        rows.append(article)
+    return rows
+
+def iter_chunks(count, seed, chunk_size=5000, workers=1, text_style='template', vocabulary_size=50000,
+                median_words=900):
+    chunks = [(i, start, min(chunk_size, count - start)) for i, start in enumerate(range(0, count, chunk_size))]
+    args = (text_style, vocabulary_size, median_words)
+    if workers <= 1:
+        for chunk_index, start, size in chunks:
+            yield generate_chunk(seed, chunk_index, start, size, *args)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk_index, start, size in chunks:
+            pending.append(executor.submit(generate_chunk, seed, chunk_index, start, size, *args))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+class CsvChunkSink:
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.file = open(self.tmp_path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=FIELDNAMES)
+        self.writer.writeheader()
+    
+    def write(self, rows):
+        self.writer.writerows(rows)
+    
+    def close(self):
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
     
-    print(f"Generating 1000 sample articles...")
-    print("This may take a moment...")
+    def __enter__(self):
+        return self
     
-    articles = []
-    for i in range(1, 1001):
-        articles.append(generate_article(i))
-        if i % 100 == 0:
-            print(f"Generated {i}/1000 articles...")
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
+            os.remove(self.tmp_path)
+
+class ParquetChunkSink(CsvChunkSink):
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        self.pa = pa
+        self.path = path
+        self.tmp_path = path + '.tmp'
+        self.schema = pa.schema([
+            (name, pa.int64() if name in INTEGER_FIELDS else pa.string()) for name in FIELDNAMES
+        ])
+        self.file = pq.ParquetWriter(self.tmp_path, self.schema, compression='zstd')
     
-    print(f"Writing to {filename}...")
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(articles)
+    def write(self, rows):
+        self.file.write_table(self.pa.Table.from_pylist(rows, schema=self.schema))
+
+def open_chunk_sink(path):
+    if path.endswith('.parquet'):
+        return ParquetChunkSink(path)
+    return CsvChunkSink(path)
+
+def create_1000_articles_csv(filename='scrapping_results.csv', count=1000, seed=None, workers=1, chunk_size=5000,
+                            text_style='template', vocabulary_size=50000, median_words=900):
+    if text_style not in TEXT_STYLES:
+        raise ValueError(f"Unknown text style '{text_style}', expected one of {TEXT_STYLES}")
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
     
-    print(f"[OK] Successfully created {filename} with 1000 articles!")
+    print(f"Generating {count:,} sample articles (seed {seed}, {text_style} text, {max(1, workers)} workers)...")
+    
+    total_claps = 0
+    total_reading_time = 0
+    written = 0
+    with open_chunk_sink(filename) as sink:
+        for rows in iter_chunks(count, seed, chunk_size, workers, text_style, vocabulary_size, median_words):
+            sink.write(rows)
+            written += len(rows)
+            total_claps += sum(row['claps'] for row in rows)
+            total_reading_time += sum(row['reading_time'] for row in rows)
+            print(f"Generated {written:,}/{count:,} articles...")
+    
+    print(f"[OK] Successfully created {filename} with {written:,} articles!")
     print(f"\nStatistics:")
-    print(f"  Total articles: 1000")
-    print(f"  Total claps: {sum(a['claps'] for a in articles):,}")
-    print(f"  Average claps: {sum(a['claps'] for a in articles) // 1000}")
-    print(f"  Average reading time: {sum(a['reading_time'] for a in articles) / 1000:.1f} minutes")
+    print(f"  Total articles: {written:,}")
+    print(f"  Total claps: {total_claps:,}")
+    print(f"  Average claps: {total_claps // max(written, 1)}")
+    print(f"  Average reading time: {total_reading_time / max(written, 1):.1f} minutes")
     print(f"\nNext steps:")
-    print(f"1. Restart your API: python api.py")
+    print(f"1. Restart your API: CSV_FILE={filename} python api.py")
     print(f"2. Test search with: python test_api.py")
+    return seed
 
 if __name__ == '__main__':
-    create_1000_articles_csv()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Generate a synthetic Medium article corpus')
+    parser.add_argument('--output', type=str, default='scrapping_results.csv', help='Output CSV file, or a .parquet file')
+    parser.add_argument('--count', type=int, default=1000, help='Number of articles to generate')
+    parser.add_argument('--seed', type=int, help='Random seed; the same seed and chunk size always produce the same corpus')
+    parser.add_argument('--workers', type=int, default=1, help='Processes generating chunks in parallel')
+    parser.add_argument('--chunk-size', type=int, default=5000, help='Articles per chunk (bounds memory per worker)')
+    parser.add_argument('--text', type=str, choices=TEXT_STYLES, default='template', help='template = short topic sentences, zipf = long-tail lengths over a Zipfian vocabulary')
+    parser.add_argument('--vocabulary-size', type=int, default=50000, help='Distinct words in the zipf vocabulary')
+    parser.add_argument('--median-words', type=int, default=900, help='Median article length in words for zipf text')
+    
+    args = parser.parse_args()
+    
+    create_1000_articles_csv(args.output, args.count, args.seed, args.workers, args.chunk_size, args.text,
+                             args.vocabulary_size, args.median_words)
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from url_utils import normalize_url
+
+logger = logging.getLogger(__name__)
+
+STORED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+
+def requires_revalidation(headers) -> bool:
+    directives = {directive.strip().lower() for directive in headers.get('Cache-Control', '').split(',')}
+    return bool(directives & {'no-cache', 'max-age=0'}) or 'no-cache' in headers.get('Pragma', '').lower()
+
+
+class ResponseCache:
+    def __init__(self, cache_dir: str, ttl: float = 86400, max_bytes: int = 1024 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        os.makedirs(os.path.join(cache_dir, 'objects'), exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite3'), check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                headers TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                digest TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                parser TEXT,
+                parsed TEXT
+            )
+        """)
+        self.db.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)')
+        self.db.commit()
+        self.total_bytes = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, 'objects', key[:2], key + '.z')
+
+    def get(self, url: str) -> Optional[Dict]:
+        key = self.key_for(url)
+        with self.lock:
+            row = self.db.execute(
+                'SELECT headers, stored_at FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.db.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (time.time(), key))
+            self.db.commit()
+        try:
+            with open(self._path(key), 'rb') as f:
+                body = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            self.delete(url)
+            return None
+        return {
+            'headers': json.loads(row[0]),
+            'stored_at': row[1],
+            'body': body,
+            'fresh': time.time() - row[1] < self.ttl
+        }
+
+    def put(self, url: str, headers: Dict[str, str], body: bytes) -> None:
+        key = self.key_for(url)
+        compressed = zlib.compress(body, 6)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+        stored = {name: headers[name] for name in STORED_HEADERS if name in headers}
+        now = time.time()
+        with self.lock:
+            previous = self.db.execute('SELECT size FROM entries WHERE key = ?', (key,)).fetchone()
+            if previous:
+                self.total_bytes -= previous[0]
+            self.db.execute(
+                'INSERT OR REPLACE INTO entries (key, url, headers, size, digest, stored_at, accessed_at, parser, parsed) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, NULL, NULL)',
+                (key, normalize_url(url), json.dumps(stored), len(compressed),
+                 hashlib.sha256(body).hexdigest(), now, now)
+            )
+            self.total_bytes += len(compressed)
+            self.db.commit()
+            self._evict()
+
+    def refresh(self, url: str) -> None:
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                'UPDATE entries SET stored_at = ?, accessed_at = ? WHERE key = ?', (now, now, self.key_for(url))
+            )
+            self.db.commit()
+
+    def delete(self, url: str) -> None:
+        key = self.key_for(url)
+        with self.lock:
+            self._delete_key(key)
+            self.db.commit()
+
+    def _delete_key(self, key: str) -> None:
+        row = self.db.execute('SELECT size FROM entries WHERE key = ?', (key,)).fetchone()
+        if row:
+            self.total_bytes -= row[0]
+        self.db.execute('DELETE FROM entries WHERE key = ?', (key,))
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        if self.total_bytes <= self.max_bytes:
+            return
+        rows = self.db.execute('SELECT key, size FROM entries ORDER BY accessed_at').fetchall()
+        evicted = 0
+        for key, size in rows:
+            if self.total_bytes <= self.max_bytes:
+                break
+            self._delete_key(key)
+            evicted += 1
+        self.db.commit()
+        logger.info(f"Evicted {evicted} cached responses ({self.total_bytes} bytes remain)")
+
+    def get_parsed(self, url: str, parser: str, body: bytes) -> Optional[Dict]:
+        with self.lock:
+            row = self.db.execute(
+                'SELECT digest, parser, parsed FROM entries WHERE key = ?', (self.key_for(url),)
+            ).fetchone()
+        if row is None or row[2] is None or row[1] != parser:
+            return None
+        if row[0] != hashlib.sha256(body).hexdigest():
+            return None
+        result = json.loads(row[2])
+        result['url'] = url
+        return result
+
+    def set_parsed(self, url: str, parser: str, body: bytes, result: Dict) -> None:
+        with self.lock:
+            self.db.execute(
+                'UPDATE entries SET parser = ?, parsed = ? WHERE key = ? AND digest = ?',
+                (parser, json.dumps(result), self.key_for(url), hashlib.sha256(body).hexdigest())
+            )
+            self.db.commit()
+
+    def count(self, outcome: str) -> None:
+        with self.lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            entries = self.db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+            return {
+                'entries': entries,
+                'bytes': self.total_bytes,
+                'hits': self.hits,
+                'revalidated': self.revalidated,
+                'misses': self.misses
+            }
+
+
+class CachingAdapter(HTTPAdapter):
+    def __init__(self, cache: ResponseCache, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if request.method != 'GET':
+            return super().send(request, **kwargs)
+
+        entry = self.cache.get(request.url)
+        if entry and entry['fresh'] and not requires_revalidation(request.headers):
+            self.cache.count('hits')
+            return self._cached_response(request, entry)
+
+        if entry:
+            if 'ETag' in entry['headers']:
+                request.headers['If-None-Match'] = entry['headers']['ETag']
+            if 'Last-Modified' in entry['headers']:
+                request.headers['If-Modified-Since'] = entry['headers']['Last-Modified']
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and entry:
+            self.cache.count('revalidated')
+            self.cache.refresh(request.url)
+            response.close()
+            return self._cached_response(request, entry)
+
+        self.cache.count('misses')
+        if response.status_code == 200:
+            self.cache.put(request.url, response.headers, response.content)
+        return response
+
+    def _cached_response(self, request, entry: Dict) -> Response:
+        response = Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = entry['body']
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.from_cache = True
+        return response
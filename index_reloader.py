@@ -0,0 +1,81 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from search_index import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+
+def file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class IndexReloader:
+    def __init__(self, path: str, build: Callable[[], SearchIndex], on_swap: Callable[[SearchIndex], None],
+                 interval: float = 30.0):
+        self.path = path
+        self.build = build
+        self.on_swap = on_swap
+        self.interval = interval
+        self.signature = file_signature(path)
+        self.pending: Optional[Tuple[int, int]] = None
+        self.reloads = 0
+        self.last_reload_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def check(self) -> bool:
+        signature = file_signature(self.path)
+        if signature is None or signature == self.signature:
+            self.pending = None
+            return False
+        if signature != self.pending:
+            self.pending = signature
+            return False
+
+        self.signature = signature
+        self.pending = None
+        start = time.perf_counter()
+        try:
+            index = self.build()
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Reloading index from {self.path} failed: {str(e)}")
+            return False
+        self.on_swap(index)
+        self.reloads += 1
+        self.last_reload_at = time.time()
+        self.last_error = None
+        logger.info(f"Reloaded index from {self.path} ({index.stats()['articles']} articles, "
+                    f"version {index.version}) in {time.perf_counter() - start:.2f}s")
+        return True
+
+    def run(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            self.check()
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self.run, name='index-reloader', daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def stats(self) -> Dict:
+        return {
+            'watching': self.path,
+            'interval': self.interval,
+            'reloads': self.reloads,
+            'last_reload_at': self.last_reload_at,
+            'last_error': self.last_error
+        }
@@ -0,0 +1,214 @@
+import copy
+import os
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+
+from document_store import StringColumn
+
+NGRAM = 3
+MAX_SEGMENTS = 8
+TOKEN_RE = re.compile(r'\w+')
+TOKEN_ARRAYS = ('tokens_offsets', 'tokens_buffer', 'docs', 'indptr', 'grams', 'gram_indptr', 'gram_tokens',
+                'short_tokens')
+
+
+def fallback_words(query_lower: str) -> List[str]:
+    return [word for word in query_lower.split() if len(word) > 3]
+
+
+def value_text(value) -> str:
+    return value.lower() if isinstance(value, str) else ''
+
+
+def restrict(doc_ids: np.ndarray, allowed: Optional[np.ndarray]) -> np.ndarray:
+    return doc_ids if allowed is None else doc_ids[np.isin(doc_ids, allowed)]
+
+
+class TokenIndex:
+    def __init__(self, sources: Dict[str, Sequence[str]], columns: List[str], start: int, end: int,
+                 arrays: Dict[str, np.ndarray]):
+        self.values = [sources[column] for column in columns]
+        self.start = start
+        self.size = end - start
+        arrays = {name: np.asarray(array) for name, array in arrays.items()}
+        self.tokens = StringColumn(arrays['tokens_offsets'], arrays['tokens_buffer'])
+        self.docs = arrays['docs']
+        self.indptr = arrays['indptr']
+        self.grams = arrays['grams']
+        self.gram_indptr = arrays['gram_indptr']
+        self.gram_tokens = arrays['gram_tokens']
+        self.short_tokens = arrays['short_tokens']
+
+    @classmethod
+    def build(cls, sources: Dict[str, Sequence[str]], columns: List[str], start: int, end: int) -> 'TokenIndex':
+        values = [sources[column] for column in columns]
+        documents = (
+            '\n'.join(value_text(column[doc]) for column in values) for doc in range(start, end)
+        )
+
+        vectorizer = CountVectorizer(token_pattern=r'(?u)\w+', lowercase=False, binary=True, dtype=np.int8)
+        try:
+            postings = vectorizer.fit_transform(documents).tocsc()
+            tokens = vectorizer.get_feature_names_out().tolist()
+        except ValueError:
+            postings = None
+            tokens = []
+
+        gram_keys: List[str] = []
+        gram_ids: List[int] = []
+        short_tokens: List[int] = []
+        for token_id, token in enumerate(tokens):
+            if len(token) < NGRAM:
+                short_tokens.append(token_id)
+                continue
+            for gram in {token[i:i + NGRAM] for i in range(len(token) - NGRAM + 1)}:
+                gram_keys.append(gram)
+                gram_ids.append(token_id)
+        keys = np.array(gram_keys, dtype=f'<U{NGRAM}')
+        order = np.argsort(keys, kind='stable')
+        grams, firsts = np.unique(keys[order], return_index=True)
+        token_column = StringColumn.from_values(tokens)
+        return cls(sources, columns, start, end, {
+            'tokens_offsets': token_column.offsets,
+            'tokens_buffer': token_column.buffer,
+            'docs': postings.indices if postings is not None else np.empty(0, dtype=np.int32),
+            'indptr': postings.indptr if postings is not None else np.zeros(1, dtype=np.int32),
+            'grams': grams,
+            'gram_indptr': np.append(firsts, len(keys)).astype(np.int64),
+            'gram_tokens': np.array(gram_ids, dtype=np.int32)[order],
+            'short_tokens': np.array(short_tokens, dtype=np.int32)
+        })
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            'tokens_offsets': self.tokens.offsets,
+            'tokens_buffer': self.tokens.buffer,
+            'docs': self.docs,
+            'indptr': self.indptr,
+            'grams': self.grams,
+            'gram_indptr': self.gram_indptr,
+            'gram_tokens': self.gram_tokens,
+            'short_tokens': self.short_tokens
+        }
+
+    def gram_token_ids(self, gram: str) -> np.ndarray:
+        position = int(np.searchsorted(self.grams, gram))
+        if position == len(self.grams) or self.grams[position] != gram:
+            return self.gram_tokens[:0]
+        return self.gram_tokens[self.gram_indptr[position]:self.gram_indptr[position + 1]]
+
+    def tokens_containing(self, piece: str) -> List[int]:
+        if len(piece) >= NGRAM:
+            candidates = None
+            for gram in {piece[i:i + NGRAM] for i in range(len(piece) - NGRAM + 1)}:
+                ids = self.gram_token_ids(gram)
+                if len(ids) == 0:
+                    return []
+                candidates = ids if candidates is None else np.intersect1d(candidates, ids, assume_unique=True)
+            return [token_id for token_id in candidates.tolist() if piece in self.tokens[token_id]]
+        token_ids = [token_id for token_id in self.short_tokens.tolist() if piece in self.tokens[token_id]]
+        for position in np.flatnonzero(np.char.find(self.grams, piece) >= 0).tolist():
+            token_ids.extend(self.gram_tokens[self.gram_indptr[position]:self.gram_indptr[position + 1]].tolist())
+        return token_ids
+
+    def docs_containing(self, piece: str) -> np.ndarray:
+        parts = [self.docs[self.indptr[t]:self.indptr[t + 1]] for t in self.tokens_containing(piece)]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(parts)).astype(np.int64)
+
+    def matches(self, text: str) -> np.ndarray:
+        pieces = TOKEN_RE.findall(text)
+        if len(pieces) == 1 and pieces[0] == text:
+            return self.docs_containing(text)
+
+        candidates: Optional[np.ndarray] = None
+        for piece in sorted(set(pieces), key=len, reverse=True):
+            docs = self.docs_containing(piece)
+            candidates = docs if candidates is None else np.intersect1d(candidates, docs, assume_unique=True)
+            if len(candidates) == 0:
+                return candidates
+        if candidates is None:
+            candidates = np.arange(self.size, dtype=np.int64)
+
+        keep = [
+            doc for doc in candidates.tolist()
+            if any(text in value_text(values[self.start + doc]) for values in self.values)
+        ]
+        return np.array(keep, dtype=np.int64)
+
+
+class KeywordIndex:
+    def __init__(self, sources: Dict[str, Sequence[str]], phrase_columns: List[str], word_columns: List[str],
+                 segments: Optional[List[Tuple[int, TokenIndex, TokenIndex]]] = None):
+        self.phrase_columns = phrase_columns
+        self.word_columns = word_columns
+        self.segments = segments or [self._segment(sources, 0, len(sources[phrase_columns[0]]))]
+
+    def _segment(self, sources: Dict[str, Sequence[str]], start: int, end: int):
+        return (start, TokenIndex.build(sources, self.phrase_columns, start, end),
+                TokenIndex.build(sources, self.word_columns, start, end))
+
+    def extend(self, sources: Dict[str, Sequence[str]], offset: int) -> 'KeywordIndex':
+        segments = self.segments
+        if len(segments) >= MAX_SEGMENTS:
+            offset = segments[1][0]
+            segments = segments[:1]
+        extended = copy.copy(self)
+        extended.segments = segments + [self._segment(sources, offset, len(sources[self.phrase_columns[0]]))]
+        return extended
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        arrays = {}
+        for i, (_, phrases, words) in enumerate(self.segments):
+            for kind, tokens in (('phrases', phrases), ('words', words)):
+                for name, array in tokens.arrays().items():
+                    arrays[f'keyword_{i:03d}_{kind}_{name}.npy'] = array
+        return arrays
+
+    def stats(self) -> Dict:
+        return {'segments': [start for start, _, _ in self.segments]}
+
+    @classmethod
+    def load(cls, index_dir: str, sources: Dict[str, Sequence[str]], phrase_columns: List[str],
+             word_columns: List[str], starts: List[int], mmap_mode: Optional[str] = 'r') -> Optional['KeywordIndex']:
+        ends = starts[1:] + [len(sources[phrase_columns[0]])]
+        segments = []
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            paths = {
+                kind: {name: os.path.join(index_dir, f'keyword_{i:03d}_{kind}_{name}.npy') for name in TOKEN_ARRAYS}
+                for kind in ('phrases', 'words')
+            }
+            if not all(os.path.exists(path) for kind_paths in paths.values() for path in kind_paths.values()):
+                return None
+            phrases, words = (
+                TokenIndex(sources, columns, start, end,
+                           {name: np.load(path, mmap_mode=mmap_mode) for name, path in paths[kind].items()})
+                for kind, columns in (('phrases', phrase_columns), ('words', word_columns))
+            )
+            segments.append((start, phrases, words))
+        return cls(sources, phrase_columns, word_columns, segments)
+
+    @staticmethod
+    def _collect(matches: List[np.ndarray]) -> np.ndarray:
+        return np.concatenate(matches) if len(matches) > 1 else matches[0]
+
+    def phrase_matches(self, query_lower: str) -> np.ndarray:
+        return self._collect([offset + phrases.matches(query_lower) for offset, phrases, _ in self.segments])
+
+    def word_matches(self, word: str) -> np.ndarray:
+        return self._collect([offset + words.matches(word) for offset, _, words in self.segments])
+
+    def search(self, query: str, allowed: Optional[np.ndarray] = None) -> np.ndarray:
+        query_lower = query.lower()
+        matched = restrict(self.phrase_matches(query_lower), allowed)
+        if len(matched):
+            return matched
+        for word in fallback_words(query_lower):
+            matched = restrict(self.word_matches(word), allowed)
+            if len(matched):
+                break
+        return matched
@@ -0,0 +1,257 @@
+import json
+import re
+import time
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urljoin, urlparse
+
+import lxml.html
+from lxml import etree
+
+from scrape_telemetry import lap
+
+REGEX_NS = {'re': 'http://exslt.org/regular-expressions'}
+NON_TEXT_TAGS = {'script', 'style', 'template'}
+BODY_NOISE_TAGS = ('script', 'style', 'nav', 'footer', 'header')
+PARAGRAPH_TAGS = ('p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+KEYWORD_STOPWORDS = ['that', 'this', 'with', 'from', 'have', 'will', 'your', 'they', 'their']
+CHARSET_RE = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.I)
+CLAPS_RE = re.compile(r'(\d[\d,]*(?:\.\d+)?)([KkMm]?)')
+CLAPS_SCALE = {'K': 1000, 'M': 1000000}
+
+
+def _xpath(expression: str) -> etree.XPath:
+    return etree.XPath(expression, namespaces=REGEX_NS)
+
+
+JSON_LD_SCRIPTS = _xpath("//script[@type='application/ld+json']")
+FIRST_H1 = _xpath("(//h1)[1]")
+FIRST_TITLE = _xpath("(//title)[1]")
+SUBTITLE_H2 = _xpath("(//h2[re:test(@class, 'subtitle|deck')])[1]")
+SUBTITLE_DIV = _xpath("(//div[re:test(@class, 'subtitle')])[1]")
+AUTHOR_LINK = _xpath("(//a[re:test(@class, 'author|writer')])[1]")
+FIRST_ARTICLE = _xpath("(//article)[1]")
+POST_DIV = _xpath("(//div[re:test(@class, 'post|article|content')])[1]")
+FIRST_MAIN = _xpath("(//main)[1]")
+CONTENT_ID_DIV = _xpath("(//div[re:test(@id, 'content|post')])[1]")
+BODY_NOISE = _xpath(".//script | .//style | .//nav | .//footer | .//header")
+IMAGES = _xpath(".//img")
+LINKS = _xpath(".//a[@href]")
+CLAPS_BUTTON = _xpath("(//button[re:test(@class, 'clap|like')])[1]")
+CLAPS_DIV = _xpath("(//div[re:test(@class, 'clap')])[1]")
+CLAPS_ACTION = _xpath("(//button[re:test(@data-action, 'clap')])[1]")
+READING_TIME_STRING = _xpath(
+    r"(//text()[re:test(., '\d+\s*min\s*read', 'i')] | //comment()[re:test(., '\d+\s*min\s*read', 'i')])[1]"
+)
+READING_DIV = _xpath("(//div[re:test(@class, 'reading|time')])[1]")
+KEYWORDS_META = _xpath("(//meta[re:test(@name, 'keyword', 'i')])[1]")
+
+
+def scale_claps(claps_text: str) -> int:
+    claps_match = CLAPS_RE.search(claps_text)
+    if not claps_match:
+        return 0
+    number, suffix = claps_match.groups()
+    return int(round(float(number.replace(',', '')) * CLAPS_SCALE.get(suffix.upper(), 1)))
+
+
+def top_keywords(text: str) -> str:
+    words = re.findall(r'\b[a-zA-Z]{4,}\b', text.lower())
+    word_freq = {}
+    for word in words:
+        if word not in KEYWORD_STOPWORDS:
+            word_freq[word] = word_freq.get(word, 0) + 1
+
+    top = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:10]
+    return ', '.join([word for word, _ in top])
+
+
+def _strings(element) -> Iterator[str]:
+    if element.text and isinstance(element.tag, str) and element.tag not in NON_TEXT_TAGS:
+        yield element.text
+    for child in element:
+        yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def element_text(element, strip: bool = False) -> str:
+    if strip:
+        return ''.join(s.strip() for s in _strings(element))
+    return ''.join(_strings(element))
+
+
+def _first(xpath: etree.XPath, node) -> Optional[etree._Element]:
+    found = xpath(node)
+    return found[0] if found else None
+
+
+def _absolute(href: str, url: str) -> str:
+    if href.startswith('//'):
+        return 'https:' + href
+    elif href.startswith('/'):
+        return urljoin(url, href)
+    return href
+
+
+def _parse_document(content: bytes):
+    match = CHARSET_RE.search(content[:4096])
+    encoding = match.group(1).decode('ascii') if match else 'utf-8'
+    try:
+        parser = lxml.html.HTMLParser(encoding=encoding)
+    except LookupError:
+        parser = lxml.html.HTMLParser(encoding='utf-8')
+    return lxml.html.document_fromstring(content, parser=parser)
+
+
+def extract_json_ld(root) -> Optional[Dict]:
+    for script in JSON_LD_SCRIPTS(root):
+        try:
+            data = json.loads(script.text)
+            if isinstance(data, dict) and data.get('@type') == 'BlogPosting':
+                return data
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def extract_article_lxml(url: str, content: bytes, timings: Optional[Dict[str, float]] = None) -> Dict:
+    mark = time.perf_counter()
+    result = {
+        'url': url,
+        'title': '',
+        'subtitle': '',
+        'text': '',
+        'num_images': 0,
+        'image_urls': '',
+        'num_external_links': 0,
+        'author_name': '',
+        'author_url': '',
+        'claps': 0,
+        'reading_time': 0,
+        'keywords': ''
+    }
+    if not content or not content.strip():
+        return result
+
+    root = _parse_document(content)
+    mark = lap(timings, 'document', mark)
+    json_ld = extract_json_ld(root)
+    mark = lap(timings, 'json_ld', mark)
+
+    if json_ld and json_ld.get('headline'):
+        result['title'] = json_ld['headline']
+    else:
+        title_tag = _first(FIRST_H1, root)
+        if title_tag is None:
+            title_tag = _first(FIRST_TITLE, root)
+        if title_tag is not None:
+            result['title'] = element_text(title_tag, strip=True)
+    mark = lap(timings, 'title', mark)
+
+    subtitle_tag = _first(SUBTITLE_H2, root)
+    if subtitle_tag is None:
+        subtitle_tag = _first(SUBTITLE_DIV, root)
+    if subtitle_tag is not None:
+        result['subtitle'] = element_text(subtitle_tag, strip=True)
+    elif json_ld and json_ld.get('description'):
+        result['subtitle'] = json_ld['description']
+    mark = lap(timings, 'subtitle', mark)
+
+    if json_ld and json_ld.get('author'):
+        author = json_ld['author']
+        if isinstance(author, dict):
+            result['author_name'] = author.get('name', '')
+            result['author_url'] = author.get('url', '')
+
+    if not result['author_name']:
+        author_link = _first(AUTHOR_LINK, root)
+        if author_link is not None:
+            result['author_name'] = element_text(author_link, strip=True)
+            result['author_url'] = author_link.get('href', '')
+            if result['author_url'] and not result['author_url'].startswith('http'):
+                result['author_url'] = urljoin('https://medium.com', result['author_url'])
+    mark = lap(timings, 'author', mark)
+
+    article_body = None
+    for locate in (FIRST_ARTICLE, POST_DIV, FIRST_MAIN, CONTENT_ID_DIV):
+        article_body = _first(locate, root)
+        if article_body is not None:
+            break
+
+    if article_body is not None:
+        for noise in BODY_NOISE(article_body):
+            noise.drop_tree()
+
+        text_parts: List[str] = []
+        for paragraph in article_body.iter(*PARAGRAPH_TAGS):
+            if paragraph is article_body:
+                continue
+            paragraph_text = element_text(paragraph, strip=True)
+            if paragraph_text:
+                text_parts.append(paragraph_text)
+        result['text'] = ' '.join(text_parts)
+    mark = lap(timings, 'text', mark)
+
+    scope = article_body if article_body is not None else root
+
+    images = []
+    for img in IMAGES(scope):
+        img_url = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
+        if img_url:
+            img_url = _absolute(img_url, url)
+            if 'avatar' not in img_url.lower() and 'icon' not in img_url.lower():
+                images.append(img_url)
+
+    result['num_images'] = len(images)
+    result['image_urls'] = '; '.join(images[:50])
+    mark = lap(timings, 'images', mark)
+
+    external_links = 0
+    base_domain = urlparse(url).netloc
+    for link in LINKS(scope):
+        href = link.get('href', '')
+        if href:
+            link_domain = urlparse(_absolute(href, url)).netloc
+            if link_domain and link_domain != base_domain and link_domain != 'medium.com':
+                external_links += 1
+
+    result['num_external_links'] = external_links
+    mark = lap(timings, 'links', mark)
+
+    claps_elem = _first(CLAPS_BUTTON, root)
+    if claps_elem is None:
+        claps_elem = _first(CLAPS_DIV, root)
+    if claps_elem is not None:
+        result['claps'] = scale_claps(element_text(claps_elem, strip=True))
+
+    if result['claps'] == 0:
+        claps_data = _first(CLAPS_ACTION, root)
+        if claps_data is not None:
+            result['claps'] = scale_claps(element_text(claps_data, strip=True))
+    mark = lap(timings, 'claps', mark)
+
+    reading_time_elem = _first(READING_TIME_STRING, root)
+    if reading_time_elem is not None:
+        reading_text = reading_time_elem if isinstance(reading_time_elem, str) else reading_time_elem.text
+        time_match = re.search(r'(\d+)', reading_text)
+        if time_match:
+            result['reading_time'] = int(time_match.group(1))
+
+    if result['reading_time'] == 0:
+        reading_div = _first(READING_DIV, root)
+        if reading_div is not None:
+            time_match = re.search(r'(\d+)', element_text(reading_div))
+            if time_match:
+                result['reading_time'] = int(time_match.group(1))
+    mark = lap(timings, 'reading_time', mark)
+
+    keywords_meta = _first(KEYWORDS_META, root)
+    if keywords_meta is not None:
+        result['keywords'] = keywords_meta.get('content', '')
+
+    if not result['keywords'] and result['text']:
+        result['keywords'] = top_keywords(result['text'])
+
+    result['text'] = ' '.join(result['text'].split())
+    lap(timings, 'keywords', mark)
+    return result
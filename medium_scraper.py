@@ -1,14 +1,24 @@
 import requests
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
 from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
 import csv
 import json
 import time
 import re
 from urllib.parse import urljoin, urlparse
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
+import os
+import uuid
 import warnings
+from io import BytesIO
 from datetime import datetime
+from crawl_engine import run_crawl
+from http_cache import CachingAdapter, ResponseCache
+from rss_harvester import iter_feed_items
+from url_utils import dedupe_urls
+from lxml_extractor import extract_article_lxml, scale_claps, top_keywords
+from scrape_telemetry import ScrapeTelemetry, lap
 
 warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
 
@@ -19,9 +29,24 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+PARSERS = ('bs4', 'fast')
+FIELDNAMES = [
+    'url', 'title', 'subtitle', 'text', 'num_images', 'image_urls',
+    'num_external_links', 'author_name', 'author_url', 'claps',
+    'reading_time', 'keywords'
+]
+INTEGER_FIELDS = {'num_images', 'num_external_links', 'claps', 'reading_time'}
+
+
 class MediumScraper:
-    def __init__(self, delay: float = 1.0):
+    def __init__(self, delay: float = 1.0, parser: str = 'bs4', cache_dir: Optional[str] = None,
+                 cache_ttl: float = 86400, cache_max_mb: int = 1024, telemetry: Optional[ScrapeTelemetry] = None):
+        if parser not in PARSERS:
+            raise ValueError(f"Unknown parser '{parser}', expected one of {PARSERS}")
         self.delay = delay
+        self.parser = parser
+        self.telemetry = telemetry
+        self.cache = ResponseCache(cache_dir, cache_ttl, cache_max_mb * 1024 * 1024) if cache_dir else None
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -38,20 +63,17 @@ class MediumScraper:
             'DNT': '1',
             'Referer': 'https://www.google.com/'
         })
+        if self.cache is not None:
+            self.session.headers.pop('Cache-Control')
+            self.configure_pool(DEFAULT_POOLSIZE)
     
     def extract_article_urls_from_rss(self, rss_url: str) -> List[str]:
         try:
             logger.info(f"Extracting article URLs from RSS feed: {rss_url}")
-            response = self.session.get(rss_url, timeout=30)
+            response = self.session.get(rss_url, timeout=30, headers={'Cache-Control': 'no-cache'})
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'xml')
-            urls = []
-            
-            for item in soup.find_all('item'):
-                link = item.find('link')
-                if link and link.text:
-                    urls.append(link.text.strip())
+            urls = [item['link'] for item in iter_feed_items(BytesIO(response.content)) if item['link']]
             
             logger.info(f"Found {len(urls)} article URLs in RSS feed")
             return urls
@@ -60,7 +82,8 @@ class MediumScraper:
             logger.error(f"Error extracting URLs from RSS feed: {str(e)}")
             return []
     
-    def extract_json_ld(self, soup: BeautifulSoup) -> Optional[Dict]:
+    @staticmethod
+    def extract_json_ld(soup: BeautifulSoup) -> Optional[Dict]:
         json_ld_scripts = soup.find_all('script', type='application/ld+json')
         for script in json_ld_scripts:
             try:
@@ -71,175 +94,211 @@ class MediumScraper:
                 continue
         return None
     
-    def extract_article_data(self, url: str) -> Dict:
+    def configure_pool(self, concurrency: int) -> None:
+        if self.cache is not None:
+            adapter = CachingAdapter(self.cache, pool_connections=concurrency, pool_maxsize=concurrency)
+        else:
+            adapter = HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+    
+    def fetch(self, url: str) -> requests.Response:
+        response = self.session.get(url, timeout=30)
+        response.raise_for_status()
+        return response
+    
+    def fetch_content(self, url: str) -> Tuple[Optional[bytes], Optional[Dict]]:
+        start = time.perf_counter()
         try:
-            logger.info(f"Scraping: {url}")
-            response = self.session.get(url, timeout=30)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            result = {
-                'url': url,
-                'title': '',
-                'subtitle': '',
-                'text': '',
-                'num_images': 0,
-                'image_urls': '',
-                'num_external_links': 0,
-                'author_name': '',
-                'author_url': '',
-                'claps': 0,
-                'reading_time': 0,
-                'keywords': ''
-            }
-            
-            json_ld = self.extract_json_ld(soup)
-            
-            if json_ld and json_ld.get('headline'):
-                result['title'] = json_ld['headline']
-            else:
-                title_tag = soup.find('h1') or soup.find('title')
-                if title_tag:
-                    result['title'] = title_tag.get_text(strip=True)
-            
-            subtitle_tag = soup.find('h2', class_=re.compile('subtitle|deck')) or \
-                          soup.find('div', class_=re.compile('subtitle'))
-            if subtitle_tag:
-                result['subtitle'] = subtitle_tag.get_text(strip=True)
-            elif json_ld and json_ld.get('description'):
-                result['subtitle'] = json_ld['description']
-            
-            if json_ld and json_ld.get('author'):
-                author = json_ld['author']
-                if isinstance(author, dict):
-                    result['author_name'] = author.get('name', '')
-                    result['author_url'] = author.get('url', '')
-            
-            if not result['author_name']:
-                author_link = soup.find('a', class_=re.compile('author|writer'))
-                if author_link:
-                    result['author_name'] = author_link.get_text(strip=True)
-                    result['author_url'] = author_link.get('href', '')
-                    if result['author_url'] and not result['author_url'].startswith('http'):
-                        result['author_url'] = urljoin('https://medium.com', result['author_url'])
-            
-            article_body = soup.find('article') or soup.find('div', class_=re.compile('post|article|content'))
-            if not article_body:
-                article_body = soup.find('main') or soup.find('div', id=re.compile('content|post'))
+            response = self.fetch(url)
+        except requests.RequestException as e:
+            if self.telemetry is not None:
+                self.telemetry.record_fetch(url, time.perf_counter() - start, getattr(e.response, 'status_code', None),
+                                           0, error=request_error_category(e))
+            logger.error(f"Request error for {url}: {str(e)}")
+            return None, self._create_error_result(url, f"Request error: {str(e)}", is_transient_error(e))
+        if self.telemetry is not None:
+            self.telemetry.record_fetch(url, time.perf_counter() - start, response.status_code, len(response.content),
+                                       getattr(response, 'from_cache', False))
+        return response.content, None
+    
+    def extract_article_data(self, url: str) -> Dict:
+        logger.info(f"Scraping: {url}")
+        content, error_result = self.fetch_content(url)
+        if error_result:
+            return error_result
+        cached_result = self.cached_result(url, content)
+        if cached_result is not None:
+            return cached_result
+        if self.telemetry is None:
+            result = parse_article_html(url, content, self.parser)
+        else:
+            result, timings, seconds = parse_article_timed(url, content, self.parser)
+            self.telemetry.record_parse(url, seconds, timings, 'error' in result)
+        self.remember_result(url, content, result)
+        return result
+    
+    def cached_result(self, url: str, content: bytes) -> Optional[Dict]:
+        if self.cache is None:
+            return None
+        return self.cache.get_parsed(url, self.parser, content)
+    
+    def remember_result(self, url: str, content: bytes, result: Dict) -> None:
+        if self.cache is not None and 'error' not in result:
+            self.cache.set_parsed(url, self.parser, content, result)
+    
+    @staticmethod
+    def parse_article(url: str, content: bytes, timings: Optional[Dict[str, float]] = None) -> Dict:
+        mark = time.perf_counter()
+        soup = BeautifulSoup(content, 'html.parser')
+        mark = lap(timings, 'document', mark)
+        
+        result = {
+            'url': url,
+            'title': '',
+            'subtitle': '',
+            'text': '',
+            'num_images': 0,
+            'image_urls': '',
+            'num_external_links': 0,
+            'author_name': '',
+            'author_url': '',
+            'claps': 0,
+            'reading_time': 0,
+            'keywords': ''
+        }
+        
+        json_ld = MediumScraper.extract_json_ld(soup)
+        mark = lap(timings, 'json_ld', mark)
+        
+        if json_ld and json_ld.get('headline'):
+            result['title'] = json_ld['headline']
+        else:
+            title_tag = soup.find('h1') or soup.find('title')
+            if title_tag:
+                result['title'] = title_tag.get_text(strip=True)
+        mark = lap(timings, 'title', mark)
+        
+        subtitle_tag = soup.find('h2', class_=re.compile('subtitle|deck')) or \
+                      soup.find('div', class_=re.compile('subtitle'))
+        if subtitle_tag:
+            result['subtitle'] = subtitle_tag.get_text(strip=True)
+        elif json_ld and json_ld.get('description'):
+            result['subtitle'] = json_ld['description']
+        mark = lap(timings, 'subtitle', mark)
+        
+        if json_ld and json_ld.get('author'):
+            author = json_ld['author']
+            if isinstance(author, dict):
+                result['author_name'] = author.get('name', '')
+                result['author_url'] = author.get('url', '')
+        
+        if not result['author_name']:
+            author_link = soup.find('a', class_=re.compile('author|writer'))
+            if author_link:
+                result['author_name'] = author_link.get_text(strip=True)
+                result['author_url'] = author_link.get('href', '')
+                if result['author_url'] and not result['author_url'].startswith('http'):
+                    result['author_url'] = urljoin('https://medium.com', result['author_url'])
+        mark = lap(timings, 'author', mark)
+        
+        article_body = soup.find('article') or soup.find('div', class_=re.compile('post|article|content'))
+        if not article_body:
+            article_body = soup.find('main') or soup.find('div', id=re.compile('content|post'))
+        
+        if article_body:
+            for script in article_body(["script", "style", "nav", "footer", "header"]):
+                script.decompose()
             
-            if article_body:
-                for script in article_body(["script", "style", "nav", "footer", "header"]):
-                    script.decompose()
+            paragraphs = article_body.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+            text_parts = [p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)]
+            result['text'] = ' '.join(text_parts)
+        mark = lap(timings, 'text', mark)
+        
+        images = []
+        if article_body:
+            img_tags = article_body.find_all('img')
+        else:
+            img_tags = soup.find_all('img')
+        
+        for img in img_tags:
+            img_url = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
+            if img_url:
+                if img_url.startswith('//'):
+                    img_url = 'https:' + img_url
+                elif img_url.startswith('/'):
+                    img_url = urljoin(url, img_url)
                 
-                paragraphs = article_body.find_all(['p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-                text_parts = [p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)]
-                result['text'] = ' '.join(text_parts)
-            
-            images = []
-            if article_body:
-                img_tags = article_body.find_all('img')
-            else:
-                img_tags = soup.find_all('img')
-            
-            for img in img_tags:
-                img_url = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
-                if img_url:
-                    if img_url.startswith('//'):
-                        img_url = 'https:' + img_url
-                    elif img_url.startswith('/'):
-                        img_url = urljoin(url, img_url)
-                    
-                    if 'avatar' not in img_url.lower() and 'icon' not in img_url.lower():
-                        images.append(img_url)
-            
-            result['num_images'] = len(images)
-            result['image_urls'] = '; '.join(images[:50])
-            
-            external_links = []
-            base_domain = urlparse(url).netloc
-            if article_body:
-                links = article_body.find_all('a', href=True)
-            else:
-                links = soup.find_all('a', href=True)
-            
-            for link in links:
-                href = link.get('href', '')
-                if href:
-                    if href.startswith('//'):
-                        href = 'https:' + href
-                    elif href.startswith('/'):
-                        href = urljoin(url, href)
-                    
-                    link_domain = urlparse(href).netloc
-                    if link_domain and link_domain != base_domain and link_domain != 'medium.com':
-                        external_links.append(href)
-            
-            result['num_external_links'] = len(external_links)
-            
-            claps_elem = soup.find('button', class_=re.compile('clap|like')) or \
-                        soup.find('div', class_=re.compile('clap'))
-            if claps_elem:
-                claps_text = claps_elem.get_text(strip=True)
-                claps_match = re.search(r'(\d+[KkMm]?|\d+)', claps_text)
-                if claps_match:
-                    claps_str = claps_match.group(1)
-                    if 'K' in claps_str.upper():
-                        result['claps'] = int(float(claps_str.upper().replace('K', '')) * 1000)
-                    elif 'M' in claps_str.upper():
-                        result['claps'] = int(float(claps_str.upper().replace('M', '')) * 1000000)
-                    else:
-                        result['claps'] = int(claps_str)
-            
-            if result['claps'] == 0:
-                claps_data = soup.find('button', attrs={'data-action': re.compile('clap')})
-                if claps_data:
-                    claps_text = claps_data.get_text(strip=True)
-                    claps_match = re.search(r'(\d+)', claps_text)
-                    if claps_match:
-                        result['claps'] = int(claps_match.group(1))
-            
-            reading_time_elem = soup.find(string=re.compile(r'\d+\s*min\s*read', re.I))
-            if reading_time_elem:
-                time_match = re.search(r'(\d+)', reading_time_elem)
+                if 'avatar' not in img_url.lower() and 'icon' not in img_url.lower():
+                    images.append(img_url)
+        
+        result['num_images'] = len(images)
+        result['image_urls'] = '; '.join(images[:50])
+        mark = lap(timings, 'images', mark)
+        
+        external_links = []
+        base_domain = urlparse(url).netloc
+        if article_body:
+            links = article_body.find_all('a', href=True)
+        else:
+            links = soup.find_all('a', href=True)
+        
+        for link in links:
+            href = link.get('href', '')
+            if href:
+                if href.startswith('//'):
+                    href = 'https:' + href
+                elif href.startswith('/'):
+                    href = urljoin(url, href)
+                
+                link_domain = urlparse(href).netloc
+                if link_domain and link_domain != base_domain and link_domain != 'medium.com':
+                    external_links.append(href)
+        
+        result['num_external_links'] = len(external_links)
+        mark = lap(timings, 'links', mark)
+        
+        claps_elem = soup.find('button', class_=re.compile('clap|like')) or \
+                    soup.find('div', class_=re.compile('clap'))
+        if claps_elem:
+            result['claps'] = scale_claps(claps_elem.get_text(strip=True))
+        
+        if result['claps'] == 0:
+            claps_data = soup.find('button', attrs={'data-action': re.compile('clap')})
+            if claps_data:
+                result['claps'] = scale_claps(claps_data.get_text(strip=True))
+        mark = lap(timings, 'claps', mark)
+        
+        reading_time_elem = soup.find(string=re.compile(r'\d+\s*min\s*read', re.I))
+        if reading_time_elem:
+            time_match = re.search(r'(\d+)', reading_time_elem)
+            if time_match:
+                result['reading_time'] = int(time_match.group(1))
+        
+        if result['reading_time'] == 0:
+            reading_div = soup.find('div', class_=re.compile('reading|time'))
+            if reading_div:
+                time_text = reading_div.get_text()
+                time_match = re.search(r'(\d+)', time_text)
                 if time_match:
                     result['reading_time'] = int(time_match.group(1))
-            
-            if result['reading_time'] == 0:
-                reading_div = soup.find('div', class_=re.compile('reading|time'))
-                if reading_div:
-                    time_text = reading_div.get_text()
-                    time_match = re.search(r'(\d+)', time_text)
-                    if time_match:
-                        result['reading_time'] = int(time_match.group(1))
-            
-            keywords_meta = soup.find('meta', attrs={'name': re.compile('keyword', re.I)})
-            if keywords_meta:
-                result['keywords'] = keywords_meta.get('content', '')
-            
-            if not result['keywords'] and result['text']:
-                words = re.findall(r'\b[a-zA-Z]{4,}\b', result['text'].lower())
-                word_freq = {}
-                for word in words:
-                    if word not in ['that', 'this', 'with', 'from', 'have', 'will', 'your', 'they', 'their']:
-                        word_freq[word] = word_freq.get(word, 0) + 1
-                
-                top_keywords = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)[:10]
-                result['keywords'] = ', '.join([word for word, _ in top_keywords])
-            
-            result['text'] = ' '.join(result['text'].split())
-            
-            logger.info(f"Successfully scraped: {result['title'][:50]}...")
-            return result
-            
-        except requests.RequestException as e:
-            logger.error(f"Request error for {url}: {str(e)}")
-            return self._create_error_result(url, f"Request error: {str(e)}")
-        except Exception as e:
-            logger.error(f"Error scraping {url}: {str(e)}")
-            return self._create_error_result(url, f"Error: {str(e)}")
+        mark = lap(timings, 'reading_time', mark)
+        
+        keywords_meta = soup.find('meta', attrs={'name': re.compile('keyword', re.I)})
+        if keywords_meta:
+            result['keywords'] = keywords_meta.get('content', '')
+        
+        if not result['keywords'] and result['text']:
+            result['keywords'] = top_keywords(result['text'])
+        
+        result['text'] = ' '.join(result['text'].split())
+        lap(timings, 'keywords', mark)
+        
+        logger.info(f"Successfully scraped: {result['title'][:50]}...")
+        return result
     
-    def _create_error_result(self, url: str, error_msg: str) -> Dict:
+    @staticmethod
+    def _create_error_result(url: str, error_msg: str, retryable: bool = False) -> Dict:
         return {
             'url': url,
             'title': '',
@@ -253,44 +312,188 @@ class MediumScraper:
             'claps': 0,
             'reading_time': 0,
             'keywords': '',
-            'error': error_msg
+            'error': error_msg,
+            'retryable': retryable
         }
     
-    def scrape_urls(self, urls: List[str], output_file: str = 'scrapping_results.csv') -> None:
-        fieldnames = [
-            'url', 'title', 'subtitle', 'text', 'num_images', 'image_urls',
-            'num_external_links', 'author_name', 'author_url', 'claps',
-            'reading_time', 'keywords'
-        ]
+    def scrape_urls(self, urls: List[str], output_file: str = 'scrapping_results.csv', concurrency: int = 1,
+                    pipeline=None, ledger=None, sink=None) -> None:
+        owns_sink = sink is None
+        if owns_sink:
+            sink = open_sink(output_file)
+        
+        total = len(urls)
+        completed = 0
+        unrecorded = []
+        
+        def write_result(result: Dict) -> None:
+            if self.telemetry is not None:
+                self.telemetry.record_result(result)
+            if ledger is None or ledger.should_write(result):
+                sink.write(result)
+            if ledger is not None:
+                unrecorded.append(result)
+                if sink.pending_rows == 0:
+                    record_results()
+        
+        def record_results() -> None:
+            for result in unrecorded:
+                ledger.record(result)
+            unrecorded.clear()
+        
+        def log_result(result: Dict) -> None:
+            nonlocal completed
+            completed += 1
+            logger.info(f"Processed {completed}/{total}: {result['url']}")
+            write_result(result)
         
-        file_exists = False
         try:
-            with open(output_file, 'r', encoding='utf-8'):
-                file_exists = True
-        except FileNotFoundError:
-            pass
+            if pipeline is not None:
+                pipeline.run(urls, log_result)
+            elif concurrency > 1:
+                self.configure_pool(concurrency)
+                on_wait = self.telemetry.record_wait if self.telemetry is not None else None
+                run_crawl(urls, self.extract_article_data, log_result, concurrency, self.delay, on_wait)
+            else:
+                for idx, url in enumerate(urls, 1):
+                    logger.info(f"Processing {idx}/{total}: {url}")
+                    result = self.extract_article_data(url)
+                    
+                    write_result(result)
+                    
+                    if idx < total:
+                        time.sleep(self.delay)
+                        if self.telemetry is not None:
+                            self.telemetry.record_wait(self.delay)
+        finally:
+            if owns_sink:
+                sink.close()
+            else:
+                sink.flush()
+            if ledger is not None:
+                record_results()
         
-        with open(output_file, 'a', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            if not file_exists:
-                writer.writeheader()
-            
-            total = len(urls)
-            for idx, url in enumerate(urls, 1):
-                logger.info(f"Processing {idx}/{total}: {url}")
-                result = self.extract_article_data(url)
-                
-                result_to_write = {k: v for k, v in result.items() if k in fieldnames}
-                writer.writerow(result_to_write)
-                
-                if idx < total:
-                    time.sleep(self.delay)
+        logger.info(f"Scraping complete! Results saved to {sink.path}")
+
+
+class CsvSink:
+    def __init__(self, path: str):
+        self.path = path
+        self.pending_rows = 0
+        file_exists = os.path.exists(path)
+        self.file = open(path, 'a', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=FIELDNAMES)
+        if not file_exists:
+            self.writer.writeheader()
+    
+    def write(self, result: Dict) -> None:
+        self.writer.writerow({k: v for k, v in result.items() if k in FIELDNAMES})
+        self.file.flush()
+    
+    def flush(self) -> None:
+        self.file.flush()
+    
+    def close(self) -> None:
+        self.file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class ParquetSink:
+    def __init__(self, path: str, row_group_size: int = 1000):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
         
-        logger.info(f"Scraping complete! Results saved to {output_file}")
+        self.pa = pa
+        self.path = path
+        self.row_group_size = row_group_size
+        self.schema = pa.schema([
+            (name, pa.int64() if name in INTEGER_FIELDS else pa.string()) for name in FIELDNAMES
+        ])
+        os.makedirs(path, exist_ok=True)
+        part_name = f"part-{datetime.now().strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:8]}.parquet"
+        self.writer = pq.ParquetWriter(os.path.join(path, part_name), self.schema, compression='zstd')
+        self.columns = {name: [] for name in FIELDNAMES}
+        self.pending_rows = 0
+    
+    def write(self, result: Dict) -> None:
+        for name in FIELDNAMES:
+            value = result.get(name)
+            if name in INTEGER_FIELDS:
+                self.columns[name].append(int(value or 0))
+            else:
+                self.columns[name].append('' if value is None else str(value))
+        self.pending_rows += 1
+        if self.pending_rows >= self.row_group_size:
+            self.flush()
+    
+    def flush(self) -> None:
+        if not self.pending_rows:
+            return
+        self.writer.write_table(self.pa.table(self.columns, schema=self.schema))
+        self.columns = {name: [] for name in FIELDNAMES}
+        self.pending_rows = 0
+    
+    def close(self) -> None:
+        self.flush()
+        self.writer.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+def open_sink(output_file: str, row_group_size: int = 1000):
+    if output_file.endswith('.parquet'):
+        return ParquetSink(output_file, row_group_size)
+    return CsvSink(output_file)
 
 
-def load_urls_from_file(file_path: str) -> List[str]:
+def is_transient_error(error: requests.RequestException) -> bool:
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    response = getattr(error, 'response', None)
+    return response is not None and (response.status_code == 429 or response.status_code >= 500)
+
+
+def request_error_category(error: requests.RequestException) -> str:
+    if isinstance(error, requests.Timeout):
+        return 'timeout'
+    if isinstance(error, requests.ConnectionError):
+        return 'connection'
+    response = getattr(error, 'response', None)
+    if response is not None:
+        return f'http_{response.status_code}'
+    return 'request'
+
+
+def parse_article_html(url: str, content: bytes, parser: str = 'bs4',
+                       timings: Optional[Dict[str, float]] = None) -> Dict:
+    try:
+        if parser == 'fast':
+            result = extract_article_lxml(url, content, timings)
+            logger.info(f"Successfully scraped: {result['title'][:50]}...")
+            return result
+        return MediumScraper.parse_article(url, content, timings)
+    except Exception as e:
+        logger.error(f"Error scraping {url}: {str(e)}")
+        return MediumScraper._create_error_result(url, f"Error: {str(e)}")
+
+
+def parse_article_timed(url: str, content: bytes, parser: str = 'bs4') -> Tuple[Dict, Dict[str, float], float]:
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+    result = parse_article_html(url, content, parser, timings)
+    return result, timings, time.perf_counter() - start
+
+
+def load_urls_from_file(file_path: str, dedupe: bool = True, use_bloom: bool = False) -> List[str]:
     urls = []
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
@@ -301,21 +504,42 @@ def load_urls_from_file(file_path: str) -> List[str]:
         logger.info(f"Loaded {len(urls)} URLs from {file_path}")
     except FileNotFoundError:
         logger.error(f"File not found: {file_path}")
+    if dedupe and urls:
+        urls, duplicates = dedupe_urls(urls, use_bloom)
+        logger.info(f"Removed {duplicates} duplicate URLs ({duplicates} fetches saved), {len(urls)} unique")
     return urls
 
 
+def add_cache_arguments(parser) -> None:
+    parser.add_argument('--cache-dir', type=str, help='Directory for the on-disk HTTP response cache (disabled if omitted)')
+    parser.add_argument('--cache-ttl', type=float, default=86400, help='Seconds a cached page is served without revalidation')
+    parser.add_argument('--cache-max-mb', type=int, default=1024, help='Cache size limit; least recently used pages are evicted')
+
+
+def add_telemetry_arguments(parser) -> None:
+    parser.add_argument('--report', type=str, help='Write the end-of-run throughput and timing report to this JSON file')
+    parser.add_argument('--progress-interval', type=float, default=30.0, help='Seconds between progress summaries in the log')
+    parser.add_argument('--url-log', type=str, help='Append per-URL fetch/parse timings to this JSON-lines file')
+
+
 def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Scrape Medium articles')
     parser.add_argument('--urls', type=str, help='Path to file containing URLs (one per line)')
     parser.add_argument('--url', type=str, help='Single URL to scrape')
-    parser.add_argument('--output', type=str, default='scrapping_results.csv', help='Output CSV file')
+    parser.add_argument('--output', type=str, default='scrapping_results.csv', help='Output CSV file, or a .parquet dataset directory')
     parser.add_argument('--delay', type=float, default=1.0, help='Delay between requests (seconds)')
+    parser.add_argument('--concurrency', type=int, default=1, help='Requests kept in flight; the delay is then enforced per host')
+    parser.add_argument('--parser', type=str, choices=PARSERS, default='bs4', help='HTML extractor backend (fast = lxml)')
+    add_cache_arguments(parser)
+    add_telemetry_arguments(parser)
     
     args = parser.parse_args()
     
-    scraper = MediumScraper(delay=args.delay)
+    telemetry = ScrapeTelemetry(args.progress_interval, args.url_log)
+    scraper = MediumScraper(delay=args.delay, parser=args.parser, cache_dir=args.cache_dir,
+                            cache_ttl=args.cache_ttl, cache_max_mb=args.cache_max_mb, telemetry=telemetry)
     urls = []
     
     if args.urls:
@@ -335,7 +559,13 @@ def main():
         print("No URLs provided. Exiting.")
         return
     
-    scraper.scrape_urls(urls, args.output)
+    try:
+        scraper.scrape_urls(urls, args.output, concurrency=args.concurrency)
+    finally:
+        telemetry.close()
+    telemetry.report()
+    if args.report:
+        telemetry.write_report(args.report)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,116 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+PRUNE_EVERY = 100
+
+
+class QueryCache:
+    def __init__(self, max_entries: int = 1024, shared_path: Optional[str] = None,
+                 shared_max_entries: int = 100000):
+        self.max_entries = max_entries
+        self.shared_max_entries = shared_max_entries
+        self.lock = threading.Lock()
+        self.entries: 'OrderedDict[Tuple[str, str, int, str], List[Dict]]' = OrderedDict()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.shared_puts = 0
+        self.shared_version: Optional[str] = None
+        self.db = None
+        if shared_path:
+            self.db = sqlite3.connect(shared_path, check_same_thread=False, timeout=5)
+            self.db.execute('PRAGMA journal_mode=WAL')
+            self.db.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    version TEXT NOT NULL,
+                    results TEXT NOT NULL,
+                    used_at REAL NOT NULL
+                )
+            """)
+            self.db.execute('CREATE INDEX IF NOT EXISTS results_used ON results (used_at)')
+            self.db.commit()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 or self.db is not None
+
+    @staticmethod
+    def key_for(version: str, query: str, top_n: int, mode: str = 'exact') -> Tuple[str, str, int, str]:
+        return version, query.lower(), top_n, mode
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def get(self, version: str, query: str, top_n: int, mode: str = 'exact') -> Optional[List[Dict]]:
+        key = self.key_for(version, query, top_n, mode)
+        with self.lock:
+            results = self.entries.get(key)
+            if results is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return results
+            if self.db is not None:
+                row = self.db.execute(
+                    'SELECT results FROM results WHERE key = ? AND version = ?', (json.dumps(key), version)
+                ).fetchone()
+                if row is not None:
+                    results = json.loads(row[0])
+                    self.shared_hits += 1
+                    self._remember(key, results)
+                    return results
+            self.misses += 1
+        return None
+
+    def _remember(self, key: Tuple[str, str, int, str], results: List[Dict]) -> None:
+        if self.max_entries <= 0:
+            return
+        self.entries[key] = results
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def put(self, version: str, query: str, top_n: int, results: List[Dict], mode: str = 'exact') -> None:
+        key = self.key_for(version, query, top_n, mode)
+        with self.lock:
+            self._remember(key, results)
+            if self.db is None:
+                return
+            if self.shared_version != version:
+                self.db.execute('DELETE FROM results WHERE version != ?', (version,))
+                self.shared_version = version
+            self.db.execute(
+                'INSERT OR REPLACE INTO results (key, version, results, used_at) VALUES (?, ?, ?, ?)',
+                (json.dumps(key), version, json.dumps(results), time.time())
+            )
+            self.shared_puts += 1
+            if self.shared_puts % PRUNE_EVERY == 0:
+                self._prune_shared()
+            self.db.commit()
+
+    def _prune_shared(self) -> None:
+        count = self.db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        excess = count - self.shared_max_entries
+        if excess > 0:
+            self.db.execute(
+                'DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY used_at LIMIT ?)', (excess,)
+            )
+            self.evictions += excess
+
+    def stats(self) -> Dict:
+        return {
+            'entries': len(self.entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'shared': self.db is not None
+        }
@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from io import BytesIO
+from typing import Callable, Dict, Iterator, List, Optional
+
+import requests
+from lxml import etree
+
+logger = logging.getLogger(__name__)
+
+
+def _pub_timestamp(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value.strip()).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_feed_items(source) -> Iterator[Dict]:
+    for _, item in etree.iterparse(source, events=('end',), tag='item', recover=True, resolve_entities=False):
+        fields = {child.tag: (child.text or '').strip() for child in item if isinstance(child.tag, str)}
+        link = fields.get('link', '')
+        yield {
+            'link': link,
+            'guid': fields.get('guid') or link,
+            'pub_date': _pub_timestamp(fields.get('pubDate'))
+        }
+        item.clear()
+        while item.getprevious() is not None:
+            del item.getparent()[0]
+
+
+class RssHarvester:
+    def __init__(self, session: Optional[requests.Session] = None, state_file: Optional[str] = None,
+                 max_workers: int = 16, timeout: float = 30):
+        self.session = session or requests.Session()
+        self.state_file = state_file
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.state: Dict[str, Dict] = {}
+        if state_file and os.path.exists(state_file):
+            with open(state_file, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+
+    def save_state(self) -> None:
+        if not self.state_file:
+            return
+        tmp_file = self.state_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+    def fetch_feed(self, feed_url: str) -> List[Dict]:
+        seen = self.state.get(feed_url, {})
+        last_guid = seen.get('last_guid')
+        last_pub_date = seen.get('last_pub_date')
+        items = []
+        try:
+            logger.info(f"Fetching RSS feed: {feed_url}")
+            with self.session.get(feed_url, timeout=self.timeout, stream=True,
+                                  headers={'Cache-Control': 'no-cache'}) as response:
+                response.raise_for_status()
+                if response.raw is not None and not response._content_consumed:
+                    response.raw.decode_content = True
+                    source = response.raw
+                else:
+                    source = BytesIO(response.content)
+                for item in iter_feed_items(source):
+                    if last_guid and item['guid'] == last_guid:
+                        break
+                    if last_pub_date and item['pub_date'] and item['pub_date'] <= last_pub_date:
+                        continue
+                    if item['link']:
+                        items.append(item)
+        except (requests.RequestException, etree.XMLSyntaxError) as e:
+            logger.error(f"Error fetching RSS feed {feed_url}: {str(e)}")
+        return items
+
+    def _remember(self, feed_url: str, items: List[Dict]) -> None:
+        if not items:
+            return
+        dated = [item for item in items if item['pub_date']]
+        newest = max(dated, key=lambda item: item['pub_date']) if dated else items[0]
+        previous = self.state.get(feed_url, {})
+        self.state[feed_url] = {
+            'last_guid': newest['guid'],
+            'last_pub_date': max(filter(None, [newest['pub_date'], previous.get('last_pub_date')]), default=None)
+        }
+
+    def harvest(self, feed_urls: List[str], max_urls: Optional[int] = None,
+                accept: Optional[Callable[[str], bool]] = None) -> Dict[str, List[str]]:
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(feed_urls)))) as executor:
+            results = list(executor.map(self.fetch_feed, feed_urls))
+        harvested = {}
+        remaining = max_urls
+        for feed_url, items in zip(feed_urls, results):
+            consumed, emitted = set(), set()
+            for position in sorted(range(len(items)), key=lambda i: (items[i]['pub_date'] or 0, -i)):
+                if remaining is not None and remaining <= 0:
+                    break
+                consumed.add(position)
+                if accept is None or accept(items[position]['link']):
+                    emitted.add(position)
+                    if remaining is not None:
+                        remaining -= 1
+            self._remember(feed_url, [item for i, item in enumerate(items) if i in consumed])
+            harvested[feed_url] = [item['link'] for i, item in enumerate(items) if i in emitted]
+            if len(consumed) < len(items):
+                logger.info(f"Found {len(items)} new article URLs in {feed_url}; "
+                            f"{len(items) - len(consumed)} newer ones left for the next run")
+            else:
+                logger.info(f"Found {len(items)} new article URLs in {feed_url}")
+        self.save_state()
+        return harvested
@@ -1,22 +1,24 @@
 from medium_scraper import MediumScraper
-import sys
+from rss_harvester import RssHarvester
+from url_utils import UrlDeduplicator, normalize_url
 
-def extract_urls_from_rss_feeds(rss_urls, output_file='urls.txt', max_urls=1000):
+def extract_urls_from_rss_feeds(rss_urls, output_file='urls.txt', max_urls=1000, state_file=None, max_workers=16):
     scraper = MediumScraper()
+    harvester = RssHarvester(scraper.session, state_file, max_workers)
+    deduper = UrlDeduplicator(capacity=max_urls * 10)
     all_urls = []
     
-    print(f"Extracting article URLs from RSS feeds...")
+    print(f"Extracting article URLs from {len(rss_urls)} RSS feeds...")
     print(f"Sample size: {max_urls} URLs")
     print("=" * 60)
     
+    harvested = harvester.harvest(rss_urls, max_urls, deduper.add)
+    
     for rss_url in rss_urls:
-        urls = scraper.extract_article_urls_from_rss(rss_url)
-        all_urls.extend(urls)
-        
-        if len(all_urls) >= max_urls:
-            all_urls = all_urls[:max_urls]
-            print(f"\nReached sample size limit of {max_urls} URLs")
-            break
+        all_urls.extend(normalize_url(url) for url in harvested[rss_url])
+    
+    if len(all_urls) >= max_urls:
+        print(f"\nReached sample size limit of {max_urls} URLs; the remaining articles are emitted on the next run")
     
     with open(output_file, 'w', encoding='utf-8') as f:
         for url in all_urls:
@@ -25,11 +27,16 @@ def extract_urls_from_rss_feeds(rss_urls, output_file='urls.txt', max_urls=1000)
     print(f"\n{'='*60}")
     print(f"Saved {len(all_urls)} article URLs to {output_file}")
     print(f"Sample size: {len(all_urls)} URLs")
+    print(f"Duplicates removed: {deduper.duplicates} ({deduper.duplicates} fetches saved)")
+    if state_file:
+        print(f"Feed state saved to {state_file}; the next run only emits newer articles")
     print(f"{'='*60}")
     print(f"\nNow you can scrape these articles:")
     print(f"python medium_scraper.py --urls {output_file} --output scrapping_results.csv --delay 2.0")
 
 if __name__ == '__main__':
+    import argparse
+    
     rss_feeds = [
         'https://medium.com/feed/tag/technology',
         'https://medium.com/feed/tag/programming',
@@ -38,9 +45,13 @@ if __name__ == '__main__':
         'https://medium.com/feed/tag/python'
     ]
     
-    max_urls = 1000
+    parser = argparse.ArgumentParser(description='Harvest Medium article URLs from RSS feeds')
+    parser.add_argument('feeds', nargs='*', default=rss_feeds, help='RSS feed URLs')
+    parser.add_argument('--output', type=str, default='urls.txt', help='Output file for article URLs')
+    parser.add_argument('--max-urls', type=int, default=1000, help='Sample size limit')
+    parser.add_argument('--state', type=str, default='rss_state.json', help='Per-feed last seen GUID/pubDate (empty string disables incremental mode)')
+    parser.add_argument('--workers', type=int, default=16, help='Feeds fetched in parallel')
     
-    if len(sys.argv) > 1:
-        rss_feeds = sys.argv[1:]
+    args = parser.parse_args()
     
-    extract_urls_from_rss_feeds(rss_feeds, 'urls.txt', max_urls)
+    extract_urls_from_rss_feeds(args.feeds, args.output, args.max_urls, args.state or None, args.workers)
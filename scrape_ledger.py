@@ -0,0 +1,131 @@
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+DONE = 'done'
+FAILED = 'failed'
+RETRYABLE = 'retryable'
+
+
+class ScrapeLedger:
+    def __init__(self, path: str = 'scrape_ledger.sqlite3', max_attempts: int = 3, backoff: float = 2.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL,
+                last_error TEXT,
+                next_attempt_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.db.execute('CREATE INDEX IF NOT EXISTS urls_retry ON urls (status, next_attempt_at)')
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS cursors (
+                input_file TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.db.commit()
+
+    def close(self) -> None:
+        with self.lock:
+            self.db.close()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.db.execute('DELETE FROM urls')
+            self.db.execute('DELETE FROM cursors')
+            self.db.commit()
+
+    def finished(self, urls: Iterable[str]) -> Set[str]:
+        urls = list(urls)
+        found = set()
+        with self.lock:
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self.db.execute(
+                    f'SELECT url FROM urls WHERE status IN (?, ?) AND url IN ({placeholders})',
+                    (DONE, FAILED, *chunk)
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def pending(self, urls: List[str]) -> List[str]:
+        finished = self.finished(urls)
+        return [url for url in urls if url not in finished]
+
+    def attempts(self, url: str) -> int:
+        with self.lock:
+            row = self.db.execute('SELECT attempts FROM urls WHERE url = ?', (url,)).fetchone()
+        return row[0] if row else 0
+
+    def _status_for(self, result: Dict, attempts: int) -> str:
+        if 'error' not in result:
+            return DONE
+        if result.get('retryable') and attempts < self.max_attempts:
+            return RETRYABLE
+        return FAILED
+
+    def should_write(self, result: Dict) -> bool:
+        return self._status_for(result, self.attempts(result['url']) + 1) != RETRYABLE
+
+    def record(self, result: Dict) -> str:
+        url = result['url']
+        now = time.time()
+        with self.lock:
+            row = self.db.execute('SELECT attempts FROM urls WHERE url = ?', (url,)).fetchone()
+            attempts = (row[0] if row else 0) + 1
+            status = self._status_for(result, attempts)
+            next_attempt_at = now + self.backoff * (2 ** (attempts - 1)) if status == RETRYABLE else now
+            self.db.execute(
+                'INSERT OR REPLACE INTO urls (url, status, attempts, last_error, next_attempt_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (url, status, attempts, result.get('error'), next_attempt_at, now)
+            )
+            self.db.commit()
+        return status
+
+    def next_retry_at(self) -> Optional[float]:
+        with self.lock:
+            row = self.db.execute(
+                'SELECT MIN(next_attempt_at) FROM urls WHERE status = ?', (RETRYABLE,)
+            ).fetchone()
+        return row[0]
+
+    def due_retries(self, now: Optional[float] = None) -> List[str]:
+        now = time.time() if now is None else now
+        with self.lock:
+            rows = self.db.execute(
+                'SELECT url FROM urls WHERE status = ? AND next_attempt_at <= ? ORDER BY next_attempt_at',
+                (RETRYABLE, now)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def cursor(self, input_file: str) -> int:
+        with self.lock:
+            row = self.db.execute('SELECT position FROM cursors WHERE input_file = ?', (input_file,)).fetchone()
+        return row[0] if row else 0
+
+    def set_cursor(self, input_file: str, position: int) -> None:
+        with self.lock:
+            self.db.execute(
+                'INSERT OR REPLACE INTO cursors (input_file, position, updated_at) VALUES (?, ?, ?)',
+                (input_file, position, time.time())
+            )
+            self.db.commit()
+
+    def summary(self) -> Dict[str, int]:
+        with self.lock:
+            rows = self.db.execute('SELECT status, COUNT(*) FROM urls GROUP BY status').fetchall()
+        return {status: count for status, count in rows}
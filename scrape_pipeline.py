@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from crawl_engine import HostRateLimiter, crawl
+from medium_scraper import MediumScraper, parse_article_timed
+
+logger = logging.getLogger(__name__)
+
+FetchedPage = Tuple[int, str, Optional[bytes], Optional[Dict]]
+
+
+class ScrapePipeline:
+    def __init__(self, scraper: MediumScraper, concurrency: int = 8, parse_workers: Optional[int] = None,
+                 queue_size: int = 64, ordered: bool = False):
+        self.scraper = scraper
+        self.concurrency = max(1, concurrency)
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.ordered = ordered
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.scraper.configure_pool(self.concurrency)
+
+    def __enter__(self) -> 'ScrapePipeline':
+        self.executor = ProcessPoolExecutor(max_workers=self.parse_workers)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    def run(self, urls: List[str], on_result: Callable[[Dict], None]) -> None:
+        if self.executor is not None:
+            asyncio.run(self._run(urls, on_result, self.executor))
+            return
+        with ProcessPoolExecutor(max_workers=self.parse_workers) as executor:
+            asyncio.run(self._run(urls, on_result, executor))
+
+    def _fetch(self, item: Tuple[int, str]) -> FetchedPage:
+        index, url = item
+        logger.info(f"Fetching: {url}")
+        content, error_result = self.scraper.fetch_content(url)
+        if error_result is None:
+            cached_result = self.scraper.cached_result(url, content)
+            if cached_result is not None:
+                return index, url, None, cached_result
+        return index, url, content, error_result
+
+    async def _run(self, urls: List[str], on_result: Callable[[Dict], None],
+                   executor: ProcessPoolExecutor) -> None:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        pending: Dict[int, Dict] = {}
+        next_index = 0
+        telemetry = self.scraper.telemetry
+        window = asyncio.Semaphore(self.concurrency + self.queue_size) if self.ordered and self.queue_size > 0 else None
+
+        def emit(index: int, result: Dict) -> None:
+            nonlocal next_index
+            if not self.ordered:
+                on_result(result)
+                return
+            pending[index] = result
+            while next_index in pending:
+                on_result(pending.pop(next_index))
+                next_index += 1
+                if window is not None:
+                    window.release()
+
+        async def parse_worker() -> None:
+            while True:
+                page = await queue.get()
+                if page is None:
+                    break
+                index, url, content, ready_result = page
+                if ready_result is None:
+                    result, timings, seconds = await loop.run_in_executor(
+                        executor, parse_article_timed, url, content, self.scraper.parser
+                    )
+                    if telemetry is not None:
+                        telemetry.record_parse(url, seconds, timings, 'error' in result)
+                    self.scraper.remember_result(url, content, result)
+                else:
+                    result = ready_result
+                emit(index, result)
+
+        async def fetch_stage() -> None:
+            try:
+                await crawl(
+                    list(enumerate(urls)), self._fetch, queue.put,
+                    self.concurrency,
+                    HostRateLimiter(self.scraper.delay, on_wait=telemetry.record_wait if telemetry is not None else None),
+                    url_of=lambda item: item[1], window=window
+                )
+            finally:
+                for _ in range(self.parse_workers):
+                    await queue.put(None)
+
+        await asyncio.gather(fetch_stage(), *(parse_worker() for _ in range(self.parse_workers)))
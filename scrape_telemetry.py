@@ -0,0 +1,169 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+BUCKET_GROWTH = 1.05
+MIN_SECONDS = 1e-6
+MAX_BUCKETS = 600
+
+
+def lap(timings: Optional[Dict[str, float]], field: str, start: float) -> float:
+    now = time.perf_counter()
+    if timings is not None:
+        timings[field] = timings.get(field, 0.0) + now - start
+    return now
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.buckets = [0] * MAX_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        bucket = 0
+        if seconds > MIN_SECONDS:
+            bucket = min(int(math.log(seconds / MIN_SECONDS, BUCKET_GROWTH)) + 1, MAX_BUCKETS - 1)
+        self.buckets[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(MIN_SECONDS * BUCKET_GROWTH ** bucket, self.max)
+        return self.max
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'total_seconds': round(self.total, 6),
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(0.5) * 1000, 3),
+            'p95_ms': round(self.percentile(0.95) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3)
+        }
+
+
+class ScrapeTelemetry:
+    def __init__(self, report_interval: float = 30.0, url_log: Optional[str] = None):
+        self.report_interval = report_interval
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.last_report = time.monotonic()
+        self.stages = {stage: LatencyHistogram() for stage in ('fetch', 'parse', 'wait')}
+        self.fields: Dict[str, LatencyHistogram] = {}
+        self.urls = 0
+        self.bytes = 0
+        self.cached = 0
+        self.statuses: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.pending: Dict[str, Dict] = {}
+        self.url_log = open(url_log, 'a', encoding='utf-8') if url_log else None
+
+    def record_fetch(self, url: str, seconds: float, status: Optional[int], size: int, cached: bool = False,
+                     error: Optional[str] = None) -> None:
+        with self.lock:
+            self.stages['fetch'].observe(seconds)
+            self.bytes += size
+            self.cached += int(cached)
+            status_key = str(status) if status is not None else 'none'
+            self.statuses[status_key] = self.statuses.get(status_key, 0) + 1
+            if error:
+                self.errors[error] = self.errors.get(error, 0) + 1
+            if self.url_log is not None:
+                self.pending.setdefault(url, {}).update({
+                    'fetch_seconds': seconds, 'status': status, 'bytes': size, 'cached': cached, 'error': error
+                })
+
+    def record_parse(self, url: str, seconds: float, fields: Optional[Dict[str, float]] = None,
+                     failed: bool = False) -> None:
+        with self.lock:
+            self.stages['parse'].observe(seconds)
+            for field, field_seconds in (fields or {}).items():
+                self.fields.setdefault(field, LatencyHistogram()).observe(field_seconds)
+            if failed:
+                self.errors['parse'] = self.errors.get('parse', 0) + 1
+            if self.url_log is not None:
+                record = self.pending.setdefault(url, {})
+                record.update({'parse_seconds': seconds, 'fields': fields or {}})
+                if failed:
+                    record['error'] = 'parse'
+
+    def record_wait(self, seconds: float) -> None:
+        with self.lock:
+            self.stages['wait'].observe(seconds)
+
+    def record_result(self, result: Dict) -> None:
+        with self.lock:
+            self.urls += 1
+            if self.url_log is not None:
+                record = self.pending.pop(result['url'], {})
+                self.url_log.write(json.dumps({'url': result['url'], **record}) + '\n')
+            due = time.monotonic() - self.last_report >= self.report_interval
+        if due:
+            self.report()
+
+    def summary(self) -> Dict:
+        with self.lock:
+            elapsed = time.time() - self.started
+            error_count = sum(self.errors.values())
+            return {
+                'started_at': self.started,
+                'elapsed_seconds': round(elapsed, 3),
+                'urls': self.urls,
+                'urls_per_second': round(self.urls / elapsed, 3) if elapsed > 0 else 0.0,
+                'bytes': self.bytes,
+                'cached_responses': self.cached,
+                'status_counts': dict(self.statuses),
+                'errors': {
+                    'total': error_count,
+                    'rate': round(error_count / self.urls, 4) if self.urls else 0.0,
+                    'by_category': dict(self.errors)
+                },
+                'stages': {stage: histogram.summary() for stage, histogram in self.stages.items()},
+                'fields': {field: histogram.summary() for field, histogram in sorted(self.fields.items())}
+            }
+
+    def report(self) -> Dict:
+        summary = self.summary()
+        with self.lock:
+            self.last_report = time.monotonic()
+        stages = summary['stages']
+        errors = summary['errors']
+        logger.info(
+            f"{summary['urls']} URLs in {summary['elapsed_seconds']:.0f}s ({summary['urls_per_second']:.2f}/s) | "
+            f"fetch p50 {stages['fetch']['p50_ms']:.0f}ms p95 {stages['fetch']['p95_ms']:.0f}ms | "
+            f"parse p50 {stages['parse']['p50_ms']:.0f}ms p95 {stages['parse']['p95_ms']:.0f}ms | "
+            f"waited {stages['wait']['total_seconds']:.1f}s | "
+            f"errors {errors['rate']:.1%} {errors['by_category']}"
+        )
+        return summary
+
+    def write_report(self, path: str) -> Dict:
+        summary = self.summary()
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        os.replace(tmp_path, path)
+        logger.info(f"Wrote scrape report to {path}")
+        return summary
+
+    def close(self) -> None:
+        with self.lock:
+            if self.url_log is not None:
+                self.url_log.close()
+                self.url_log = None
@@ -0,0 +1,152 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import numbers
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from facet_index import AUTHOR_FACET, RANGE_FACETS
+
+Ranked = Tuple[np.ndarray, np.ndarray]
+CURSOR_FIELDS = {'id', 'version', 'query', 'filters', 'offset', 'page_size', 'expires'}
+
+
+def new_cursor_id() -> str:
+    return secrets.token_urlsafe(9)
+
+
+def sign(payload: bytes, key: bytes) -> str:
+    digest = hmac.new(key, payload, hashlib.sha256).digest()[:16]
+    return base64.urlsafe_b64encode(digest).decode('ascii').rstrip('=')
+
+
+def encode_cursor(state: Dict, key: bytes) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps(state, separators=(',', ':')).encode('utf-8'))
+    return f"{payload.decode('ascii')}.{sign(payload, key)}"
+
+
+def is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def is_number(value) -> bool:
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+def valid_filters(filters) -> bool:
+    if not isinstance(filters, dict):
+        return False
+    for name, value in filters.items():
+        if name == AUTHOR_FACET:
+            if not isinstance(value, list) or not all(isinstance(author, str) for author in value):
+                return False
+        elif name in RANGE_FACETS:
+            if not isinstance(value, list) or len(value) != 2:
+                return False
+            if not all(bound is None or is_number(bound) for bound in value):
+                return False
+        else:
+            return False
+    return True
+
+
+def decode_cursor(token: str, key: bytes, max_page_size: int) -> Dict:
+    if not isinstance(token, str):
+        raise ValueError('Invalid cursor')
+    payload, _, signature = token.partition('.')
+    try:
+        if not hmac.compare_digest(signature.encode('utf-8'), sign(payload.encode('ascii'), key).encode('ascii')):
+            raise ValueError('Invalid cursor')
+        state = json.loads(base64.urlsafe_b64decode(payload.encode('ascii')))
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(state, dict) or not CURSOR_FIELDS <= state.keys():
+        raise ValueError('Invalid cursor')
+    if not (isinstance(state['id'], str) and isinstance(state['version'], str) and isinstance(state['query'], str)
+            and is_int(state['offset']) and state['offset'] >= 0
+            and is_int(state['page_size']) and 1 <= state['page_size'] <= max_page_size
+            and is_number(state['expires']) and valid_filters(state['filters'])):
+        raise ValueError('Invalid cursor')
+    return state
+
+
+class CursorCache:
+    def __init__(self, ttl: float = 300.0, max_bytes: int = 64 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries: 'OrderedDict[str, Tuple[str, float, Ranked]]' = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    @staticmethod
+    def size_of(ranked: Ranked) -> int:
+        return int(ranked[0].nbytes + ranked[1].nbytes)
+
+    def _drop(self, cursor_id: str) -> None:
+        _, _, ranked = self.entries.pop(cursor_id)
+        self.bytes -= self.size_of(ranked)
+
+    def _expire(self, now: float) -> None:
+        while self.entries:
+            cursor_id, (_, used_at, _) = next(iter(self.entries.items()))
+            if now - used_at < self.ttl:
+                break
+            self._drop(cursor_id)
+            self.expired += 1
+
+    def get(self, cursor_id: str, version: str) -> Optional[Ranked]:
+        with self.lock:
+            now = time.time()
+            self._expire(now)
+            entry = self.entries.get(cursor_id)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self.entries[cursor_id] = (version, now, entry[2])
+            self.entries.move_to_end(cursor_id)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, cursor_id: str, version: str, ranked: Ranked) -> None:
+        size = self.size_of(ranked)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            now = time.time()
+            self._expire(now)
+            if cursor_id in self.entries:
+                self._drop(cursor_id)
+            while self.entries and self.bytes + size > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+                self.evictions += 1
+            self.entries[cursor_id] = (version, now, ranked)
+            self.bytes += size
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                'cursors': len(self.entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expired': self.expired
+            }
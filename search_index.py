@@ -0,0 +1,628 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from ann_index import AnnIndex
+from append_buffer import AppendBuffer, grow, merge_postings
+from bm25_index import BM25_FILES, BM25_IDF_FILE, Bm25Index, blend_top, claps_scores, count_vectorizer, log_claps
+from document_store import DocumentStore
+from facet_index import FacetIndex
+from keyword_index import KeywordIndex
+
+logger = logging.getLogger(__name__)
+
+SEARCH_COLUMNS = ['url', 'title', 'subtitle', 'text', 'keywords', 'claps']
+FACET_COLUMNS = ['author_name', 'reading_time', 'num_images']
+PHRASE_COLUMNS = ['title', 'subtitle', 'keywords', 'text']
+WORD_COLUMNS = ['title', 'keywords']
+FALLBACK_SIMILARITY = 0.5
+DENSE_ACCUMULATE_RATIO = 8
+CLAPS_BUCKETS = 1024
+MAX_POSTING_SEGMENTS = 8
+IDF_REFRESH_RATIO = 0.1
+ANN_RERANK = 10
+BM25_CLAPS_WEIGHT = 0.3
+SHARDS_FILE = 'shards.json'
+VECTORIZER_PARAMS = {
+    'max_features': 5000,
+    'stop_words': 'english',
+    'ngram_range': (1, 2),
+    'min_df': 1
+}
+
+
+def is_parquet_path(path: str) -> bool:
+    return path.endswith('.parquet') or os.path.isdir(path)
+
+
+def read_articles(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    if is_parquet_path(path):
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=(lambda column: column in columns) if columns is not None else None)
+
+
+def prepare_articles(df: pd.DataFrame) -> pd.DataFrame:
+    df['combined_text'] = (
+        df['title'].fillna('') + ' ' +
+        df['subtitle'].fillna('') + ' ' +
+        df['text'].fillna('') + ' ' +
+        df['keywords'].fillna('')
+    )
+
+    df['claps'] = pd.to_numeric(df['claps'], errors='coerce').fillna(0)
+    df['combined_text'] = df['combined_text'].fillna('')
+    return df
+
+
+@contextmanager
+def replacing(path: str) -> Iterator[str]:
+    tmp_path = path + '.tmp'
+    yield tmp_path
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def timed(timings: Optional[Dict[str, float]], stage: str) -> Iterator[None]:
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+
+def corpus_version(articles: pd.DataFrame) -> str:
+    hashes = pd.util.hash_pandas_object(articles.reindex(columns=SEARCH_COLUMNS + FACET_COLUMNS),
+                                        index=False).to_numpy()
+    return hashlib.sha1(hashes.tobytes()).hexdigest()[:16]
+
+
+def make_vectorizer() -> TfidfVectorizer:
+    return TfidfVectorizer(**VECTORIZER_PARAMS)
+
+
+def fitted_vectorizer(params: Dict, vocabulary: Dict[str, int], idf: np.ndarray) -> TfidfVectorizer:
+    vectorizer = TfidfVectorizer(**params)
+    vectorizer.vocabulary_ = vocabulary
+    vectorizer.idf_ = idf
+    return vectorizer
+
+
+def smooth_idf(documents: int, document_frequency: np.ndarray) -> np.ndarray:
+    return np.log((1 + documents) / (1 + document_frequency)) + 1
+
+
+def top_by_claps(doc_ids: np.ndarray, similarities: np.ndarray, claps: np.ndarray,
+                 top_n: int) -> Tuple[np.ndarray, np.ndarray]:
+    doc_claps = claps[doc_ids]
+    if 0 <= top_n < len(doc_ids):
+        if top_n == 0:
+            return doc_ids[:0], similarities[:0]
+        threshold = np.partition(doc_claps, len(doc_claps) - top_n)[len(doc_claps) - top_n]
+        keep = doc_claps >= threshold
+        doc_ids, similarities, doc_claps = doc_ids[keep], similarities[keep], doc_claps[keep]
+    order = np.lexsort((doc_ids, -similarities, -doc_claps))[:top_n]
+    return doc_ids[order], similarities[order]
+
+
+class SearchIndex:
+    def __init__(self, vectorizer: TfidfVectorizer, tfidf_matrix: sparse.csr_matrix, store: DocumentStore,
+                 build_seconds: float = 0.0, source: str = '', postings: Optional[sparse.csc_matrix] = None,
+                 version: Optional[str] = None, keyword_index: Optional[KeywordIndex] = None,
+                 idf_documents: Optional[int] = None, ann: Optional[AnnIndex] = None,
+                 bm25: Optional[Bm25Index] = None):
+        self.vectorizer = vectorizer
+        self.tfidf_matrix = tfidf_matrix
+        self.store = store
+        self.build_seconds = build_seconds
+        self.source = source
+        self.version = version or corpus_version(store.frame(SEARCH_COLUMNS + FACET_COLUMNS))
+        self.posting_segments = [(0, postings if postings is not None else tfidf_matrix.tocsc())]
+        self.claps = store.claps
+        self.claps_thresholds, claps_rank = np.unique(-self.claps, return_inverse=True)
+        self.claps_buckets = claps_rank.reshape(-1) * CLAPS_BUCKETS // max(len(self.claps_thresholds), 1)
+        self.urls = store['url']
+        self.titles = store['title']
+        self._keyword_index = keyword_index
+        self.keyword_lock = threading.Lock()
+        self.facets = FacetIndex(store.author_ids, store.author_lookup, len(store.authors),
+                                 {'claps': self.claps, **store.numeric})
+        self.idf_documents = idf_documents or tfidf_matrix.shape[0]
+        self.ann = ann
+        self.ann_lock = threading.Lock()
+        self.bm25 = bm25
+        self.bm25_lock = threading.Lock()
+        self.claps_log_max = float(log_claps(self.claps).max()) if len(self.claps) else 0.0
+        self.claps_score = claps_scores(self.claps, self.claps_log_max)
+        self._term_counter = None
+        self._buffers: Dict[str, AppendBuffer] = {}
+
+    @property
+    def postings(self) -> sparse.csc_matrix:
+        if len(self.posting_segments) > 1:
+            self.posting_segments = [(0, merge_postings(self.posting_segments))]
+        return self.posting_segments[0][1]
+
+    @property
+    def keyword_index(self) -> KeywordIndex:
+        return self.ensure_keyword_index()
+
+    def ensure_keyword_index(self) -> KeywordIndex:
+        with self.keyword_lock:
+            if self._keyword_index is None:
+                start = time.perf_counter()
+                self._keyword_index = KeywordIndex(self.store.columns, PHRASE_COLUMNS, WORD_COLUMNS)
+                logger.info(f"Built keyword index for {len(self.store)} articles "
+                            f"in {time.perf_counter() - start:.2f}s")
+        return self._keyword_index
+
+    @classmethod
+    def from_articles(cls, articles: pd.DataFrame, source: str = '') -> 'SearchIndex':
+        start = time.perf_counter()
+        articles = prepare_articles(articles)
+        vectorizer = make_vectorizer()
+        tfidf_matrix = vectorizer.fit_transform(articles['combined_text'])
+        return cls(vectorizer, tfidf_matrix, DocumentStore.from_frame(articles), time.perf_counter() - start,
+                   source, version=corpus_version(articles))
+
+    @classmethod
+    def from_file(cls, path: str, keyword_index: bool = True) -> 'SearchIndex':
+        articles = read_articles(path, SEARCH_COLUMNS + FACET_COLUMNS)
+        logger.info(f"Loaded {len(articles)} articles from {path}")
+        index = cls.from_articles(articles, path)
+        if keyword_index:
+            index.ensure_keyword_index()
+        return index
+
+    def save(self, index_dir: str) -> None:
+        os.makedirs(index_dir, exist_ok=True)
+        matrix = self.tfidf_matrix.tocsr()
+        arrays = {
+            'data.npy': matrix.data,
+            'indices.npy': matrix.indices,
+            'indptr.npy': matrix.indptr,
+            'postings_data.npy': self.postings.data,
+            'postings_docs.npy': self.postings.indices,
+            'postings_indptr.npy': self.postings.indptr,
+            'idf.npy': self.vectorizer.idf_,
+            **self.keyword_index.arrays(),
+            **(self.ann.arrays() if self.ann is not None else {}),
+            **(self.bm25.arrays() if self.bm25 is not None else {}),
+            **self.store.arrays()
+        }
+        for name, array in arrays.items():
+            with replacing(os.path.join(index_dir, name)) as tmp_path, open(tmp_path, 'wb') as f:
+                np.save(f, array)
+        with replacing(os.path.join(index_dir, 'vocabulary.json')) as tmp_path, \
+                open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({term: int(i) for term, i in self.vectorizer.vocabulary_.items()}, f)
+        meta = {
+            'shape': list(matrix.shape),
+            'vectorizer': {**VECTORIZER_PARAMS, 'ngram_range': list(VECTORIZER_PARAMS['ngram_range'])},
+            'build_seconds': self.build_seconds,
+            'source': self.source,
+            'version': self.version,
+            'idf_documents': self.idf_documents,
+            'keyword': self.keyword_index.stats(),
+            'ann': self.ann.stats() if self.ann is not None else None,
+            'bm25': self.bm25.stats() if self.bm25 is not None else None,
+            'built_at': time.time()
+        }
+        with replacing(os.path.join(index_dir, 'meta.json')) as tmp_path, open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(cls, index_dir: str, mmap: bool = True) -> 'SearchIndex':
+        start = time.perf_counter()
+        mmap_mode = 'r' if mmap else None
+        with open(os.path.join(index_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(os.path.join(index_dir, 'vocabulary.json'), 'r', encoding='utf-8') as f:
+            vocabulary = json.load(f)
+
+        params = dict(meta['vectorizer'])
+        params['ngram_range'] = tuple(params['ngram_range'])
+        vectorizer = fitted_vectorizer(params, vocabulary, np.load(os.path.join(index_dir, 'idf.npy')))
+
+        tfidf_matrix = sparse.csr_matrix((
+            np.load(os.path.join(index_dir, 'data.npy'), mmap_mode=mmap_mode),
+            np.load(os.path.join(index_dir, 'indices.npy'), mmap_mode=mmap_mode),
+            np.load(os.path.join(index_dir, 'indptr.npy'), mmap_mode=mmap_mode)
+        ), shape=tuple(meta['shape']), copy=False)
+        postings = None
+        if os.path.exists(os.path.join(index_dir, 'postings_indptr.npy')):
+            postings = sparse.csc_matrix((
+                np.load(os.path.join(index_dir, 'postings_data.npy'), mmap_mode=mmap_mode),
+                np.load(os.path.join(index_dir, 'postings_docs.npy'), mmap_mode=mmap_mode),
+                np.load(os.path.join(index_dir, 'postings_indptr.npy'), mmap_mode=mmap_mode)
+            ), shape=tuple(meta['shape']), copy=False)
+
+        ann = None
+        if meta.get('ann'):
+            ann = AnnIndex.load(index_dir, mmap_mode, meta['ann']['nprobe'])
+        bm25 = None
+        if meta.get('bm25'):
+            idf_path = os.path.join(index_dir, BM25_IDF_FILE)
+            bm25 = Bm25Index.from_arrays(
+                [np.load(os.path.join(index_dir, name), mmap_mode=mmap_mode) for name in BM25_FILES],
+                tuple(meta['shape']), meta['bm25']['k1'], meta['bm25']['b'],
+                np.load(idf_path) if os.path.exists(idf_path) else None,
+                meta['bm25'].get('average_length'), meta['bm25'].get('total_length'),
+                meta['bm25'].get('scored_documents')
+            )
+
+        store = DocumentStore.load(index_dir, mmap_mode)
+        if store is None:
+            store = DocumentStore.from_frame(pd.read_parquet(os.path.join(index_dir, 'articles.parquet')))
+        keyword_index = None
+        if meta.get('keyword'):
+            keyword_index = KeywordIndex.load(index_dir, store.columns, PHRASE_COLUMNS, WORD_COLUMNS,
+                                              meta['keyword']['segments'], mmap_mode)
+        logger.info(f"Loaded index with {tfidf_matrix.shape[0]} articles from {index_dir} "
+                    f"in {time.perf_counter() - start:.2f}s")
+        return cls(vectorizer, tfidf_matrix, store, meta.get('build_seconds', 0.0), index_dir, postings,
+                   meta.get('version'), keyword_index, meta.get('idf_documents'), ann, bm25)
+
+    def allowed(self, filters: Optional[Dict]) -> Optional[np.ndarray]:
+        return self.facets.select(filters) if filters else None
+
+    def score(self, query: str, allowed: Optional[np.ndarray] = None,
+              timings: Optional[Dict[str, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        with timed(timings, 'vectorize'):
+            query_vector = self.vectorizer.transform([query])
+        norm = np.sqrt(query_vector.data @ query_vector.data)
+        if norm == 0 or (allowed is not None and len(allowed) == 0):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        with timed(timings, 'similarity'):
+            doc_ids, similarities = self.accumulate(query_vector, norm)
+            if allowed is not None:
+                keep = np.isin(doc_ids, allowed, assume_unique=True)
+                doc_ids, similarities = doc_ids[keep], similarities[keep]
+        return doc_ids, similarities
+
+    def accumulate(self, query_vector: sparse.csr_matrix, norm: float) -> Tuple[np.ndarray, np.ndarray]:
+        segments = self.posting_segments
+        doc_parts, weight_parts = [], []
+        for term, weight in zip(query_vector.indices, query_vector.data / norm):
+            for offset, postings in segments:
+                start, end = postings.indptr[term], postings.indptr[term + 1]
+                docs = postings.indices[start:end]
+                doc_parts.append(docs + offset if offset else docs)
+                weight_parts.append(postings.data[start:end] * weight)
+        docs, weights = np.concatenate(doc_parts), np.concatenate(weight_parts)
+        documents = self.tfidf_matrix.shape[0]
+        if len(docs) * DENSE_ACCUMULATE_RATIO > documents:
+            similarities = np.bincount(docs, weights=weights, minlength=documents)
+            doc_ids = np.flatnonzero(similarities > 0)
+            return doc_ids, similarities[doc_ids]
+        doc_ids, inverse = np.unique(docs, return_inverse=True)
+        similarities = np.bincount(inverse, weights=weights, minlength=len(doc_ids))
+        matched = similarities > 0
+        return doc_ids[matched].astype(np.int64), similarities[matched]
+
+    def results(self, doc_ids: np.ndarray, similarities: np.ndarray) -> List[Dict]:
+        return [
+            {
+                'url': self.urls[doc],
+                'title': self.titles[doc],
+                'claps': int(self.claps[doc]),
+                'similarity_score': float(similarity)
+            }
+            for doc, similarity in zip(doc_ids.tolist(), similarities.tolist())
+        ]
+
+    def document(self, url: str) -> Optional[Dict]:
+        doc = self.store.find(url)
+        return self.store.document(doc) if doc is not None else None
+
+    def fallback_top(self, query: str, top_n: int, allowed: Optional[np.ndarray] = None,
+                     timings: Optional[Dict[str, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        with timed(timings, 'fallback'):
+            doc_ids = self.keyword_index.search(query, allowed)
+        with timed(timings, 'topk'):
+            return top_by_claps(doc_ids, np.full(len(doc_ids), FALLBACK_SIMILARITY), self.claps, top_n)
+
+    def fallback(self, query: str, top_n: int, allowed: Optional[np.ndarray] = None,
+                 timings: Optional[Dict[str, float]] = None) -> List[Dict]:
+        return self.results(*self.fallback_top(query, top_n, allowed, timings))
+
+    def top(self, query: str, top_n: int = 10, fallback: bool = True, filters: Optional[Dict] = None,
+            timings: Optional[Dict[str, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        with timed(timings, 'filter'):
+            allowed = self.allowed(filters)
+        doc_ids, similarities = self.score(query, allowed, timings)
+        if len(doc_ids) == 0 and fallback:
+            return self.fallback_top(query, top_n, allowed, timings)
+        with timed(timings, 'topk'):
+            return top_by_claps(doc_ids, similarities, self.claps, top_n)
+
+    def search(self, query: str, top_n: int = 10, filters: Optional[Dict] = None,
+               timings: Optional[Dict[str, float]] = None) -> List[Dict]:
+        return self.results(*self.top(query, top_n, filters=filters, timings=timings))
+
+    def search_batch(self, queries: List[str], top_ns: List[int]) -> List[List[Dict]]:
+        return [self.results(*top) for top in self.top_batch(queries, top_ns)]
+
+    def top_batch(self, queries: List[str], top_ns: List[int],
+                  fallback: bool = True) -> List[Tuple[np.ndarray, np.ndarray]]:
+        query_matrix = self.vectorizer.transform(queries)
+        scores = sparse.hstack([query_matrix @ postings.T for _, postings in self.posting_segments], format='csr')
+        scores.eliminate_zeros()
+        counts = np.diff(scores.indptr)
+        limits = np.array(top_ns, dtype=np.int64)
+        limits = np.where(limits < 0, np.maximum(counts + limits, 0), limits)
+
+        rows = np.repeat(np.arange(len(queries)), counts)
+        buckets = self.claps_buckets[scores.indices]
+        histogram = np.bincount(rows * CLAPS_BUCKETS + buckets, minlength=len(queries) * CLAPS_BUCKETS)
+        cutoff = (histogram.reshape(len(queries), CLAPS_BUCKETS).cumsum(axis=1) < limits[:, None]).sum(axis=1)
+        candidates = np.flatnonzero(buckets <= cutoff[rows])
+
+        rows = rows[candidates]
+        doc_ids, similarities = scores.indices[candidates].astype(np.int64), scores.data[candidates]
+        order = np.lexsort((doc_ids, -similarities, -self.claps[doc_ids], rows))
+        starts = np.searchsorted(rows, np.arange(len(queries) + 1))
+        rank = np.arange(len(order)) - starts[rows[order]]
+        keep = order[rank < limits[rows[order]]]
+        bounds = np.searchsorted(rows[keep], np.arange(len(queries) + 1))
+
+        batch = []
+        for row, (query, top_n) in enumerate(zip(queries, top_ns)):
+            if counts[row] == 0 and fallback:
+                batch.append(self.fallback_top(query, top_n))
+                continue
+            selected = keep[bounds[row]:bounds[row + 1]]
+            batch.append((doc_ids[selected], similarities[selected]))
+        return batch
+
+    def nearest(self, query: str, k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        doc_ids, similarities = self.score(query)
+        order = np.lexsort((doc_ids, -similarities))[:k]
+        return doc_ids[order], similarities[order]
+
+    def ensure_ann(self, dimensions: int = 128, lists: int = 0, nprobe: int = 8) -> AnnIndex:
+        with self.ann_lock:
+            if self.ann is None:
+                self.ann = AnnIndex.build(self.tfidf_matrix, dimensions, lists, nprobe)
+        return self.ann
+
+    def ann_nearest(self, query: str, k: int = 10, nprobe: Optional[int] = None,
+                    rerank: int = ANN_RERANK) -> Tuple[np.ndarray, np.ndarray]:
+        query_vector = self.vectorizer.transform([query])
+        doc_ids, _ = self.ensure_ann().search(query_vector, k * max(rerank, 1), nprobe)
+        similarities = (self.tfidf_matrix[doc_ids] @ query_vector.T).toarray().ravel()
+        matched = similarities > 0
+        doc_ids, similarities = doc_ids[matched], similarities[matched]
+        order = np.lexsort((doc_ids, -similarities))[:k]
+        return doc_ids[order], similarities[order]
+
+    def search_ann(self, query: str, top_n: int = 10, nprobe: Optional[int] = None,
+                   rerank: int = ANN_RERANK, timings: Optional[Dict[str, float]] = None) -> List[Dict]:
+        if top_n <= 0:
+            return []
+        with timed(timings, 'similarity'):
+            doc_ids, similarities = self.ann_nearest(query, top_n, nprobe, rerank)
+        if len(doc_ids) == 0:
+            return self.fallback(query, top_n, timings=timings)
+        return self.results(doc_ids, similarities)
+
+    @property
+    def term_counter(self):
+        if self._term_counter is None:
+            self._term_counter = count_vectorizer(self.vectorizer.vocabulary_, self.vectorizer.get_params())
+        return self._term_counter
+
+    def ensure_bm25(self, k1: float = 1.2, b: float = 0.75) -> Bm25Index:
+        with self.bm25_lock:
+            if self.bm25 is None:
+                counts = self.term_counter.transform(self.store.combined_texts())
+                self.bm25 = Bm25Index.from_counts(counts, k1, b)
+        return self.bm25
+
+    def search_bm25(self, query: str, top_n: int = 10, claps_weight: float = BM25_CLAPS_WEIGHT,
+                    filters: Optional[Dict] = None, timings: Optional[Dict[str, float]] = None) -> List[Dict]:
+        with timed(timings, 'filter'):
+            allowed = self.allowed(filters)
+        bm25 = self.ensure_bm25()
+        with timed(timings, 'vectorize'):
+            query_counts = self.term_counter.transform([query])
+        with timed(timings, 'similarity'):
+            doc_ids, relevance = bm25.score(query_counts)
+            if allowed is not None:
+                keep = np.isin(doc_ids, allowed, assume_unique=True)
+                doc_ids, relevance = doc_ids[keep], relevance[keep]
+        if len(doc_ids) == 0:
+            return self.fallback(query, top_n, allowed, timings)
+        with timed(timings, 'topk'):
+            doc_ids, relevance, blended = blend_top(doc_ids, relevance, self.claps_score, claps_weight, top_n)
+        results = self.results(doc_ids, relevance)
+        for result, score in zip(results, blended.tolist()):
+            result['rank_score'] = score
+        return results
+
+    def idf_is_stale(self) -> bool:
+        return self.tfidf_matrix.shape[0] - self.idf_documents > self.idf_documents * IDF_REFRESH_RATIO
+
+    def ingest(self, new_articles: pd.DataFrame, refresh_idf: Optional[bool] = None) -> 'SearchIndex':
+        start = time.perf_counter()
+        new_articles = prepare_articles(
+            new_articles.reindex(columns=SEARCH_COLUMNS + FACET_COLUMNS).reset_index(drop=True)
+        )
+        rows = self.vectorizer.transform(new_articles['combined_text'])
+        store = self.store.append(DocumentStore.from_frame(new_articles))
+        matrix, new_claps = self.tfidf_matrix, store.claps[len(self.store):]
+        buckets = np.searchsorted(self.claps_thresholds, -new_claps) * CLAPS_BUCKETS \
+            // max(len(self.claps_thresholds), 1)
+        log_max = max(self.claps_log_max, float(log_claps(new_claps).max()) if len(new_claps) else 0.0)
+        pieces = {
+            'data': (matrix.data, rows.data),
+            'indices': (matrix.indices, rows.indices),
+            'indptr': (matrix.indptr, rows.indptr[1:].astype(np.int64) + matrix.nnz),
+            'claps_buckets': (self.claps_buckets, np.minimum(buckets, CLAPS_BUCKETS - 1))
+        }
+        if log_max == self.claps_log_max:
+            pieces['claps_score'] = (self.claps_score, claps_scores(new_claps, log_max))
+        buffers = {name: grow(self._buffers.get(name), values, new) for name, (values, new) in pieces.items()}
+
+        segments = self.posting_segments + [(len(self.store), rows.tocsc())]
+        if len(segments) > MAX_POSTING_SEGMENTS:
+            segments = [segments[0], (segments[1][0], merge_postings(segments[1:]))]
+
+        index = copy.copy(self)
+        index.tfidf_matrix = sparse.csr_matrix(
+            (buffers['data'].values, buffers['indices'].values, buffers['indptr'].values),
+            shape=(len(store), matrix.shape[1]), copy=False
+        )
+        index.store = store
+        index.version = hashlib.sha1((self.version + corpus_version(new_articles)).encode('utf-8')).hexdigest()[:16]
+        index.posting_segments = segments
+        index.claps = store.claps
+        index.claps_buckets = buffers['claps_buckets'].values
+        index.claps_log_max = log_max
+        index.claps_score = buffers['claps_score'].values if 'claps_score' in buffers \
+            else claps_scores(store.claps, log_max)
+        index.urls = store['url']
+        index.titles = store['title']
+        index._keyword_index = self._keyword_index.extend(store.columns, len(self.store)) \
+            if self._keyword_index is not None else None
+        index.keyword_lock = threading.Lock()
+        index.facets = self.facets.extend(store.author_ids, store.author_lookup, len(store.authors),
+                                          {'claps': store.claps, **store.numeric}, len(self.store))
+        index.ann = self.ann.extend(rows) if self.ann is not None else None
+        index.ann_lock = threading.Lock()
+        index.bm25 = self.bm25.extend(self.term_counter.transform(new_articles['combined_text'])) \
+            if self.bm25 is not None else None
+        index.bm25_lock = threading.Lock()
+        index._buffers = buffers
+        if refresh_idf or (refresh_idf is None and index.idf_is_stale()):
+            index = index.refresh_idf()
+        logger.info(f"Ingested {len(new_articles)} articles in {time.perf_counter() - start:.2f}s "
+                    f"({index.tfidf_matrix.shape[0]} total)")
+        return index
+
+    def refresh_idf(self) -> 'SearchIndex':
+        documents = self.tfidf_matrix.shape[0]
+        idf = smooth_idf(documents, sum(np.diff(postings.indptr) for _, postings in self.posting_segments))
+        matrix = self.tfidf_matrix.tocsr()
+        data = matrix.data * (idf / self.vectorizer.idf_)[matrix.indices]
+        rows = np.repeat(np.arange(documents), np.diff(matrix.indptr))
+        norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=documents))
+        data /= norms[rows]
+        matrix = sparse.csr_matrix((data, matrix.indices, matrix.indptr), shape=matrix.shape)
+        vectorizer = fitted_vectorizer(self.vectorizer.get_params(), self.vectorizer.vocabulary_, idf)
+        version = hashlib.sha1(f'{self.version}:idf:{documents}'.encode('utf-8')).hexdigest()[:16]
+        ann = self.ann.reembed(matrix) if self.ann is not None else None
+        return SearchIndex(vectorizer, matrix, self.store, self.build_seconds, self.source, matrix.tocsc(),
+                           version, self._keyword_index, documents, ann,
+                           self.bm25.refresh() if self.bm25 is not None else None)
+
+    def nbytes(self) -> int:
+        arrays = [self.tfidf_matrix.data, self.tfidf_matrix.indices, self.tfidf_matrix.indptr,
+                  *self.store.arrays().values()]
+        for _, postings in self.posting_segments:
+            arrays.extend((postings.data, postings.indices, postings.indptr))
+        if self.ann is not None:
+            arrays.extend(self.ann.arrays().values())
+        if self._keyword_index is not None:
+            arrays.extend(self._keyword_index.arrays().values())
+        return int(sum(array.nbytes for array in arrays)) + (self.bm25.nbytes() if self.bm25 is not None else 0)
+
+    def stats(self) -> Dict:
+        matrix = self.tfidf_matrix
+        return {
+            'articles': int(matrix.shape[0]),
+            'terms': int(matrix.shape[1]),
+            'nnz': int(matrix.nnz),
+            'bytes': self.nbytes(),
+            'version': self.version,
+            'ann': self.ann.stats() if self.ann is not None else None,
+            'bm25': self.bm25.stats() if self.bm25 is not None else None,
+            'build_seconds': round(self.build_seconds, 3)
+        }
+
+
+def build_index(input_file: str, index_dir: str, ann_dimensions: int = 0, ann_lists: int = 0,
+                ann_nprobe: int = 8, shards: int = 1, bm25: bool = False) -> SearchIndex:
+    index = SearchIndex.from_file(input_file, keyword_index=shards <= 1)
+    if shards > 1:
+        from sharded_index import ShardedIndex
+
+        if ann_dimensions > 0:
+            logger.warning("ANN indexes are not built for sharded indexes")
+        ShardedIndex.from_index(index, shards).save(index_dir)
+        logger.info(f"Saved {shards} shards for {index.tfidf_matrix.shape[0]} articles to {index_dir}")
+        return index
+
+    if ann_dimensions > 0:
+        index.ensure_ann(ann_dimensions, ann_lists, ann_nprobe)
+    if bm25:
+        index.ensure_bm25()
+    index.save(index_dir)
+    if os.path.exists(os.path.join(index_dir, SHARDS_FILE)):
+        os.remove(os.path.join(index_dir, SHARDS_FILE))
+    logger.info(f"Saved index for {index.tfidf_matrix.shape[0]} articles to {index_dir} "
+                f"(fit took {index.build_seconds:.2f}s)")
+    return index
+
+
+def ingest_articles(index_dir: str, input_file: str, refresh_idf: Optional[bool] = None) -> SearchIndex:
+    if os.path.exists(os.path.join(index_dir, SHARDS_FILE)):
+        raise ValueError(f"{index_dir} is sharded; rebuild it with build-index --shards instead")
+    index = SearchIndex.load(index_dir).ingest(read_articles(input_file, SEARCH_COLUMNS + FACET_COLUMNS),
+                                               refresh_idf)
+    index.save(index_dir)
+    logger.info(f"Saved index for {index.tfidf_matrix.shape[0]} articles to {index_dir}")
+    return index
+
+
+if __name__ == '__main__':
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description='Search index tools')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build-index', help='Fit the TF-IDF index offline and save it to disk')
+    build_parser.add_argument('--input', type=str, default=os.environ.get('CSV_FILE', 'scrapping_results.csv'),
+                              help='Scraped articles (CSV file or .parquet dataset)')
+    build_parser.add_argument('--output', type=str, default=os.environ.get('INDEX_DIR', 'search_index'),
+                              help='Directory for the index artifact')
+    build_parser.add_argument('--ann-dimensions', type=int, default=0,
+                              help='Also build the ANN index with this many SVD dimensions (0 = skip)')
+    build_parser.add_argument('--ann-lists', type=int, default=0,
+                              help='IVF lists for the ANN index (0 = sqrt of the article count)')
+    build_parser.add_argument('--ann-nprobe', type=int, default=8,
+                              help='Default number of lists probed per ANN query')
+    build_parser.add_argument('--shards', type=int, default=1,
+                              help='Split the index into this many shards searched in parallel')
+    build_parser.add_argument('--bm25', action='store_true',
+                              help='Also precompute the BM25 weights used by rank=bm25')
+
+    ingest_parser = subparsers.add_parser('ingest', help='Append newly scraped articles to a saved index')
+    ingest_parser.add_argument('--index', type=str, default=os.environ.get('INDEX_DIR', 'search_index'),
+                               help='Directory of the index artifact to update')
+    ingest_parser.add_argument('--input', type=str, required=True,
+                               help='New articles (CSV file or .parquet dataset)')
+    ingest_parser.add_argument('--refresh-idf', action='store_true',
+                               help='Recompute IDF weights now instead of when they go stale')
+
+    args = parser.parse_args()
+
+    if args.command == 'build-index':
+        build_index(args.input, args.output, args.ann_dimensions, args.ann_lists, args.ann_nprobe, args.shards,
+                    args.bm25)
+    elif args.command == 'ingest':
+        ingest_articles(args.index, args.input, args.refresh_idf or None)
@@ -0,0 +1,68 @@
+import os
+import resource
+from typing import Dict, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+REQUEST_SECONDS = Histogram('search_api_request_seconds', 'Request latency by endpoint', ['endpoint'],
+                            buckets=LATENCY_BUCKETS)
+REQUESTS = Counter('search_api_requests', 'Requests by endpoint and outcome', ['endpoint', 'outcome'])
+STAGE_SECONDS = Histogram('search_stage_seconds', 'Search latency by stage', ['stage'], buckets=LATENCY_BUCKETS)
+INDEX_ARTICLES = Gauge('search_index_articles', 'Articles in the serving index', multiprocess_mode='livemostrecent')
+INDEX_TERMS = Gauge('search_index_terms', 'Vocabulary size of the serving index', multiprocess_mode='livemostrecent')
+INDEX_NNZ = Gauge('search_index_nnz', 'Non-zero TF-IDF weights in the serving index',
+                  multiprocess_mode='livemostrecent')
+INDEX_BYTES = Gauge('search_index_bytes', 'Array bytes of the serving index (mmapped pages included)',
+                    multiprocess_mode='livemostrecent')
+INDEX_BUILD_SECONDS = Gauge('search_index_build_seconds', 'Time taken to fit the serving index',
+                            multiprocess_mode='livemostrecent')
+RESIDENT_MEMORY = Gauge('search_api_resident_memory_bytes', 'Resident set size of each worker',
+                        multiprocess_mode='liveall')
+
+
+def resident_memory_bytes() -> int:
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def outcome_for(status_code: int) -> str:
+    if status_code >= 500:
+        return 'error'
+    if status_code >= 400:
+        return 'client_error'
+    return 'ok'
+
+
+def observe_request(endpoint: str, outcome: str, seconds: float) -> None:
+    REQUEST_SECONDS.labels(endpoint).observe(seconds)
+    REQUESTS.labels(endpoint, outcome).inc()
+    RESIDENT_MEMORY.set(resident_memory_bytes())
+
+
+def observe_stages(timings: Dict[str, float]) -> None:
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.labels(stage).observe(seconds)
+
+
+def set_index_stats(stats: Dict) -> None:
+    INDEX_ARTICLES.set(stats['articles'])
+    INDEX_TERMS.set(stats['terms'])
+    INDEX_NNZ.set(stats['nnz'])
+    INDEX_BYTES.set(stats['bytes'])
+    INDEX_BUILD_SECONDS.set(stats['build_seconds'])
+
+
+def render() -> Tuple[bytes, str]:
+    RESIDENT_MEMORY.set(resident_memory_bytes())
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,165 @@
+import heapq
+import itertools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from keyword_index import fallback_words, restrict
+from search_index import FALLBACK_SIMILARITY, SHARDS_FILE, SearchIndex, replacing, timed, top_by_claps
+
+logger = logging.getLogger(__name__)
+
+Top = Tuple[np.ndarray, np.ndarray]
+
+
+def shard_limit(shard: SearchIndex, top_n: int) -> int:
+    return top_n if top_n >= 0 else len(shard.claps)
+
+
+class ShardedIndex:
+    def __init__(self, shards: List[SearchIndex], version: str, workers: Optional[int] = None, source: str = ''):
+        self.shards = shards
+        self.version = version
+        self.source = source
+        self.vectorizer = shards[0].vectorizer
+        self.offsets = np.concatenate(([0], np.cumsum([len(shard.claps) for shard in shards])))
+        self.executor = ThreadPoolExecutor(max_workers=workers or len(shards), thread_name_prefix='shard')
+
+    @classmethod
+    def from_index(cls, index: SearchIndex, count: int, workers: Optional[int] = None) -> 'ShardedIndex':
+        bounds = np.linspace(0, index.tfidf_matrix.shape[0], count + 1).astype(int)
+        shards = [
+            SearchIndex(index.vectorizer, index.tfidf_matrix[start:end], index.store.slice(start, end),
+                        index.build_seconds, index.source, version=f'{index.version}-{i}',
+                        idf_documents=index.idf_documents)
+            for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:]))
+        ]
+        logger.info(f"Split index of {index.tfidf_matrix.shape[0]} articles into {count} shards")
+        return cls(shards, index.version, workers, index.source)
+
+    def _gather(self, work: Callable[[SearchIndex], object]) -> List:
+        return list(self.executor.map(work, self.shards))
+
+    def merge(self, tops: List[Top], top_n: int) -> Top:
+        streams = [
+            zip((-shard.claps[doc_ids]).tolist(), (-similarities).tolist(), (doc_ids + offset).tolist())
+            for shard, offset, (doc_ids, similarities) in zip(self.shards, self.offsets.tolist(), tops)
+        ]
+        merged = heapq.merge(*streams)
+        keys = list(itertools.islice(merged, top_n)) if top_n >= 0 else list(merged)[:top_n]
+        return (np.array([key[2] for key in keys], dtype=np.int64),
+                np.array([-key[1] for key in keys], dtype=np.float64))
+
+    def results(self, doc_ids: np.ndarray, similarities: np.ndarray) -> List[Dict]:
+        shard_ids = np.searchsorted(self.offsets, doc_ids, side='right') - 1
+        results: List[Optional[Dict]] = [None] * len(doc_ids)
+        for shard_id in np.unique(shard_ids).tolist():
+            positions = np.flatnonzero(shard_ids == shard_id)
+            shard = self.shards[shard_id]
+            shard_results = shard.results(doc_ids[positions] - self.offsets[shard_id], similarities[positions])
+            for position, result in zip(positions.tolist(), shard_results):
+                results[position] = result
+        return results
+
+    def fallback_tops(self, query: str, top_n: int,
+                      alloweds: Optional[List[Optional[np.ndarray]]] = None) -> List[Top]:
+        query_lower = query.lower()
+        alloweds = alloweds or [None] * len(self.shards)
+
+        def matching(find: Callable[[SearchIndex], np.ndarray]) -> List[np.ndarray]:
+            return [restrict(doc_ids, allowed) for doc_ids, allowed in zip(self._gather(find), alloweds)]
+
+        matches = matching(lambda shard: shard.keyword_index.phrase_matches(query_lower))
+        if not any(len(doc_ids) for doc_ids in matches):
+            for word in fallback_words(query_lower):
+                matches = matching(lambda shard: shard.keyword_index.word_matches(word))
+                if any(len(doc_ids) for doc_ids in matches):
+                    break
+        return [
+            top_by_claps(doc_ids, np.full(len(doc_ids), FALLBACK_SIMILARITY), shard.claps, shard_limit(shard, top_n))
+            for shard, doc_ids in zip(self.shards, matches)
+        ]
+
+    def top(self, query: str, top_n: int = 10, fallback: bool = True, filters: Optional[Dict] = None,
+            timings: Optional[Dict[str, float]] = None) -> Top:
+        def filtered_top(shard: SearchIndex) -> Tuple[Optional[np.ndarray], Top]:
+            allowed = shard.allowed(filters)
+            return allowed, top_by_claps(*shard.score(query, allowed), shard.claps, shard_limit(shard, top_n))
+
+        with timed(timings, 'similarity'):
+            alloweds, tops = zip(*self._gather(filtered_top))
+        if not any(len(doc_ids) for doc_ids, _ in tops) and fallback:
+            with timed(timings, 'fallback'):
+                tops = self.fallback_tops(query, top_n, alloweds)
+        with timed(timings, 'topk'):
+            return self.merge(tops, top_n)
+
+    def search(self, query: str, top_n: int = 10, filters: Optional[Dict] = None,
+               timings: Optional[Dict[str, float]] = None) -> List[Dict]:
+        return self.results(*self.top(query, top_n, filters=filters, timings=timings))
+
+    def search_batch(self, queries: List[str], top_ns: List[int]) -> List[List[Dict]]:
+        per_shard = self._gather(
+            lambda shard: shard.top_batch(queries, [shard_limit(shard, top_n) for top_n in top_ns], fallback=False)
+        )
+        batch = []
+        for row, (query, top_n) in enumerate(zip(queries, top_ns)):
+            tops = [shard_tops[row] for shard_tops in per_shard]
+            if not any(len(doc_ids) for doc_ids, _ in tops):
+                tops = self.fallback_tops(query, top_n)
+            batch.append(self.results(*self.merge(tops, top_n)))
+        return batch
+
+    def document(self, url: str) -> Optional[Dict]:
+        for document in self._gather(lambda shard: shard.document(url)):
+            if document is not None:
+                return document
+        return None
+
+    def save(self, index_dir: str) -> None:
+        os.makedirs(index_dir, exist_ok=True)
+        for i, shard in enumerate(self.shards):
+            shard.save(os.path.join(index_dir, f'shard-{i:03d}'))
+        meta = {
+            'shards': len(self.shards),
+            'version': self.version,
+            'source': self.source,
+            'built_at': time.time()
+        }
+        with replacing(os.path.join(index_dir, SHARDS_FILE)) as tmp_path, open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(cls, index_dir: str, mmap: bool = True, workers: Optional[int] = None) -> 'ShardedIndex':
+        with open(os.path.join(index_dir, SHARDS_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        shards = [SearchIndex.load(os.path.join(index_dir, f'shard-{i:03d}'), mmap) for i in range(meta['shards'])]
+        return cls(shards, meta['version'], workers, index_dir)
+
+    def stats(self) -> Dict:
+        shard_stats = [shard.stats() for shard in self.shards]
+        return {
+            'articles': sum(stats['articles'] for stats in shard_stats),
+            'terms': shard_stats[0]['terms'],
+            'nnz': sum(stats['nnz'] for stats in shard_stats),
+            'bytes': sum(stats['bytes'] for stats in shard_stats),
+            'version': self.version,
+            'shards': [stats['articles'] for stats in shard_stats],
+            'build_seconds': shard_stats[0]['build_seconds']
+        }
+
+
+def index_marker(index_dir: str) -> str:
+    sharded = os.path.join(index_dir, SHARDS_FILE)
+    return sharded if os.path.exists(sharded) else os.path.join(index_dir, 'meta.json')
+
+
+def load_search_index(index_dir: str, mmap: bool = True) -> Union[SearchIndex, ShardedIndex]:
+    if os.path.exists(os.path.join(index_dir, SHARDS_FILE)):
+        return ShardedIndex.load(index_dir, mmap)
+    return SearchIndex.load(index_dir, mmap)
@@ -0,0 +1,153 @@
+import json
+import os
+import tempfile
+
+from lxml_extractor import extract_article_lxml, scale_claps
+from medium_scraper import MediumScraper, parse_article_timed
+from scrape_telemetry import LatencyHistogram, ScrapeTelemetry
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'pages')
+FIXTURE_URL = 'https://medium.com/@writer/fixture-article-1a2b3c4d5e6f'
+
+EDGE_CASES = {
+    'comment_reading_time': b'<html><body><!-- 4 min read --><article><p>Body</p></article><p>9 min read</p></body></html>',
+    'script_reading_time': b'<html><head><script>var t = "3 min read";</script></head><body><p>8 min read</p></body></html>',
+    'header_dropped': b'<html><body><article><header><span>6 min read</span><button class="clap">5K</button></header><p>Text</p></article><span>2 min read</span></body></html>',
+    'nested_script_text': b'<html><body><h1>Title<script>ignored()</script> Part<!-- hidden --></h1><div class="content"><p>a<style>p{}</style>b</p></div></body></html>',
+    'reading_div': b'<html><body><div class="read-time">\n 11 \n minutes</div><div class="content"><p>words words words here</p></div></body></html>',
+    'data_action_claps': b'<html><body><button class="clap">no digits</button><button data-action="multivote-clap">42</button></body></html>',
+    'data_action_decimal_claps': b'<html><body><div class="clap">none</div><button data-action="multivote-clap">2.5K</button></body></html>',
+    'empty': b'',
+}
+
+TIMED_FIELDS = {'document', 'json_ld', 'title', 'subtitle', 'author', 'text', 'images', 'links', 'claps',
+                'reading_time', 'keywords'}
+
+
+def load_fixture_pages():
+    pages = {}
+    for name in sorted(os.listdir(FIXTURE_DIR)):
+        if name.endswith('.html'):
+            with open(os.path.join(FIXTURE_DIR, name), 'rb') as f:
+                pages[name] = f.read()
+    return pages
+
+
+def assert_parity(name, content, url=FIXTURE_URL):
+    expected = MediumScraper.parse_article(url, content)
+    actual = extract_article_lxml(url, content)
+    assert actual == expected, f"{name}: lxml extractor differs\nexpected={expected}\nactual={actual}"
+
+
+def test_fixture_pages_match_bs4():
+    pages = load_fixture_pages()
+    assert pages
+    for name, content in pages.items():
+        assert_parity(name, content)
+
+
+def test_fixture_pages_on_subdomain_url():
+    for name, content in load_fixture_pages().items():
+        assert_parity(name, content, 'https://samops.medium.com/scaling-postgres-9f8e7d6c5b4a')
+
+
+def test_edge_cases_match_bs4():
+    for name, content in EDGE_CASES.items():
+        assert_parity(name, content)
+
+
+def test_fixture_fields_extracted():
+    pages = load_fixture_pages()
+    result = extract_article_lxml(FIXTURE_URL, pages['jsonld_full.html'])
+    assert result['title'] == 'Understanding Vector Databases'
+    assert result['author_name'] == 'Ada Lovelace'
+    assert result['claps'] == 1200
+    assert result['reading_time'] == 7
+    assert result['num_images'] == 2
+    assert result['num_external_links'] == 2
+
+
+def test_scale_claps_decimal_suffixes():
+    cases = {'1.2K': 1200, '12K': 12000, '2.5k claps': 2500, '3.4M': 3400000, '1M': 1000000, '0.9K': 900,
+             '1,234': 1234, '42': 42, 'no digits': 0, '': 0}
+    for text, expected in cases.items():
+        assert scale_claps(text) == expected, text
+    result = extract_article_lxml(FIXTURE_URL, EDGE_CASES['data_action_decimal_claps'])
+    assert result['claps'] == 2500
+
+
+def test_field_timings_leave_results_unchanged():
+    content = load_fixture_pages()['jsonld_full.html']
+    for parser in ('bs4', 'fast'):
+        result, timings, seconds = parse_article_timed(FIXTURE_URL, content, parser)
+        assert result == MediumScraper.parse_article(FIXTURE_URL, content)
+        assert set(timings) == TIMED_FIELDS
+        assert all(value >= 0 for value in timings.values())
+        assert sum(timings.values()) <= seconds
+
+
+def test_latency_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.observe(ms / 1000)
+    assert abs(histogram.percentile(0.5) - 0.050) < 0.050 * 0.06
+    assert abs(histogram.percentile(0.95) - 0.095) < 0.095 * 0.06
+    assert histogram.percentile(1.0) == 0.1
+    assert LatencyHistogram().percentile(0.5) == 0.0
+
+
+def test_scrape_telemetry_report():
+    with tempfile.TemporaryDirectory() as tmp:
+        url_log = os.path.join(tmp, 'urls.jsonl')
+        telemetry = ScrapeTelemetry(report_interval=3600, url_log=url_log)
+        telemetry.record_fetch('https://a', 0.2, 200, 1000)
+        telemetry.record_parse('https://a', 0.01, {'text': 0.004, 'title': 0.001})
+        telemetry.record_result({'url': 'https://a'})
+        telemetry.record_fetch('https://b', 0.1, 200, 500, cached=True)
+        telemetry.record_parse('https://b', 0.02, {'text': 0.008}, failed=True)
+        telemetry.record_result({'url': 'https://b'})
+        telemetry.record_fetch('https://c', 30.0, None, 0, error='timeout')
+        telemetry.record_result({'url': 'https://c'})
+        telemetry.record_wait(1.5)
+        telemetry.close()
+
+        report = telemetry.write_report(os.path.join(tmp, 'report.json'))
+        with open(os.path.join(tmp, 'report.json'), 'r', encoding='utf-8') as f:
+            assert json.load(f) == report
+        assert report['urls'] == 3
+        assert report['bytes'] == 1500
+        assert report['cached_responses'] == 1
+        assert report['status_counts'] == {'200': 2, 'none': 1}
+        assert report['errors']['by_category'] == {'parse': 1, 'timeout': 1}
+        assert report['errors']['rate'] == round(2 / 3, 4)
+        assert report['stages']['fetch']['count'] == 3
+        assert report['stages']['wait']['total_seconds'] == 1.5
+        assert report['fields']['text']['count'] == 2
+
+        with open(url_log, 'r', encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        assert [line['url'] for line in lines] == ['https://a', 'https://b', 'https://c']
+        assert lines[1]['error'] == 'parse'
+        assert lines[2]['error'] == 'timeout'
+
+
+if __name__ == '__main__':
+    tests = [
+        test_fixture_pages_match_bs4,
+        test_fixture_pages_on_subdomain_url,
+        test_edge_cases_match_bs4,
+        test_fixture_fields_extracted,
+        test_scale_claps_decimal_suffixes,
+        test_field_timings_leave_results_unchanged,
+        test_latency_histogram_percentiles,
+        test_scrape_telemetry_report,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"{test.__name__}: ✓ PASSED")
+        except AssertionError as e:
+            failed += 1
+            print(f"{test.__name__}: ✗ FAILED\n{e}")
+    print(f"\nOverall: {'✓ ALL TESTS PASSED' if not failed else '✗ SOME TESTS FAILED'}")
@@ -0,0 +1,450 @@
+import os
+import sys
+import tempfile
+import time
+from email.utils import formatdate
+
+import pandas as pd
+import pyarrow.parquet as pq
+import requests
+
+from batch_scraper import batch_scrape
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks'))
+
+from crawl_engine import HostRateLimiter, TokenBucket, run_crawl
+from fixture_server import fixture_urls, start_server
+from http_cache import CachingAdapter, ResponseCache
+from medium_scraper import FIELDNAMES, INTEGER_FIELDS, MediumScraper, open_sink, parse_article_html
+from rss_harvester import RssHarvester
+from rss_to_articles import extract_urls_from_rss_feeds
+from scrape_ledger import DONE, FAILED, RETRYABLE, ScrapeLedger
+from scrape_pipeline import ScrapePipeline
+from search_index import read_articles
+from url_utils import BloomFilter, UrlDeduplicator, canonical_key, dedupe_urls, normalize_url
+
+
+def cached_session(cache):
+    session = requests.Session()
+    session.mount('http://', CachingAdapter(cache))
+    return session
+
+
+def fetched(server, path):
+    return [headers for seen, headers in server.requests_seen if seen == path]
+
+
+def rss_feed(posts):
+    items = ''.join(
+        f'<item><title>{slug}</title><link>{link}</link><guid>{slug}</guid>'
+        f'<pubDate>{formatdate(published, usegmt=True)}</pubDate></item>'
+        for slug, link, published in sorted(posts, key=lambda post: -post[2])
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>t</title>{items}</channel></rss>'.encode('utf-8')
+
+
+def feed_posts(tag, count, start=0):
+    return [(f'{tag}-{i}', f'https://medium.com/@{tag}/post-{i:012x}', 1700000000 + i * 3600)
+            for i in range(start, start + count)]
+
+
+def test_token_bucket_paces_reservations():
+    bucket = TokenBucket(rate=10.0, capacity=2.0)
+    waits = [bucket.reserve() for _ in range(5)]
+    assert waits[:2] == [0.0, 0.0]
+    for expected, wait in zip((0.1, 0.2, 0.3), waits[2:]):
+        assert abs(wait - expected) < 0.01
+    time.sleep(0.5)
+    assert bucket.reserve() == 0.0
+
+
+def test_host_rate_limiter_keys_buckets_by_host():
+    limiter = HostRateLimiter(delay=1.0)
+    assert limiter.reserve('https://medium.com/@a/one') == 0.0
+    assert limiter.reserve('https://Medium.com/@b/two') > 0.9
+    assert limiter.reserve('https://writer.medium.com/three') == 0.0
+    assert HostRateLimiter(delay=0).reserve('https://medium.com/@a/one') == 0.0
+
+
+def test_crawl_spaces_requests_per_host():
+    started = {}
+
+    def worker(url):
+        started.setdefault(url.split('/')[2], []).append(time.monotonic())
+        return url
+
+    results = []
+    urls = [f'https://{host}/post-{i}' for i in range(4) for host in ('a.example', 'b.example')]
+    run_crawl(urls, worker, results.append, concurrency=8, delay=0.1)
+    assert sorted(results) == sorted(urls)
+    for host, times in started.items():
+        gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+        assert len(times) == 4
+        assert times[-1] - times[0] >= 0.28, (host, gaps)
+        assert min(gaps) >= 0.06, (host, gaps)
+    assert max(started['a.example'][-1], started['b.example'][-1]) - min(started['a.example'][0],
+                                                                          started['b.example'][0]) < 0.6
+
+
+def test_pipeline_emits_results_in_input_order():
+    server, _ = start_server(latency=0.01)
+    try:
+        urls = fixture_urls(server.server_address[1], 24, hosts=1)
+        urls.insert(5, f'http://127.0.0.1:{server.server_address[1]}/status/404')
+        results = []
+        with ScrapePipeline(MediumScraper(delay=0), concurrency=6, parse_workers=2, queue_size=4,
+                            ordered=True) as pipeline:
+            pipeline.run(urls, results.append)
+        assert [result['url'] for result in results] == urls
+        assert 'error' in results[5]
+        for url, result in zip(urls[:3], results[:3]):
+            assert result == parse_article_html(url, requests.get(url).content, 'bs4')
+    finally:
+        server.shutdown()
+
+
+def test_ordered_pipeline_bounds_results_held_behind_a_slow_url():
+    server, _ = start_server()
+    try:
+        urls = fixture_urls(server.server_address[1], 40, hosts=1)
+        started, started_at_first_result, results = [], [], []
+
+        class SlowFirstScraper(MediumScraper):
+            def fetch_content(self, url):
+                started.append(url)
+                if url == urls[0]:
+                    time.sleep(0.5)
+                return super().fetch_content(url)
+
+        def on_result(result):
+            if not results:
+                started_at_first_result.append(len(started))
+            results.append(result)
+
+        with ScrapePipeline(SlowFirstScraper(delay=0), concurrency=4, parse_workers=2, queue_size=4,
+                            ordered=True) as pipeline:
+            pipeline.run(urls, on_result)
+        assert [result['url'] for result in results] == urls
+        assert started_at_first_result[0] <= 4 + 4
+    finally:
+        server.shutdown()
+
+
+def test_normalize_url_strips_tracking_and_defaults():
+    assert normalize_url(' HTTPS://Medium.COM:443/@User/title-a54bed8b5036/?utm_source=x&source=rss----5&b=2&a=1#top ') == \
+        'https://medium.com/@User/title-a54bed8b5036?a=1&b=2'
+    assert normalize_url('http://127.0.0.1:8765/') == 'http://127.0.0.1:8765/'
+    assert normalize_url('http://medium.com:80') == 'http://medium.com/'
+
+
+def test_canonical_key_matches_post_id_across_url_forms():
+    forms = [
+        'https://medium.com/@user/some-title-a54bed8b5036',
+        'https://user.medium.com/some-title-a54bed8b5036',
+        'https://user.medium.com/some-title-A54BED8B5036?source=rss------technology-5',
+        'https://medium.com/publication/renamed-title-a54bed8b5036/',
+        'https://medium.com/p/a54bed8b5036',
+    ]
+    assert {canonical_key(url) for url in forms} == {'post:a54bed8b5036'}
+    assert canonical_key('https://medium.com/@user/another-title-b65cfe9c6147') == 'post:b65cfe9c6147'
+    assert canonical_key('https://medium.com/tag/python?source=x') == 'https://medium.com/tag/python'
+
+
+def test_dedupe_urls_keeps_first_canonical_form():
+    urls = [
+        'https://medium.com/@user/some-title-a54bed8b5036?source=rss',
+        'https://user.medium.com/some-title-a54bed8b5036',
+        'https://medium.com/tag/python',
+        'https://medium.com/tag/python/',
+        'https://medium.com/@other/different-c76dfe0d7258',
+    ]
+    unique, duplicates = dedupe_urls(urls)
+    assert unique == ['https://medium.com/@user/some-title-a54bed8b5036', 'https://medium.com/tag/python',
+                      'https://medium.com/@other/different-c76dfe0d7258']
+    assert duplicates == 2
+    assert dedupe_urls(urls, use_bloom=True) == (unique, 2)
+
+
+def test_bloom_deduplicator_has_no_false_negatives():
+    deduper = UrlDeduplicator(use_bloom=True, capacity=5000)
+    urls = [f'https://medium.com/@writer/post-{i:012x}' for i in range(5000)]
+    assert sum(deduper.add(url) for url in urls) >= 4990
+    assert not any(deduper.add(url.replace('medium.com/@writer', 'writer.medium.com')) for url in urls)
+    assert BloomFilter(100).num_hashes >= 1
+
+
+def test_deduplicator_switches_to_bloom_past_capacity():
+    deduper = UrlDeduplicator(capacity=100)
+    urls = [f'https://medium.com/@writer/post-{i:012x}' for i in range(300)]
+    assert all(deduper.add(url) for url in urls[:100])
+    assert deduper.bloom is None and len(deduper.seen) == 100
+    assert sum(deduper.add(url) for url in urls[100:]) >= 195
+    assert deduper.bloom is not None and not deduper.seen
+    assert not any(deduper.add(url) for url in urls)
+
+
+def test_rss_harvester_keeps_per_feed_state():
+    python, rust = feed_posts('python', 3), feed_posts('rust', 2)
+    server, _ = start_server(feeds={'python': rss_feed(python), 'rust': rss_feed(rust)})
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = f'http://127.0.0.1:{server.server_address[1]}/feed/'
+            state_file = os.path.join(tmp, 'state.json')
+            first = RssHarvester(state_file=state_file).harvest([base + 'python', base + 'rust', base + 'missing'])
+            assert first == {base + 'python': [link for _, link, _ in python[::-1]],
+                             base + 'rust': [link for _, link, _ in rust[::-1]], base + 'missing': []}
+            assert RssHarvester(state_file=state_file).harvest([base + 'python', base + 'rust']) == \
+                {base + 'python': [], base + 'rust': []}
+            newer = feed_posts('python', 1, start=3)
+            server.feeds['python'] = rss_feed(python + newer)
+            harvester = RssHarvester(state_file=state_file)
+            assert harvester.harvest([base + 'python', base + 'rust']) == {base + 'python': [newer[0][1]], base + 'rust': []}
+            assert harvester.state[base + 'python']['last_guid'] == 'python-3'
+            assert harvester.state[base + 'rust']['last_guid'] == 'rust-1'
+    finally:
+        server.shutdown()
+
+
+def test_rss_cap_leaves_dropped_urls_for_the_next_run():
+    python, rust = feed_posts('python', 5), feed_posts('rust', 3)
+    duplicate = ('rust-dup', 'https://python.medium.com/post-000000000004?source=rss', 1700000000 + 5400)
+    server, _ = start_server(feeds={'python': rss_feed(python), 'rust': rss_feed(rust + [duplicate])})
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            base = f'http://127.0.0.1:{server.server_address[1]}/feed/'
+            state_file = os.path.join(tmp, 'state.json')
+            output = os.path.join(tmp, 'urls.txt')
+            runs = []
+            for _ in range(3):
+                extract_urls_from_rss_feeds([base + 'python', base + 'rust'], output, 4, state_file, 2)
+                with open(output, 'r', encoding='utf-8') as f:
+                    runs.append(f.read().split())
+            assert [len(run) for run in runs] == [4, 4, 0]
+            assert sorted(runs[0] + runs[1]) == sorted(normalize_url(link) for _, link, _ in python + rust)
+    finally:
+        server.shutdown()
+
+
+def test_ledger_backs_off_until_max_attempts():
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = ScrapeLedger(os.path.join(tmp, 'ledger.sqlite3'), max_attempts=3, backoff=2.0)
+        transient = {'url': 'https://medium.com/@a/post-1a2b', 'error': 'Request error: 503', 'retryable': True}
+        delays = []
+        for attempt in range(1, 3):
+            assert not ledger.should_write(transient)
+            before = time.time()
+            assert ledger.record(transient) == RETRYABLE
+            delays.append(ledger.next_retry_at() - before)
+        assert abs(delays[0] - 2.0) < 0.5 and abs(delays[1] - 4.0) < 0.5
+        assert ledger.due_retries(time.time() + 5) == [transient['url']]
+        assert ledger.should_write(transient)
+        assert ledger.record(transient) == FAILED
+        assert ledger.next_retry_at() is None
+        assert ledger.record({'url': 'https://medium.com/@a/post-3c4d', 'error': 'Parse error'}) == FAILED
+        assert ledger.record({'url': 'https://medium.com/@a/post-5e6f'}) == DONE
+        assert ledger.summary() == {FAILED: 2, DONE: 1}
+        ledger.close()
+
+
+def test_batch_scrape_retries_and_resumes_from_cursor():
+    server, _ = start_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            port = server.server_address[1]
+            urls = fixture_urls(port, 6, hosts=1)
+            failing = f'http://127.0.0.1:{port}/status/503'
+            input_file = os.path.join(tmp, 'urls.txt')
+            with open(input_file, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(urls + [failing]) + '\n')
+            ledger_path = os.path.join(tmp, 'ledger.sqlite3')
+
+            def scrape(output, **kwargs):
+                server.requests_seen.clear()
+                batch_scrape(input_file, os.path.join(tmp, output), batch_size=3, delay=0, report=None,
+                             max_attempts=3, retry_backoff=0.05, **kwargs)
+                return [path for path, _ in server.requests_seen]
+
+            seen = scrape('first.csv', ledger_path=ledger_path)
+            assert seen.count('/status/503') == 3
+            assert len(seen) == 9
+            ledger = ScrapeLedger(ledger_path)
+            assert ledger.cursor(os.path.abspath(input_file)) == 7
+            assert ledger.summary() == {DONE: 6, FAILED: 1}
+            assert scrape('finished.csv', ledger_path=ledger_path, resume=True) == []
+            ledger.db.execute('DELETE FROM urls')
+            ledger.db.commit()
+            ledger.set_cursor(os.path.abspath(input_file), 3)
+            ledger.close()
+
+            resumed = scrape('resumed.csv', ledger_path=ledger_path, resume=True)
+            assert sorted(set(resumed)) == sorted(url.split(str(port), 1)[1] for url in urls[3:] + [failing])
+            assert resumed.count('/status/503') == 3
+            assert len(scrape('again.csv', ledger_path=ledger_path)) == 9
+            assert len(scrape('plain.csv')) == 7
+    finally:
+        server.shutdown()
+
+
+def test_parquet_sink_round_trip():
+    server, _ = start_server()
+    try:
+        scraper = MediumScraper(delay=0)
+        results = [scraper.extract_article_data(url) for url in fixture_urls(server.server_address[1], 7, hosts=1)]
+    finally:
+        server.shutdown()
+    results.append({'url': 'https://medium.com/@writer/broken-1a2b3c4d5e6f', 'error': 'Request error: 404'})
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = os.path.join(tmp, 'results.parquet')
+        csv_file = os.path.join(tmp, 'results.csv')
+        for output in (dataset, csv_file):
+            with open_sink(output, row_group_size=3) as sink:
+                for result in results[:5]:
+                    sink.write(result)
+            with open_sink(output, row_group_size=3) as sink:
+                for result in results[5:]:
+                    sink.write(result)
+
+        parts = sorted(os.listdir(dataset))
+        assert len(parts) == 2
+        assert [pq.ParquetFile(os.path.join(dataset, part)).num_row_groups for part in parts] in ([2, 1], [1, 2])
+        table = pq.read_table(dataset)
+        assert table.schema.names == FIELDNAMES
+        assert all(str(table.schema.field(name).type) == 'int64' for name in INTEGER_FIELDS)
+
+        frame = read_articles(dataset).sort_values('url').reset_index(drop=True)
+        expected = pd.DataFrame([{name: result.get(name) for name in FIELDNAMES} for result in results])
+        expected = expected.sort_values('url').reset_index(drop=True)
+        for name in FIELDNAMES:
+            if name in INTEGER_FIELDS:
+                assert frame[name].tolist() == expected[name].fillna(0).astype(int).tolist(), name
+            else:
+                assert frame[name].tolist() == expected[name].fillna('').astype(str).tolist(), name
+        from_csv = read_articles(csv_file).sort_values('url').reset_index(drop=True)
+        assert from_csv['title'].fillna('').tolist() == frame['title'].tolist()
+        assert from_csv['claps'].fillna(0).astype(int).tolist() == frame['claps'].tolist()
+        assert read_articles(dataset, columns=['url', 'claps']).columns.tolist() == ['url', 'claps']
+
+
+def test_cache_serves_fresh_entries_within_ttl():
+    server, _ = start_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResponseCache(tmp, ttl=3600)
+            session = cached_session(cache)
+            url = f'http://127.0.0.1:{server.server_address[1]}/@writer/fresh-article-1a2b'
+            first = session.get(url)
+            second = session.get(url)
+            assert second.content == first.content
+            assert getattr(second, 'from_cache', False)
+            assert len(fetched(server, '/@writer/fresh-article-1a2b')) == 1
+            assert (cache.hits, cache.revalidated, cache.misses) == (1, 0, 1)
+            cache.db.close()
+    finally:
+        server.shutdown()
+
+
+def test_cache_revalidates_expired_entries_with_etag():
+    server, _ = start_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResponseCache(tmp, ttl=0)
+            session = cached_session(cache)
+            url = f'http://127.0.0.1:{server.server_address[1]}/@writer/stale-article-3c4d'
+            first = session.get(url)
+            second = session.get(url)
+            assert second.status_code == 200
+            assert second.content == first.content
+            assert getattr(second, 'from_cache', False)
+            requests_seen = fetched(server, '/@writer/stale-article-3c4d')
+            assert 'If-None-Match' not in requests_seen[0]
+            assert requests_seen[1]['If-None-Match'] == first.headers['ETag']
+            assert requests_seen[1]['If-Modified-Since'] == first.headers['Last-Modified']
+            assert (cache.hits, cache.revalidated, cache.misses) == (0, 1, 1)
+            cache.db.close()
+    finally:
+        server.shutdown()
+
+
+def test_cache_revalidates_fresh_entries_on_no_cache():
+    server, _ = start_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResponseCache(tmp, ttl=3600)
+            session = cached_session(cache)
+            url = f'http://127.0.0.1:{server.server_address[1]}/@writer/no-cache-article-5e6f'
+            first = session.get(url)
+            session.get(url, headers={'Cache-Control': 'no-cache'})
+            session.get(url, headers={'Cache-Control': 'max-age=0'})
+            session.get(url, headers={'Pragma': 'no-cache'})
+            requests_seen = fetched(server, '/@writer/no-cache-article-5e6f')
+            assert len(requests_seen) == 4
+            assert all(headers['If-None-Match'] == first.headers['ETag'] for headers in requests_seen[1:])
+            assert (cache.hits, cache.revalidated, cache.misses) == (0, 3, 1)
+            cache.db.close()
+    finally:
+        server.shutdown()
+
+
+def test_scraper_cache_serves_pages_without_revalidating():
+    server, _ = start_server()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            scraper = MediumScraper(delay=0, cache_dir=tmp)
+            url = f'http://127.0.0.1:{server.server_address[1]}/@writer/cached-article-7a8b'
+            first = scraper.extract_article_data(url)
+            assert scraper.extract_article_data(url) == first
+            assert len(fetched(server, '/@writer/cached-article-7a8b')) == 1
+            assert scraper.cache.hits == 1
+            scraper.cache.db.close()
+    finally:
+        server.shutdown()
+
+
+def test_cache_evicts_least_recently_used():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(tmp, max_bytes=2500)
+        bodies = {name: os.urandom(1000) for name in ('a', 'b', 'c')}
+        cache.put('https://medium.com/@writer/a', {}, bodies['a'])
+        cache.put('https://medium.com/@writer/b', {}, bodies['b'])
+        assert cache.get('https://medium.com/@writer/a')['body'] == bodies['a']
+        cache.put('https://medium.com/@writer/c', {}, bodies['c'])
+        assert cache.get('https://medium.com/@writer/b') is None
+        assert cache.get('https://medium.com/@writer/a')['body'] == bodies['a']
+        assert cache.get('https://medium.com/@writer/c')['body'] == bodies['c']
+        assert cache.stats()['entries'] == 2
+        assert cache.stats()['bytes'] <= 2500
+        cache.db.close()
+
+
+if __name__ == '__main__':
+    tests = [
+        test_token_bucket_paces_reservations,
+        test_host_rate_limiter_keys_buckets_by_host,
+        test_crawl_spaces_requests_per_host,
+        test_pipeline_emits_results_in_input_order,
+        test_ordered_pipeline_bounds_results_held_behind_a_slow_url,
+        test_normalize_url_strips_tracking_and_defaults,
+        test_canonical_key_matches_post_id_across_url_forms,
+        test_dedupe_urls_keeps_first_canonical_form,
+        test_bloom_deduplicator_has_no_false_negatives,
+        test_deduplicator_switches_to_bloom_past_capacity,
+        test_rss_harvester_keeps_per_feed_state,
+        test_rss_cap_leaves_dropped_urls_for_the_next_run,
+        test_ledger_backs_off_until_max_attempts,
+        test_batch_scrape_retries_and_resumes_from_cursor,
+        test_parquet_sink_round_trip,
+        test_cache_serves_fresh_entries_within_ttl,
+        test_cache_revalidates_expired_entries_with_etag,
+        test_cache_revalidates_fresh_entries_on_no_cache,
+        test_scraper_cache_serves_pages_without_revalidating,
+        test_cache_evicts_least_recently_used,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"{test.__name__}: ✓ PASSED")
+        except AssertionError as e:
+            failed += 1
+            print(f"{test.__name__}: ✗ FAILED\n{e}")
+    print(f"\nOverall: {'✓ ALL TESTS PASSED' if not failed else '✗ SOME TESTS FAILED'}")
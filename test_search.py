@@ -0,0 +1,666 @@
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+import api
+from generate_1000_articles import create_1000_articles_csv, generate_article, zipf_vocabulary
+from index_reloader import IndexReloader
+from ann_index import AnnIndex
+from bm25_index import Bm25Index
+from query_cache import QueryCache
+from search_cursors import CursorCache, decode_cursor, encode_cursor
+from document_store import DocumentStore
+from search_index import (FACET_COLUMNS, MAX_POSTING_SEGMENTS, SEARCH_COLUMNS, VECTORIZER_PARAMS, SearchIndex,
+                          prepare_articles)
+from sharded_index import ShardedIndex, load_search_index
+
+logging.disable(logging.INFO)
+
+QUERIES = [
+    'machine learning', 'python', 'kubernetes docker', 'Technology innovation', 'learn',
+    'data', 'react frontend javascript', 'quantum', 'node.js', 'zzzz', 'best practices for security',
+    'A Complete Guide', 'mlops deployment', 'ai', 'Deep dive into Blockchain', 'tion', 'zzzz flow', 'eep'
+]
+
+
+def reference_search(df, vectorizer, tfidf_matrix, query, top_n=10):
+    query_vector = vectorizer.transform([query])
+    similarities = cosine_similarity(query_vector, tfidf_matrix).flatten()
+    df_temp = df.copy()
+    df_temp['similarity'] = similarities
+    if df_temp['similarity'].max() == 0:
+        query_lower = query.lower()
+        df_temp['text_match'] = (
+            df_temp['title'].fillna('').str.lower().str.contains(query_lower, na=False, regex=False) |
+            df_temp['subtitle'].fillna('').str.lower().str.contains(query_lower, na=False, regex=False) |
+            df_temp['keywords'].fillna('').str.lower().str.contains(query_lower, na=False, regex=False) |
+            df_temp['text'].fillna('').str.lower().str.contains(query_lower, na=False, regex=False)
+        )
+        df_temp = df_temp[df_temp['text_match'] == True]
+        if len(df_temp) == 0:
+            for word in query_lower.split():
+                if len(word) > 3:
+                    df_temp = df.copy()
+                    df_temp['text_match'] = (
+                        df_temp['title'].fillna('').str.lower().str.contains(word, na=False, regex=False) |
+                        df_temp['keywords'].fillna('').str.lower().str.contains(word, na=False, regex=False)
+                    )
+                    df_temp = df_temp[df_temp['text_match'] == True]
+                    if len(df_temp) > 0:
+                        break
+        df_temp['similarity'] = 0.5
+    else:
+        df_temp = df_temp[df_temp['similarity'] > 0]
+    top_results = df_temp.sort_values(by=['claps', 'similarity'], ascending=[False, False]).head(top_n)
+    return [
+        {
+            'url': str(row['url']),
+            'title': str(row['title']),
+            'claps': int(row['claps']) if pd.notna(row['claps']) else 0,
+            'similarity_score': float(row['similarity'])
+        }
+        for _, row in top_results.iterrows()
+    ]
+
+
+def assert_same_results(expected, actual, query):
+    assert [r['url'] for r in actual] == [r['url'] for r in expected], query
+    for want, got in zip(expected, actual):
+        assert got['title'] == want['title'] and got['claps'] == want['claps'], query
+        assert abs(got['similarity_score'] - want['similarity_score']) < 1e-9, query
+
+
+def test_find_similar_articles_matches_reference():
+    index = api.search_index
+    for query in QUERIES:
+        for top_n in (1, 10, 50):
+            expected = reference_search(index.store.frame(SEARCH_COLUMNS), index.vectorizer, index.tfidf_matrix, query, top_n)
+            assert_same_results(expected, api.find_similar_articles(query, top_n), query)
+
+
+def test_keyword_fallback_matches_reference():
+    index = api.search_index
+    for query in ('e', 'ing', 'ion f', 'ode.j', 'i/c', '.', ', ', 'xx learnin', 'qqqq ractice', 'ks: a c'):
+        assert len(index.score(query)[0]) == 0, query
+        expected = reference_search(index.store.frame(SEARCH_COLUMNS), index.vectorizer, index.tfidf_matrix, query, 25)
+        assert_same_results(expected, index.search(query, 25), query)
+
+
+def test_filtered_search_matches_reference_on_subset():
+    index = api.search_index
+    frame = index.store.frame(SEARCH_COLUMNS + ['author_name', 'reading_time', 'num_images'])
+    authors = frame['author_name'].value_counts().index[:2].tolist()
+    cases = [
+        ({'author_name': authors}, frame['author_name'].isin(authors)),
+        ({'reading_time': (8, 12)}, frame['reading_time'].between(8, 12)),
+        ({'reading_time': (20, None)}, frame['reading_time'] >= 20),
+        ({'claps': (10000, None), 'num_images': (None, 3)}, (frame['claps'] >= 10000) & (frame['num_images'] <= 3)),
+        ({'author_name': ['Nobody'], 'reading_time': (1, 100)}, frame['author_name'] == 'Nobody')
+    ]
+    sharded = ShardedIndex.from_index(index, 3)
+    for filters, mask in cases:
+        assert sorted(index.allowed(filters).tolist()) == np.flatnonzero(mask.to_numpy()).tolist(), filters
+        subset = frame[mask.to_numpy()].reset_index(drop=True)
+        for query in QUERIES + ['ion f', 'xx learnin']:
+            if len(subset) == 0:
+                assert index.search(query, 10, filters) == sharded.search(query, 10, filters) == []
+                continue
+            expected = reference_search(subset, index.vectorizer, index.tfidf_matrix[np.flatnonzero(mask)], query, 10)
+            assert_same_results(expected, index.search(query, 10, filters), (query, filters))
+            assert sharded.search(query, 10, filters) == index.search(query, 10, filters), (query, filters)
+
+
+def test_search_endpoint_filters():
+    client = api.app.test_client()
+    author = api.search_index.store.frame(['author_name'])['author_name'][0]
+    response = client.get('/search', query_string={
+        'query': 'learning', 'author_name': author, 'min_reading_time': 10, 'max_reading_time': 15
+    })
+    assert response.status_code == 200
+    for result in response.get_json()['results']:
+        document = api.search_index.document(result['url'])
+        assert document['author_name'] == author and 10 <= document['reading_time'] <= 15
+    response = client.post('/search', json={'query': 'learning', 'min_claps': 12000, 'top_n': 50})
+    results = response.get_json()['results']
+    assert results and all(result['claps'] >= 12000 for result in results)
+    assert client.get('/search', query_string={'query': 'python', 'min_claps': 'many'}).status_code == 400
+    assert client.get('/search', query_string={'query': 'python', 'mode': 'ann', 'min_claps': 5}).status_code == 400
+
+
+def test_cursor_pages_concatenate_to_full_ranking():
+    client = api.app.test_client()
+    for query, filters in (('learning', {}), ('ion f', {}), ('data', {'min_reading_time': 10})):
+        expected = api.search_index.search(query, 37, api.parse_filters(filters, []))
+        pages = []
+        body = client.get('/search', query_string={'query': query, 'page_size': 10, **filters}).get_json()
+        while True:
+            pages.extend(body['results'])
+            if body['next_cursor'] is None or len(pages) >= 37:
+                break
+            body = client.get('/search', query_string={'cursor': body['next_cursor']}).get_json()
+        assert pages[:37] == expected, query
+
+    first = client.post('/search', json={'query': 'python', 'page_size': 5}).get_json()
+    second = client.post('/search', json={'cursor': first['next_cursor']}).get_json()
+    api.cursor_cache.clear()
+    assert client.post('/search', json={'cursor': first['next_cursor']}).get_json()['results'] == second['results']
+    assert client.get('/search', query_string={'cursor': 'not-a-cursor'}).status_code == 400
+    assert client.get('/search', query_string={'query': 'python', 'page_size': 0}).status_code == 400
+    assert client.get('/search', query_string={'query': 'python', 'page_size': 5, 'rank': 'bm25'}).status_code == 400
+
+    expired = encode_cursor({**decode_cursor(first['next_cursor'], api.CURSOR_SECRET, api.MAX_PAGE_SIZE),
+                             'expires': 0}, api.CURSOR_SECRET)
+    assert client.get('/search', query_string={'cursor': expired}).status_code == 410
+
+
+def test_forged_and_malformed_cursors_are_rejected():
+    client = api.app.test_client()
+    first = client.get('/search', query_string={'query': 'learning', 'page_size': 5}).get_json()
+    state = decode_cursor(first['next_cursor'], api.CURSOR_SECRET, api.MAX_PAGE_SIZE)
+    payload = first['next_cursor'].partition('.')[0]
+    unsigned = encode_cursor({**state, 'page_size': 100000}, b'not-the-key')
+    assert client.get('/search', query_string={'cursor': unsigned}).status_code == 400
+    assert client.get('/search', query_string={'cursor': payload}).status_code == 400
+    assert client.get('/search', query_string={'cursor': f'{payload}.x\u00e9'}).status_code == 400
+    assert client.post('/search', json={'cursor': 12}).status_code == 400
+
+    for change in ({'page_size': 100000}, {'page_size': -5}, {'page_size': 0}, {'page_size': True},
+                   {'offset': 'x'}, {'offset': -10}, {'offset': 2.5}, {'query': ['learning']},
+                   {'filters': {'claps': 'many'}}, {'filters': {'author_name': 'Ada'}}, {'filters': {'url': [1, 2]}},
+                   {'filters': []}, {'expires': 'later'}):
+        forged = encode_cursor({**state, **change}, api.CURSOR_SECRET)
+        assert client.get('/search', query_string={'cursor': forged}).status_code == 400, change
+
+    narrowed = encode_cursor({**state, 'id': 'narrowed', 'filters': {'claps': [100, None]}}, api.CURSOR_SECRET)
+    assert client.get('/search', query_string={'cursor': narrowed}).status_code == 200
+
+
+def test_cursor_cache_ttl_and_memory_budget():
+    ranked = (np.arange(100, dtype=np.int64), np.ones(100))
+    cache = CursorCache(ttl=60, max_bytes=2 * CursorCache.size_of(ranked))
+    for cursor_id in ('a', 'b', 'c'):
+        cache.put(cursor_id, 'v1', ranked)
+    assert cache.get('a', 'v1') is None and cache.get('b', 'v1') is not None
+    assert cache.get('c', 'v2') is None
+    assert cache.stats()['evictions'] == 1 and cache.stats()['bytes'] <= cache.max_bytes
+    cache.ttl = 0
+    assert cache.get('b', 'v1') is None and cache.stats()['cursors'] == 0
+
+
+def test_metrics_endpoint_reports_stages_and_outcomes():
+    client = api.app.test_client()
+    api.query_cache.clear()
+    client.get('/search', query_string={'query': 'kubernetes docker', 'top_n': 3})
+    client.get('/search', query_string={'query': 'zzzz'})
+    client.get('/search')
+    body = client.get('/metrics').get_data(as_text=True)
+    for stage in ('vectorize', 'similarity', 'fallback', 'topk', 'serialize'):
+        assert f'search_stage_seconds_count{{stage="{stage}"}}' in body, stage
+    for outcome in ('ok', 'no_results', 'client_error'):
+        assert f'search_api_requests_total{{endpoint="search",outcome="{outcome}"}}' in body, outcome
+    assert f'search_index_articles {float(api.search_index.stats()["articles"])}' in body
+    assert 'search_api_resident_memory_bytes' in body
+
+
+def test_metrics_aggregate_across_processes(tmp_path):
+    script = (
+        'import search_metrics; '
+        'search_metrics.observe_stages({"similarity": 0.002}); '
+        'search_metrics.observe_request("search", "ok", 0.003)'
+    )
+    env = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': str(tmp_path)}
+    for _ in range(2):
+        subprocess.run([sys.executable, '-c', script], env=env, check=True)
+    render = 'import search_metrics; print(search_metrics.render()[0].decode())'
+    body = subprocess.run([sys.executable, '-c', render], env=env, check=True, capture_output=True, text=True).stdout
+    assert 'search_stage_seconds_count{stage="similarity"} 2.0' in body
+    assert 'search_api_requests_total{endpoint="search",outcome="ok"} 2.0' in body
+
+
+def test_search_batch_matches_single_queries():
+    index = api.search_index
+    top_ns = [(i % 4) * 7 for i in range(len(QUERIES))] + [-3]
+    queries = QUERIES + ['python']
+    for query, top_n, results in zip(queries, top_ns, index.search_batch(queries, top_ns)):
+        assert_same_results(index.search(query, top_n), results, query)
+
+
+def test_saved_index_matches_fitted_index(tmp_path):
+    fitted = api.search_index
+    fitted.save(str(tmp_path))
+    loaded = SearchIndex.load(str(tmp_path))
+    for query in QUERIES:
+        assert_same_results(fitted.search(query, 10), loaded.search(query, 10), query)
+
+
+def test_saved_keyword_index_is_memory_mapped(tmp_path):
+    fallback_queries = ('e', 'ing', 'ion f', 'ode.j', 'xx learnin', 'qqqq ractice', 'ks: a c')
+    articles = pd.read_csv('scrapping_results.csv')
+    base = SearchIndex.from_articles(articles.iloc[:600].copy())
+    assert base._keyword_index is None and len(base.keyword_index.segments) == 1
+    fitted = base.ingest(articles.iloc[600:])
+    assert len(fitted.keyword_index.segments) == 2
+    fitted.save(str(tmp_path))
+    loaded = SearchIndex.load(str(tmp_path))
+    assert loaded._keyword_index is not None and len(loaded._keyword_index.segments) == 2
+    _, phrases, words = loaded._keyword_index.segments[1]
+    assert all(isinstance(array.base, np.memmap) for array in (*phrases.arrays().values(), *words.arrays().values()))
+    for query in fallback_queries:
+        assert_same_results(fitted.search(query, 25), loaded.search(query, 25), query)
+
+    with open(tmp_path / 'meta.json', 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    del meta['keyword']
+    with open(tmp_path / 'meta.json', 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    lazy = SearchIndex.load(str(tmp_path))
+    assert lazy._keyword_index is None
+    assert_same_results(fitted.search('machine learning', 10), lazy.search('machine learning', 10), 'machine learning')
+    assert lazy._keyword_index is None
+    for query in fallback_queries:
+        assert_same_results(fitted.search(query, 25), lazy.search(query, 25), query)
+    assert lazy._keyword_index is not None
+
+
+def test_csv_builds_include_the_keyword_index(monkeypatch):
+    assert api.build_from_csv('scrapping_results.csv')._keyword_index is not None
+    monkeypatch.setattr(api, 'SEARCH_SHARDS', 2)
+    sharded = api.build_from_csv('scrapping_results.csv')
+    assert all(shard._keyword_index is not None for shard in sharded.shards)
+
+
+def test_search_endpoint():
+    client = api.app.test_client()
+    response = client.get('/search', query_string={'query': 'machine learning', 'top_n': 5})
+    assert response.status_code == 200
+    assert response.get_json()['count'] == 5
+    assert client.get('/search').status_code == 400
+
+
+def test_search_batch_endpoint():
+    client = api.app.test_client()
+    response = client.post('/search/batch', json={'queries': ['python', {'query': 'docker', 'top_n': 3}], 'top_n': 5})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [item['query'] for item in body['results']] == ['python', 'docker']
+    assert [item['count'] for item in body['results']] == [5, 3]
+    assert client.post('/search/batch', json={'queries': []}).status_code == 400
+    assert client.post('/search/batch', json={'queries': ['ok', '']}).status_code == 400
+
+
+def test_query_cache_lru_and_version():
+    cache = QueryCache(max_entries=2)
+    cache.put('v1', 'Python', 10, [{'url': 'a'}])
+    cache.put('v1', 'docker', 10, [{'url': 'b'}])
+    assert cache.get('v1', 'python', 10) == [{'url': 'a'}]
+    cache.put('v1', 'react', 10, [{'url': 'c'}])
+    assert cache.get('v1', 'docker', 10) is None
+    assert cache.get('v2', 'python', 10) is None
+    assert cache.get('v1', 'python', 5) is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (1, 3, 1)
+
+
+def test_shared_query_cache(tmp_path):
+    path = str(tmp_path / 'query_cache.sqlite3')
+    QueryCache(max_entries=0, shared_path=path).put('v1', 'python', 10, [{'url': 'a'}])
+    reader = QueryCache(max_entries=10, shared_path=path)
+    assert reader.get('v1', 'python', 10) == [{'url': 'a'}]
+    assert reader.get('v1', 'python', 10) == [{'url': 'a'}]
+    assert reader.stats()['shared_hits'] == 1 and reader.stats()['hits'] == 1
+    reader.put('v2', 'python', 10, [{'url': 'b'}])
+    assert QueryCache(max_entries=0, shared_path=path).get('v1', 'python', 10) is None
+
+
+def test_health_reports_query_cache():
+    client = api.app.test_client()
+    client.get('/search', query_string={'query': 'kubernetes'})
+    client.get('/search', query_string={'query': 'Kubernetes'})
+    body = client.get('/health').get_json()
+    assert body['corpus_version'] == api.search_index.version
+    assert body['query_cache']['hits'] >= 1
+
+
+def test_saving_over_a_loaded_index_keeps_it_readable(tmp_path):
+    api.search_index.save(str(tmp_path))
+    loaded = SearchIndex.load(str(tmp_path))
+    expected = loaded.search('machine learning', 10)
+    api.search_index.save(str(tmp_path))
+    assert loaded.search('machine learning', 10) == expected
+
+
+def test_document_store_round_trips_articles(tmp_path):
+    articles = pd.read_csv('scrapping_results.csv')
+    articles.loc[3, 'subtitle'] = None
+    articles.loc[5, 'title'] = 'Ünïcode — títle'
+    store = DocumentStore.from_frame(articles)
+    assert store.claps.dtype == np.int64 and len(store) == len(articles)
+    assert store['subtitle'][3] == '' and store['title'][5] == 'Ünïcode — títle'
+    assert list(store.slice(10, 20)['url']) == articles['url'].iloc[10:20].tolist()
+    assert list(store.slice(0, 5).append(store.slice(5, 9))['text']) == articles['text'].iloc[:9].tolist()
+
+    index = SearchIndex.from_articles(articles)
+    index.save(str(tmp_path))
+    assert not os.path.exists(tmp_path / 'articles.parquet')
+    loaded = SearchIndex.load(str(tmp_path))
+    assert isinstance(loaded.store['text'].buffer, np.memmap)
+    url = articles['url'].iloc[42]
+    assert loaded.document(url) == {
+        **articles.iloc[42][['url', 'title', 'subtitle', 'text', 'keywords', 'author_name']].fillna('').to_dict(),
+        **{name: int(articles[name].iloc[42]) for name in ('claps', 'reading_time', 'num_images')}
+    }
+    assert loaded.document('https://medium.com/missing') is None
+
+
+def test_article_endpoint():
+    client = api.app.test_client()
+    url = api.search_index.store['url'][7]
+    response = client.get('/article', query_string={'url': url})
+    assert response.status_code == 200
+    assert response.get_json()['text'] == api.search_index.store['text'][7]
+    assert client.get('/article').status_code == 400
+    assert client.get('/article', query_string={'url': 'https://medium.com/missing'}).status_code == 404
+
+
+def test_reloader_swaps_index_after_file_settles(tmp_path):
+    csv_path = str(tmp_path / 'articles.csv')
+    create_1000_articles_csv(csv_path)
+    swapped = []
+    reloader = IndexReloader(csv_path, lambda: SearchIndex.from_file(csv_path), swapped.append, interval=0.01)
+    assert not reloader.check()
+
+    random.seed(7)
+    pd.DataFrame([generate_article(i) for i in range(1001, 1051)]).to_csv(csv_path, mode='a', header=False, index=False)
+    assert not reloader.check()
+    assert reloader.check()
+    assert len(swapped) == 1 and len(swapped[0].store) == 1050
+    assert not reloader.check()
+    assert reloader.stats()['reloads'] == 1
+
+
+def test_generated_corpus_is_reproducible_across_workers_and_formats(tmp_path):
+    csv_path, parquet_path = str(tmp_path / 'corpus.csv'), str(tmp_path / 'corpus.parquet')
+    create_1000_articles_csv(csv_path, 300, seed=11, workers=1, chunk_size=70, text_style='zipf', median_words=200)
+    create_1000_articles_csv(parquet_path, 300, seed=11, workers=2, chunk_size=70, text_style='zipf', median_words=200)
+    generated = pd.read_csv(csv_path)
+    assert generated.equals(pd.read_parquet(parquet_path))
+    assert len(generated) == 300 and generated['url'].is_unique
+    assert not os.path.exists(csv_path + '.tmp')
+
+    lengths = generated['text'].str.split().str.len()
+    assert lengths.quantile(0.99) > 3 * lengths.median()
+    words, _ = zipf_vocabulary()
+    counts = pd.Series(' '.join(generated['text']).split()).value_counts()
+    assert counts.index[0] == words[0] and counts.iloc[0] > 10 * counts.iloc[50]
+    assert SearchIndex.from_file(parquet_path).search('machine learning', 5)
+
+
+def test_ingest_with_idf_refresh_matches_fit_on_fixed_vocabulary():
+    articles = pd.read_csv('scrapping_results.csv')
+    base = SearchIndex.from_articles(articles.iloc[:800].copy())
+    grown = base.ingest(articles.iloc[800:850], refresh_idf=False).ingest(articles.iloc[850:], refresh_idf=True)
+    assert grown.tfidf_matrix.shape[0] == len(articles) and grown.idf_documents == len(articles)
+    assert grown.version != base.version
+
+    expected = TfidfVectorizer(**VECTORIZER_PARAMS, vocabulary=base.vectorizer.vocabulary_).fit_transform(
+        prepare_articles(articles.copy())['combined_text'])
+    assert abs(expected - grown.tfidf_matrix).max() < 1e-12
+    assert abs(grown.postings.tocsr() - grown.tfidf_matrix).max() == 0
+    for query in QUERIES:
+        expected_results = reference_search(grown.store.frame(SEARCH_COLUMNS), grown.vectorizer, expected, query, 10)
+        assert_same_results(expected_results, grown.search(query, 10), query)
+
+
+def test_small_ingests_append_in_place_and_match_a_rebuild():
+    articles = pd.read_csv('scrapping_results.csv')
+    base = SearchIndex.from_articles(articles.iloc[:700].copy())
+    base_results = [base.search(query, 10) for query in QUERIES]
+    snapshots = [base]
+    for start in range(700, len(articles), 20):
+        snapshots.append(snapshots[-1].ingest(articles.iloc[start:start + 20], refresh_idf=False))
+    grown = snapshots[-1]
+    extra = articles.iloc[:5].assign(author_name=['Ada', 'Grace', 'Ada', 'Linus', 'Grace'])
+    branch = snapshots[3].ingest(extra, refresh_idf=False)
+
+    assert len(grown.posting_segments) <= MAX_POSTING_SEGMENTS and grown.idf_documents == 700
+    assert np.shares_memory(snapshots[2].store['text'].buffer, grown.store['text'].buffer)
+    assert np.shares_memory(snapshots[2].tfidf_matrix.data, grown.tfidf_matrix.data)
+
+    full = prepare_articles(articles.copy())
+    rows = base.vectorizer.transform(full['combined_text'].iloc[700:])
+    rebuilt = SearchIndex(base.vectorizer, sparse.vstack([base.tfidf_matrix, rows], format='csr'),
+                          DocumentStore.from_frame(full))
+    columns = SEARCH_COLUMNS + FACET_COLUMNS
+    assert grown.store.frame(columns).equals(rebuilt.store.frame(columns))
+    assert abs(grown.tfidf_matrix - rebuilt.tfidf_matrix).max() == 0
+    assert abs(grown.postings.tocsr() - rebuilt.tfidf_matrix).max() == 0
+    expected = pd.concat([rebuilt.store.frame(columns).iloc[:760], extra[columns]], ignore_index=True)
+    assert branch.store.frame(['url', 'author_name']).equals(expected[['url', 'author_name']])
+    assert sorted(branch.allowed({'author_name': ['Grace', 'Linus']}).tolist()) == [761, 763, 764]
+    assert len(grown.allowed({'author_name': ['Grace']})) == 0
+
+    frame = rebuilt.store.frame(columns)
+    authors = frame['author_name'].iloc[-40:].unique()[:3].tolist()
+    for query, expected in zip(QUERIES, base_results):
+        assert base.search(query, 10) == expected, query
+        assert grown.search(query, 10) == rebuilt.search(query, 10), query
+        for filters in ({'author_name': authors}, {'claps': (100, None), 'reading_time': (None, 8)}):
+            assert grown.search(query, 10, filters) == rebuilt.search(query, 10, filters), (query, filters)
+    top_ns = [10, 3, -5] * 6
+    assert grown.search_batch(QUERIES, top_ns) == rebuilt.search_batch(QUERIES, top_ns)
+    assert grown.search_bm25('machine learning', 10) == rebuilt.search_bm25('machine learning', 10)
+
+
+def test_admin_ingest_endpoint(monkeypatch):
+    client = api.app.test_client()
+    article = {'url': 'https://medium.com/@new/zebrafish-genomics-1', 'title': 'Zebrafish genomics', 'claps': 10}
+    assert client.post('/admin/ingest', json={'articles': [article]}).status_code == 403
+
+    monkeypatch.setenv('ADMIN_TOKEN', 'secret')
+    original = api.search_index
+    try:
+        assert client.post('/admin/ingest', json={'articles': [article]}).status_code == 401
+        headers = {'X-Admin-Token': 'secret'}
+        assert client.post('/admin/ingest', json={'articles': [{'title': 'no url'}]}, headers=headers).status_code == 400
+        response = client.post('/admin/ingest', json={'articles': [article]}, headers=headers)
+        assert response.status_code == 200
+        assert response.get_json()['articles_count'] == len(original.store) + 1
+        assert api.find_similar_articles('zebrafish')[0]['url'] == article['url']
+    finally:
+        api.ingested_articles.clear()
+        api.set_index(original)
+
+
+def test_ingest_racing_a_reload_keeps_both(monkeypatch):
+    article = {'url': 'https://medium.com/@new/zebrafish-genomics-2', 'title': 'Zebrafish genomics', 'claps': 10}
+    reloaded_article = {'url': 'https://medium.com/@new/axolotl-regeneration-1', 'title': 'Axolotl regeneration'}
+    original = api.search_index
+    reloaded = original.ingest(pd.DataFrame([reloaded_article]), refresh_idf=False)
+
+    started, release = threading.Event(), threading.Event()
+    ingest = SearchIndex.ingest
+
+    def slow_ingest(self, *args, **kwargs):
+        if self is original:
+            started.set()
+            release.wait(5)
+        return ingest(self, *args, **kwargs)
+
+    monkeypatch.setenv('ADMIN_TOKEN', 'secret')
+    monkeypatch.setattr(SearchIndex, 'ingest', slow_ingest)
+    client = api.app.test_client()
+    responses = []
+    try:
+        thread = threading.Thread(target=lambda: responses.append(
+            client.post('/admin/ingest', json={'articles': [article]}, headers={'X-Admin-Token': 'secret'})
+        ))
+        thread.start()
+        assert started.wait(5)
+        api.swap_reloaded(reloaded)
+        release.set()
+        thread.join(10)
+        assert responses[0].status_code == 200
+        store = api.search_index.store
+        assert store.find(article['url']) is not None and store.find(reloaded_article['url']) is not None
+
+        api.swap_reloaded(original)
+        assert api.search_index.store.find(article['url']) is not None
+        assert api.find_similar_articles('zebrafish')[0]['url'] == article['url']
+        assert api.ingested_articles == [article]
+    finally:
+        release.set()
+        api.ingested_articles.clear()
+        api.set_index(original)
+
+
+def test_ann_probing_every_list_is_exact_over_embeddings(tmp_path):
+    index = SearchIndex.from_articles(pd.read_csv('scrapping_results.csv'))
+    ann = index.ensure_ann(dimensions=32, lists=8, nprobe=2)
+    for query in QUERIES[:8]:
+        query_vector = index.vectorizer.transform([query])
+        docs, similarities = ann.search(query_vector, 10, nprobe=8)
+        brute = ann.embeddings @ ann.embed(query_vector)[0]
+        expected = np.lexsort((np.arange(len(brute)), -brute))
+        expected = expected[brute[expected] > 0][:10]
+        assert docs.tolist() == expected.tolist(), query
+        assert np.allclose(similarities, brute[expected], atol=1e-6)
+
+    index.save(str(tmp_path))
+    loaded = SearchIndex.load(str(tmp_path))
+    assert isinstance(loaded.ann, AnnIndex) and loaded.ann.nprobe == 2
+    assert loaded.search_ann('machine learning', 5) == index.search_ann('machine learning', 5)
+    grown = index.ingest(pd.read_csv('scrapping_results.csv').iloc[:10], refresh_idf=False)
+    assert len(grown.ann.embeddings) == len(grown.store)
+
+
+def test_search_endpoint_ann_mode():
+    client = api.app.test_client()
+    response = client.get('/search', query_string={'query': 'machine learning', 'mode': 'ann', 'top_n': 5})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['mode'] == 'ann' and body['count'] == 5
+    scores = [result['similarity_score'] for result in body['results']]
+    assert scores == sorted(scores, reverse=True)
+    assert client.get('/search', query_string={'query': 'python', 'mode': 'fuzzy'}).status_code == 400
+
+    original = api.search_index
+    try:
+        api.set_index(SearchIndex.from_articles(pd.read_csv('scrapping_results.csv')))
+        assert client.get('/search', query_string={'query': 'python', 'mode': 'ann'}).status_code == 503
+        assert api.search_index.ann is None
+    finally:
+        api.set_index(original)
+
+
+def test_sharded_index_matches_unsharded(tmp_path):
+    index = api.search_index
+    sharded = ShardedIndex.from_index(index, 3)
+    queries = QUERIES + ['e', 'ion f', 'xx learnin', 'qqqq ractice']
+    for query in queries:
+        for top_n in (0, 1, 10, 50, -3):
+            assert sharded.search(query, top_n) == index.search(query, top_n), (query, top_n)
+    top_ns = [(i * 7) % 60 - 2 for i in range(len(queries))]
+    assert sharded.search_batch(queries, top_ns) == index.search_batch(queries, top_ns)
+
+    sharded.save(str(tmp_path))
+    loaded = load_search_index(str(tmp_path))
+    assert isinstance(loaded, ShardedIndex) and loaded.stats()['shards'] == sharded.stats()['shards']
+    assert loaded.search('machine learning', 10) == index.search('machine learning', 10)
+
+
+def test_api_serves_sharded_index():
+    original = api.search_index
+    try:
+        api.set_index(ShardedIndex.from_index(original, 2))
+        client = api.app.test_client()
+        response = client.get('/search', query_string={'query': 'python', 'top_n': 5})
+        assert response.get_json()['results'] == original.search('python', 5)
+        assert client.get('/health').get_json()['articles_count'] == len(original.store)
+        assert client.get('/search', query_string={'query': 'python', 'mode': 'ann'}).status_code == 400
+    finally:
+        api.set_index(original)
+
+
+def test_bm25_matches_reference_formula():
+    index = SearchIndex.from_articles(pd.read_csv('scrapping_results.csv'))
+    counts = index.term_counter.transform(index.store.combined_texts()).toarray()
+    lengths = counts.sum(axis=1)
+    document_frequency = (counts > 0).sum(axis=0)
+    idf = np.log(1 + (len(counts) - document_frequency + 0.5) / (document_frequency + 0.5))
+    norm = 1.2 * (1 - 0.75 + 0.75 * lengths / lengths.mean())
+    weights = idf * counts * 2.2 / (counts + norm[:, None])
+
+    for query in ('machine learning', 'python pandas', 'docker kubernetes automation'):
+        query_counts = index.term_counter.transform([query]).toarray().ravel()
+        expected = weights @ query_counts
+        ranked = np.lexsort((np.arange(len(expected)), -expected))[:10]
+        results = index.search_bm25(query, 10, claps_weight=0.0)
+        assert [r['url'] for r in results] == [index.urls[doc] for doc in ranked], query
+        assert np.allclose([r['similarity_score'] for r in results], expected[ranked], rtol=1e-5)
+
+
+def test_extended_bm25_matches_a_rebuild_after_refresh(tmp_path):
+    articles = pd.read_csv('scrapping_results.csv')
+    grown = SearchIndex.from_articles(articles.iloc[:700].copy())
+    grown.ensure_bm25()
+    for start in range(700, len(articles), 25):
+        grown = grown.ingest(articles.iloc[start:start + 25], refresh_idf=False)
+    assert grown.bm25.scored_documents == 700 and grown.bm25.documents == len(articles)
+    assert len(grown.bm25.weight_segments) <= MAX_POSTING_SEGMENTS
+    assert grown.search_bm25('machine learning', 5)
+
+    refreshed = grown.refresh_idf().bm25
+    rebuilt = Bm25Index.from_counts(grown.term_counter.transform(grown.store.combined_texts()))
+    assert refreshed.scored_documents == len(articles)
+    assert np.array_equal(refreshed.counts.indptr, rebuilt.counts.indptr)
+    assert np.array_equal(refreshed.counts.indices, rebuilt.counts.indices)
+    assert np.allclose(refreshed.postings.data, rebuilt.postings.data, rtol=1e-6)
+    assert np.allclose(refreshed.idf, rebuilt.idf) and refreshed.average_length == rebuilt.average_length
+    for query in ('machine learning', 'python pandas', 'docker kubernetes automation'):
+        query_counts = grown.term_counter.transform([query])
+        docs, scores = refreshed.score(query_counts)
+        expected_docs, expected_scores = rebuilt.score(query_counts)
+        assert docs.tolist() == expected_docs.tolist(), query
+        assert np.allclose(scores, expected_scores, rtol=1e-5), query
+
+    grown.save(str(tmp_path))
+    loaded = SearchIndex.load(str(tmp_path)).bm25
+    assert loaded.scored_documents == 700 and loaded.refresh() is not loaded
+
+
+def test_bm25_claps_blend_and_endpoint(tmp_path):
+    index = api.search_index
+    assert index.bm25 is not None
+    relevance_only = index.search_bm25('machine learning', 20, claps_weight=0.0)
+    claps_only = index.search_bm25('machine learning', 20, claps_weight=1.0)
+    assert [r['claps'] for r in claps_only] == sorted((r['claps'] for r in claps_only), reverse=True)
+    assert claps_only[0]['claps'] >= relevance_only[0]['claps']
+
+    index.save(str(tmp_path))
+    loaded = SearchIndex.load(str(tmp_path))
+    assert loaded.bm25 is not None
+    assert loaded.search_bm25('machine learning', 10) == index.search_bm25('machine learning', 10)
+
+    client = api.app.test_client()
+    response = client.get('/search', query_string={'query': 'machine learning', 'rank': 'bm25', 'claps_weight': 0.5})
+    assert response.status_code == 200 and response.get_json()['rank'] == 'bm25'
+    assert client.get('/search', query_string={'query': 'python', 'rank': 'bm25', 'claps_weight': 2}).status_code == 400
+    assert client.get('/search', query_string={'query': 'python', 'rank': 'pagerank'}).status_code == 400
+
+    try:
+        api.set_index(SearchIndex.load(str(tmp_path)))
+        api.search_index.bm25 = None
+        assert client.get('/search', query_string={'query': 'python', 'rank': 'bm25'}).status_code == 503
+        assert api.search_index.bm25 is None
+    finally:
+        api.set_index(index)
@@ -0,0 +1,109 @@
+import hashlib
+import math
+import re
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+POST_ID_RE = re.compile(r'[0-9a-fA-F]{10,12}')
+POST_ID_TAIL_RE = re.compile(r'-([0-9a-fA-F]{10,12})$')
+TRACKING_PARAMS = {'source', 'gi', 'fbclid', 'gclid', 'ref', 'ref_src'}
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+
+def is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith('utm_')
+
+
+def normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and str(parts.port) != DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+    path = parts.path or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/')
+    query = urlencode(sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not is_tracking_param(name)
+    ))
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+def canonical_key(url: str) -> str:
+    segments = [segment for segment in urlsplit(url.strip()).path.split('/') if segment]
+    if len(segments) == 2 and segments[0] == 'p' and POST_ID_RE.fullmatch(segments[1]):
+        return 'post:' + segments[1].lower()
+    if segments:
+        match = POST_ID_TAIL_RE.search(segments[-1])
+        if match:
+            return 'post:' + match.group(1).lower()
+    return normalize_url(url)
+
+
+def _digest(key: str) -> bytes:
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, digest: bytes):
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, digest: bytes) -> bool:
+        present = True
+        for position in self._positions(digest):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                present = False
+                self.bits[byte] |= 1 << bit
+        return not present
+
+
+class UrlDeduplicator:
+    def __init__(self, use_bloom: bool = False, capacity: int = 1000000, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.bloom = BloomFilter(self.capacity, error_rate) if use_bloom else None
+        self.seen = set()
+        self.total = 0
+        self.duplicates = 0
+
+    def _spill(self) -> None:
+        self.bloom = BloomFilter(2 * self.capacity, self.error_rate)
+        for fingerprint in self.seen:
+            self.bloom.add(fingerprint.to_bytes(16, 'little'))
+        self.seen = set()
+
+    def add(self, url: str) -> bool:
+        self.total += 1
+        digest = _digest(canonical_key(url))
+        if self.bloom is None and len(self.seen) >= self.capacity:
+            self._spill()
+        if self.bloom is not None:
+            is_new = self.bloom.add(digest)
+        else:
+            fingerprint = int.from_bytes(digest, 'little')
+            is_new = fingerprint not in self.seen
+            self.seen.add(fingerprint)
+        if not is_new:
+            self.duplicates += 1
+        return is_new
+
+
+def dedupe_urls(urls: Iterable[str], use_bloom: bool = False, capacity: Optional[int] = None) -> Tuple[List[str], int]:
+    if capacity is None:
+        capacity = len(urls) if isinstance(urls, list) else 1000000
+    deduper = UrlDeduplicator(use_bloom, capacity)
+    unique = [normalize_url(url) for url in urls if deduper.add(url)]
+    return unique, deduper.duplicates